@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='skill_ids',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Sorted ids of the canonical skills in skills'),
+        ),
+    ]
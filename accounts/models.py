@@ -11,6 +11,10 @@ class UserProfile(models.Model):
     skills = models.TextField(
         help_text="Enter your skills separated by commas (e.g., Python, Django, Machine Learning)"
     )
+    skill_ids = models.JSONField(
+        default=list, blank=True, editable=False,
+        help_text="Sorted ids of the canonical skills in skills"
+    )
     bio = models.TextField(blank=True, null=True, help_text="Brief description about yourself")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,10 @@
+"""
+Standalone performance benchmarks for the recommendation engine.
+
+Run a benchmark as a module from the project root, e.g.:
+
+    python -m benchmarks.bench_job_index
+
+``bench_suite`` covers the whole engine and writes JSON results that can be
+compared across releases (``--compare old.json new.json``).
+"""
@@ -0,0 +1,69 @@
+"""
+Approximate (IVF) vs. exact retrieval: recall@k and latency per n_probe.
+
+Usage:
+    python -m benchmarks.bench_ann [--jobs 1000000] [--probes 1 2 4 8 16 32]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from ml_engine.ann import IVFIndex, rank_approximate
+from ml_engine.index import JobIndex
+from ml_engine.ranking import top_n
+
+from .synthetic import generate_job_rows, generate_user_skills
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--components', type=int, default=64)
+    parser.add_argument('--lists', type=int, default=None)
+    parser.add_argument('--probes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = JobIndex.build(generate_job_rows(args.jobs))
+    print(f'Job index: {args.jobs} jobs in {time.perf_counter() - start:.1f}s')
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(index.job_matrix, n_components=args.components, n_lists=args.lists)
+    print(f'IVF index: {len(ivf.centroids)} lists in {time.perf_counter() - start:.1f}s')
+
+    queries = generate_user_skills(args.queries)
+
+    exact_results = []
+    latencies = []
+    for skills in queries:
+        query_start = time.perf_counter()
+        _, scores = top_n(index.score(skills), args.top_n)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+        exact_results.append(scores)
+
+    print(f"{'mode':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(args.top_n):>10}")
+    print(f"{'exact':>10} {statistics.median(latencies):>8.2f} "
+          f"{np.percentile(latencies, 95):>8.2f} {1.0:>10.3f}")
+
+    for n_probe in args.probes:
+        latencies = []
+        recalls = []
+        for skills, expected in zip(queries, exact_results):
+            query_start = time.perf_counter()
+            _, scores = rank_approximate(index, ivf, skills, args.top_n, n_probe)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+            if len(expected):
+                # Tie-aware: any job scoring at least the exact k-th best counts
+                hits = np.count_nonzero(scores >= expected[-1] - 1e-9)
+                recalls.append(min(hits, len(expected)) / len(expected))
+        print(f"{f'probe={n_probe}':>10} {statistics.median(latencies):>8.2f} "
+              f"{np.percentile(latencies, 95):>8.2f} {statistics.mean(recalls):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
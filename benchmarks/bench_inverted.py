@@ -0,0 +1,58 @@
+"""
+Inverted skill index vs. full scan: candidate-set size and latency.
+
+Skill popularity is Zipf-distributed; higher exponents concentrate postings
+on a few very common skills, lower ones spread them out.
+
+Usage:
+    python -m benchmarks.bench_inverted [--jobs 100000] [--exponents 0.8 1.1 1.5]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from ml_engine.index import JobIndex
+from ml_engine.inverted import InvertedSkillIndex, rank_inverted
+from ml_engine.ranking import top_n
+
+from .synthetic import generate_job_rows, generate_user_skills
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--exponents', type=float, nargs='+', default=[0.8, 1.1, 1.5])
+    args = parser.parse_args()
+
+    print(f"{'zipf':>5} {'candidates p50':>15} {'p95':>8} {'scan ms':>8} {'inverted ms':>12} {'same top-n':>11}")
+    for exponent in args.exponents:
+        index = JobIndex.build(generate_job_rows(args.jobs, exponent=exponent))
+        inverted = InvertedSkillIndex.build(index.job_matrix)
+        queries = generate_user_skills(args.queries, exponent=exponent)
+
+        sizes, scan_ms, inverted_ms, agree = [], [], [], []
+        for skills in queries:
+            sizes.append(len(inverted.candidates(index.transform([skills]))))
+
+            start = time.perf_counter()
+            _, expected = top_n(index.score(skills), args.top_n)
+            scan_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            _, scores = rank_inverted(index, inverted, skills, args.top_n)
+            inverted_ms.append((time.perf_counter() - start) * 1000)
+
+            agree.append(np.allclose(scores, expected))
+
+        print(f'{exponent:>5} {int(statistics.median(sizes)):>8} ({statistics.median(sizes) / args.jobs:>4.0%})'
+              f' {int(np.percentile(sizes, 95)):>8} {statistics.median(scan_ms):>8.2f}'
+              f' {statistics.median(inverted_ms):>12.2f} {all(agree)!s:>11}')
+
+
+if __name__ == '__main__':
+    main()
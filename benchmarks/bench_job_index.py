@@ -0,0 +1,66 @@
+"""
+Per-request latency: refitting TF-IDF per request vs. the pre-fitted JobIndex.
+
+Usage:
+    python -m benchmarks.bench_job_index [--sizes 1000 10000 100000] [--queries 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from sklearn.metrics.pairwise import cosine_similarity
+
+from ml_engine.index import JobIndex
+from ml_engine.preprocessing import build_vectorizer, preprocess_skills
+
+from .synthetic import generate_job_rows, generate_user_skills
+
+
+def refit_per_request(user_skills, job_documents):
+    """Reproduce the original pipeline: fit over user + catalog every time."""
+    corpus = [preprocess_skills(user_skills)] + job_documents
+    tfidf_matrix = build_vectorizer().fit_transform(corpus)
+    return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
+
+
+def time_queries(func, queries):
+    """Return per-query latencies in milliseconds."""
+    latencies = []
+    for user_skills in queries:
+        start = time.perf_counter()
+        func(user_skills)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--refit-queries', type=int, default=3,
+                        help='Queries for the (slow) refit baseline')
+    args = parser.parse_args()
+
+    queries = generate_user_skills(args.queries)
+
+    print(f"{'jobs':>8} {'build ms':>10} {'refit ms/req':>13} {'index ms/req':>13} {'speedup':>8}")
+    for size in args.sizes:
+        rows = generate_job_rows(size)
+        job_documents = [preprocess_skills(skills) for _, skills in rows]
+
+        start = time.perf_counter()
+        index = JobIndex.build(rows)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        refit = statistics.median(time_queries(
+            lambda skills: refit_per_request(skills, job_documents),
+            queries[:args.refit_queries],
+        ))
+        indexed = statistics.median(time_queries(index.score, queries))
+
+        print(f'{size:>8} {build_ms:>10.1f} {refit:>13.2f} {indexed:>13.2f} {refit / indexed:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Listing query plans and latency on SQLite, before and after the Job indexes
+of migration jobs/0005 and the maintained active jobs counter, and OFFSET
+against keyset pagination (jobs/pagination.py) of a deep job list page.
+
+Builds a standalone SQLite database shaped like the jobs_job table, runs the
+queries issued by the landing, dashboard and job list pages without the
+indexes, then adds them and runs the queries again.
+
+Usage:
+    python -m benchmarks.bench_job_queries [--jobs 1000000] [--db /tmp/jobs_bench.sqlite3]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from .synthetic import generate_job_fields
+
+SCHEMA = '''
+CREATE TABLE "jobs_job" (
+    "id" integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "title" varchar(200) NOT NULL,
+    "required_skills" text NOT NULL,
+    "skill_ids" text NOT NULL,
+    "description" text NOT NULL,
+    "company" varchar(200) NOT NULL,
+    "location" varchar(200) NOT NULL,
+    "salary_range" varchar(100) NULL,
+    "is_active" bool NOT NULL,
+    "created_at" datetime NOT NULL,
+    "updated_at" datetime NOT NULL
+);
+CREATE TABLE "jobs_catalogcounter" (
+    "name" varchar(50) NOT NULL PRIMARY KEY,
+    "value" bigint NOT NULL,
+    "updated_at" datetime NOT NULL
+);
+'''
+
+# As generated by ``manage.py sqlmigrate jobs 0005``
+INDEXES = '''
+CREATE INDEX "job_active_recent_idx" ON "jobs_job" ("created_at" DESC, "id" DESC) WHERE "is_active";
+CREATE INDEX "job_inactive_recent_idx" ON "jobs_job" ("created_at" DESC) WHERE NOT "is_active";
+'''
+
+CARD_COLUMNS = '"id", "title", "company", "location", "salary_range", "description", "required_skills", "created_at"'
+
+# (page, query) pairs, as issued by the ORM
+QUERIES = [
+    ('home / dashboard count', 'SELECT COUNT(*) FROM "jobs_job" WHERE "is_active"'),
+    ('active jobs counter', 'SELECT "value" FROM "jobs_catalogcounter" WHERE "name" = \'active_jobs\''),
+    ('dashboard recent 6',
+     f'SELECT {CARD_COLUMNS} FROM "jobs_job" WHERE "is_active" ORDER BY "created_at" DESC LIMIT 6'),
+    ('job list page 1',
+     f'SELECT {CARD_COLUMNS} FROM "jobs_job" WHERE "is_active" ORDER BY "created_at" DESC LIMIT 10'),
+    ('job list page 1000',
+     f'SELECT {CARD_COLUMNS} FROM "jobs_job" WHERE "is_active" ORDER BY "created_at" DESC '
+     'LIMIT 10 OFFSET 9990'),
+    ('recommendations exists', 'SELECT 1 FROM "jobs_job" WHERE "is_active" LIMIT 1'),
+    ('admin inactive filter',
+     'SELECT "id" FROM "jobs_job" WHERE NOT "is_active" ORDER BY "created_at" DESC LIMIT 100'),
+]
+
+
+def deep_page_queries(connection, page=5000, per_page=10):
+    """
+    OFFSET and keyset queries of one deep job list page.
+
+    The keyset query seeks past the last row of the previous page, as
+    jobs/pagination.py does with the (created_at, id) in its cursor.
+    """
+    offset = (page - 1) * per_page
+    created_at, row_id = connection.execute(
+        'SELECT "created_at", "id" FROM "jobs_job" WHERE "is_active" '
+        'ORDER BY "created_at" DESC, "id" DESC LIMIT 1 OFFSET ?', (offset - 1,)
+    ).fetchone()
+    order = 'ORDER BY "created_at" DESC, "id" DESC'
+    return [
+        (f'job list page {page} offset',
+         f'SELECT {CARD_COLUMNS} FROM "jobs_job" WHERE "is_active" {order} '
+         f'LIMIT {per_page + 1} OFFSET {offset}'),
+        (f'job list page {page} keyset',
+         f'SELECT {CARD_COLUMNS} FROM "jobs_job" WHERE ("is_active" AND "created_at" <= \'{created_at}\' '
+         f'AND NOT ("created_at" = \'{created_at}\' AND "id" >= {row_id})) {order} LIMIT {per_page + 1}'),
+    ]
+
+
+def populate(connection, n_jobs, active_ratio=0.9, batch_size=10000):
+    """Insert synthetic jobs, oldest first, with a share of inactive ones."""
+    connection.executescript(SCHEMA)
+    start = datetime(2024, 1, 1)
+    rows = (
+        (
+            fields['title'], fields['required_skills'], '[]', fields['description'],
+            fields['company'], fields['location'], fields['salary_range'],
+            (number * 7919) % 100 < active_ratio * 100,
+            (start + timedelta(seconds=number * 30)).isoformat(' '),
+            (start + timedelta(seconds=number * 30)).isoformat(' '),
+        )
+        for number, fields in enumerate(generate_job_fields(n_jobs))
+    )
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        connection.executemany(
+            'INSERT INTO "jobs_job" ("title", "required_skills", "skill_ids", "description", '
+            '"company", "location", "salary_range", "is_active", "created_at", "updated_at") '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            batch,
+        )
+    active = connection.execute('SELECT COUNT(*) FROM "jobs_job" WHERE "is_active"').fetchone()[0]
+    connection.execute(
+        'INSERT INTO "jobs_catalogcounter" VALUES (\'active_jobs\', ?, datetime(\'now\'))', (active,)
+    )
+    connection.commit()
+
+
+def plan(connection, sql):
+    """EXPLAIN QUERY PLAN details on one line."""
+    return '; '.join(row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}'))
+
+
+def median_ms(connection, sql, repeat):
+    """Median milliseconds of running and fetching a query."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(connection, queries, repeat):
+    return {
+        name: (plan(connection, sql), median_ms(connection, sql, repeat))
+        for name, sql in queries
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=1000000)
+    parser.add_argument('--db', default='/tmp/jobs_bench.sqlite3')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    connection = sqlite3.connect(args.db)
+
+    started = time.perf_counter()
+    populate(connection, args.jobs)
+    print(f'{args.jobs} jobs inserted in {time.perf_counter() - started:.1f}s ({args.db})')
+
+    queries = QUERIES + deep_page_queries(connection)
+    before = run(connection, queries, args.repeat)
+    started = time.perf_counter()
+    connection.executescript(INDEXES)
+    connection.execute('ANALYZE')
+    print(f'Indexes built in {time.perf_counter() - started:.1f}s')
+    after = run(connection, queries, args.repeat)
+
+    print(f"\n{'query':<30} {'before ms':>10} {'after ms':>10}")
+    for name, _ in queries:
+        print(f'{name:<30} {before[name][1]:>10.2f} {after[name][1]:>10.2f}')
+    print('\nQuery plans (before -> after):')
+    for name, _ in queries:
+        print(f'  {name}:\n    {before[name][0]}\n    {after[name][0]}')
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
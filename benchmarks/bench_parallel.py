@@ -0,0 +1,68 @@
+"""
+Sharded scoring: per-query latency and throughput from 1 to N worker processes.
+
+Usage:
+    python -m benchmarks.bench_parallel [--jobs 200000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ml_engine.index import JobIndex
+from ml_engine.parallel import ShardedScorer
+from ml_engine.ranking import top_n
+
+from .synthetic import generate_job_rows, generate_user_skills
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    index = JobIndex.build(generate_job_rows(args.jobs))
+    queries = generate_user_skills(args.queries)
+    print(f'{args.jobs} jobs, {index.job_matrix.nnz} non-zeros, {os.cpu_count()} CPU(s)')
+
+    def baseline(skills):
+        return top_n(index.score(skills), args.top_n)
+
+    start = time.perf_counter()
+    latencies = []
+    for skills in queries:
+        query_start = time.perf_counter()
+        baseline(skills)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+    elapsed = time.perf_counter() - start
+    print(f"{'mode':>12} {'p50 ms':>8} {'qps':>8}")
+    print(f"{'in-process':>12} {statistics.median(latencies):>8.2f} {len(queries) / elapsed:>8.1f}")
+
+    for n_workers in args.workers:
+        with ShardedScorer(n_workers) as scorer:
+            scorer.publish(index)
+            scorer.rank(index, queries[0], args.top_n)  # warm up: spawn and attach
+
+            latencies = []
+            for skills in queries:
+                query_start = time.perf_counter()
+                scorer.rank(index, skills, args.top_n)
+                latencies.append((time.perf_counter() - query_start) * 1000)
+
+            # Concurrent requests, as under a threaded server
+            start = time.perf_counter()
+            with ThreadPoolExecutor(n_workers * 2) as clients:
+                list(clients.map(lambda skills: scorer.rank(index, skills, args.top_n), queries))
+            elapsed = time.perf_counter() - start
+
+        print(f"{f'{n_workers} worker(s)':>12} {statistics.median(latencies):>8.2f} {len(queries) / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
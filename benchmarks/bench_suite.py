@@ -0,0 +1,192 @@
+"""
+Recommendation engine benchmark suite, with JSON results for regression tracking.
+
+For each catalog size: index build time, single-query latency percentiles
+(JobRecommender.rank_jobs on the exact path, result cache off), batch
+throughput (JobRecommender.recommend_batch) and the peak memory of the build
+and the batch.
+
+Usage:
+    python -m benchmarks.bench_suite [--sizes 1000 10000 100000 1000000]
+                                     [--queries 200] [--output results.json]
+
+Compare two runs with:
+    python -m benchmarks.bench_suite --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+import sklearn
+
+from ml_engine import conf
+from ml_engine.index import JobIndex
+from ml_engine.recommender import JobRecommender
+
+from .synthetic import generate_job_rows, generate_user_skills
+
+# Metrics where a higher value is a regression
+LOWER_IS_BETTER = ('build_s', 'build_peak_mb', 'latency_p50_ms', 'latency_p95_ms',
+                   'latency_p99_ms', 'batch_peak_mb')
+
+
+def percentiles(latencies):
+    """p50/p95/p99/max of latencies in milliseconds."""
+    values = np.percentile(latencies, [50, 95, 99, 100])
+    return dict(zip(('latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'latency_max_ms'),
+                    (round(float(value), 3) for value in values)))
+
+
+def timed(func):
+    """Run func, returning (result, seconds)."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(func):
+    """
+    Peak MB allocated while running func.
+
+    Traced separately from the timings: tracemalloc slows allocation-heavy
+    code down several times.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_size(n_jobs, queries, top_n, batch_users, chunk_size, memory=True):
+    """Benchmark one catalog size."""
+    rows = generate_job_rows(n_jobs)
+    index, build_s = timed(lambda: JobIndex.build(rows))
+    build_peak = peak_memory(lambda: JobIndex.build(rows)) if memory else None
+    del rows
+    recommender = JobRecommender(index)
+
+    recommender.rank_jobs(queries[0], top_n)  # warm up
+    latencies = []
+    for skills in queries:
+        start = time.perf_counter()
+        recommender.rank_jobs(skills, top_n)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    users = list(enumerate(generate_user_skills(batch_users, seed=11)))
+    def batch():
+        return recommender.recommend_batch(users, top_n, chunk_size)
+
+    _, batch_s = timed(batch)
+    batch_peak = peak_memory(batch) if memory else None
+
+    return {
+        'jobs': n_jobs,
+        'terms': index.n_terms,
+        'nnz': int(index.job_matrix.nnz),
+        'build_s': round(build_s, 3),
+        'build_peak_mb': build_peak and round(build_peak, 1),
+        **percentiles(latencies),
+        'queries_per_s': round(len(latencies) / (sum(latencies) / 1000), 1),
+        'batch_users_per_s': round(batch_users / batch_s, 1),
+        'batch_peak_mb': batch_peak and round(batch_peak, 1),
+    }
+
+
+def environment():
+    """Versions and hardware the results were measured on."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'scikit-learn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(old_path, new_path, tolerance):
+    """Print the change of every metric; return True if nothing regressed."""
+    with open(old_path, encoding='utf-8') as f:
+        old = {result['jobs']: result for result in json.load(f)['results']}
+    with open(new_path, encoding='utf-8') as f:
+        new = {result['jobs']: result for result in json.load(f)['results']}
+
+    ok = True
+    for jobs in sorted(old.keys() & new.keys()):
+        for metric in LOWER_IS_BETTER + ('queries_per_s', 'batch_users_per_s'):
+            before, after = old[jobs].get(metric), new[jobs].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            regressed = change > tolerance if metric in LOWER_IS_BETTER else change < -tolerance
+            ok = ok and not regressed
+            flag = '  REGRESSION' if regressed else ''
+            print(f'{jobs:>8} {metric:>18} {before:>10} -> {after:>10} ({change:+.1%}){flag}')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--batch-users', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=128)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the (slow) peak memory measurements')
+    parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compare two result files instead of running')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative change reported as a regression by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.tolerance) else 1)
+
+    # Measure the engine itself: exact in-process scoring, no result cache
+    conf.DEFAULTS.update(RESULT_CACHE=None, RETRIEVAL='exact', SCORING_WORKERS=0)
+
+    queries = generate_user_skills(args.queries)
+    results = []
+    for size in args.sizes:
+        result = bench_size(size, queries, args.top_n, args.batch_users, args.chunk_size,
+                            memory=not args.no_memory)
+        print(f"{size:>8} jobs: build {result['build_s']}s, p50 {result['latency_p50_ms']}ms, "
+              f"p99 {result['latency_p99_ms']}ms, batch {result['batch_users_per_s']} users/s",
+              file=sys.stderr)
+        results.append(result)
+
+    report = {
+        'benchmark': 'recommendation_engine',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': environment(),
+        'parameters': {
+            'queries': args.queries,
+            'top_n': args.top_n,
+            'batch_users': args.batch_users,
+            'chunk_size': args.chunk_size,
+            'memory': not args.no_memory,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
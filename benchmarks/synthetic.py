@@ -0,0 +1,208 @@
+"""
+Deterministic synthetic job catalog for benchmarks.
+
+Skill popularity follows a Zipf-like distribution so a handful of skills
+(Python, SQL, ...) appear in many postings while most are rare, which is
+what real job boards look like.
+
+``generate_job_rows`` / ``generate_user_skills`` feed the engine directly;
+``populate_database`` writes the same data as Job and UserProfile rows.
+"""
+
+import random
+
+BASE_SKILLS = [
+    'Python', 'JavaScript', 'SQL', 'Java', 'React', 'Django', 'Docker',
+    'AWS', 'Kubernetes', 'Git', 'Node.js', 'TypeScript', 'PostgreSQL',
+    'Machine Learning', 'REST API', 'Linux', 'Go', 'C++', 'Data Science',
+    'TensorFlow', 'Scikit-learn', 'MongoDB', 'Redis', 'GraphQL', 'Azure',
+    'Spark', 'Kafka', 'Terraform', 'Flask', 'Vue', 'Angular', 'Rust',
+    'Pandas', 'NumPy', 'CI/CD', 'Agile', 'HTML', 'CSS', 'Swift', 'Kotlin',
+]
+
+QUALIFIERS = [
+    'Advanced', 'Applied', 'Cloud', 'Distributed', 'Embedded', 'Enterprise',
+    'Mobile', 'Realtime', 'Secure', 'Scalable',
+]
+
+TITLES = [
+    'Software Engineer', 'Backend Developer', 'Frontend Developer',
+    'Full Stack Developer', 'Data Scientist', 'Data Engineer',
+    'Machine Learning Engineer', 'DevOps Engineer', 'Cloud Architect',
+    'Mobile Developer', 'QA Engineer', 'Site Reliability Engineer',
+]
+
+LEVELS = ['Junior', '', 'Senior', 'Lead', 'Principal']
+
+COMPANIES = [f'{name} {suffix}' for name in (
+    'Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne',
+    'Wonka', 'Cyberdyne', 'Soylent',
+) for suffix in ('Labs', 'Systems', 'Technologies')]
+
+LOCATIONS = [
+    'Remote', 'Bangalore', 'Hyderabad', 'Pune', 'Mumbai', 'Delhi',
+    'San Francisco', 'New York', 'London', 'Berlin', 'Singapore', 'Toronto',
+]
+
+
+def skill_vocabulary():
+    """
+    Return the synthetic skill vocabulary, most popular skills first.
+
+    Returns:
+        list: Skill names
+    """
+    skills = list(BASE_SKILLS)
+    for qualifier in QUALIFIERS:
+        skills.extend(f'{qualifier} {skill}' for skill in BASE_SKILLS)
+    return skills
+
+
+def skill_weights(skills, exponent=1.1):
+    """
+    Zipf-like popularity weights for a ranked skill list.
+
+    Args:
+        skills (list): Skill names, most popular first
+        exponent (float): Zipf exponent; higher means more skew
+
+    Returns:
+        list: One weight per skill
+    """
+    return [1.0 / (rank ** exponent) for rank in range(1, len(skills) + 1)]
+
+
+def generate_skills(rng, skills, weights, min_skills=3, max_skills=8):
+    """
+    Draw a comma-separated skills string.
+
+    Args:
+        rng (random.Random): Random source
+        skills (list): Skill names
+        weights (list): Popularity weights
+        min_skills (int): Minimum number of skills
+        max_skills (int): Maximum number of skills
+
+    Returns:
+        str: Comma-separated skills
+    """
+    count = rng.randint(min_skills, max_skills)
+    chosen = dict.fromkeys(rng.choices(skills, weights=weights, k=count))
+    return ', '.join(chosen)
+
+
+def generate_job_rows(n_jobs, seed=42, exponent=1.1):
+    """
+    Generate (job_id, required_skills) rows.
+
+    Args:
+        n_jobs (int): Number of jobs
+        seed (int): Random seed
+        exponent (float): Zipf exponent of skill popularity
+
+    Returns:
+        list: (job_id, required_skills) tuples
+    """
+    rng = random.Random(seed)
+    skills = skill_vocabulary()
+    weights = skill_weights(skills, exponent)
+    return [
+        (job_id, generate_skills(rng, skills, weights))
+        for job_id in range(1, n_jobs + 1)
+    ]
+
+
+def generate_user_skills(n_users, seed=7, exponent=1.1):
+    """
+    Generate users' comma-separated skills strings.
+
+    Args:
+        n_users (int): Number of users
+        seed (int): Random seed
+        exponent (float): Zipf exponent of skill popularity
+
+    Returns:
+        list: Skills strings
+    """
+    rng = random.Random(seed)
+    skills = skill_vocabulary()
+    weights = skill_weights(skills, exponent)
+    return [generate_skills(rng, skills, weights, 2, 6) for _ in range(n_users)]
+
+
+def generate_job_fields(n_jobs, seed=42, exponent=1.1):
+    """
+    Generate complete Job field values; skills match generate_job_rows().
+
+    Args:
+        n_jobs (int): Number of jobs
+        seed (int): Random seed
+        exponent (float): Zipf exponent of skill popularity
+
+    Yields:
+        dict: Job field values
+    """
+    rng = random.Random(seed + 1)
+    for _, required_skills in generate_job_rows(n_jobs, seed, exponent):
+        title = f'{rng.choice(LEVELS)} {rng.choice(TITLES)}'.strip()
+        low = rng.randrange(4, 40) * 100000
+        yield {
+            'title': title,
+            'company': rng.choice(COMPANIES),
+            'location': rng.choice(LOCATIONS),
+            'salary_range': f'₹{low // 100000}-{low * 3 // 200000} LPA',
+            'required_skills': required_skills,
+            'description': f'We are hiring a {title} experienced with {required_skills}.',
+        }
+
+
+def populate_database(n_jobs, n_users=0, seed=42, batch_size=2000):
+    """
+    Insert synthetic Job rows and users with a UserProfile.
+
+    Requires a configured Django project. Rows go in with bulk_create, so
+    model signals do not fire: skill ids are interned here, and the job
+    index must be rebuilt afterwards (``manage.py build_job_index``).
+
+    Args:
+        n_jobs (int): Number of jobs
+        n_users (int): Number of users with a profile
+        seed (int): Random seed
+        batch_size (int): Rows per INSERT
+
+    Returns:
+        tuple: (jobs created, profiles created)
+    """
+    from itertools import islice
+
+    from django.contrib.auth.models import User
+
+    from accounts.models import UserProfile
+    from jobs.models import Job
+    from jobs.skills import intern_skills
+
+    jobs = (
+        Job(skill_ids=intern_skills(fields['required_skills']), **fields)
+        for fields in generate_job_fields(n_jobs, seed)
+    )
+    while True:
+        batch = list(islice(jobs, batch_size))
+        if not batch:
+            break
+        Job.objects.bulk_create(batch)
+
+    skills_list = generate_user_skills(n_users, seed + 100)
+    first = User.objects.count()
+    for start in range(0, n_users, batch_size):
+        users = User.objects.bulk_create([
+            User(username=f'synthetic-{first + number}')
+            for number in range(start, min(start + batch_size, n_users))
+        ])
+        if not users or users[0].pk is None:
+            # Backends that do not return ids from bulk_create
+            users = list(User.objects.filter(username__in=[user.username for user in users]))
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, skills=skills, skill_ids=intern_skills(skills))
+            for user, skills in zip(users, skills_list[start:start + batch_size])
+        ])
+    return n_jobs, n_users
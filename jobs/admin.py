@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Job
+from django.db.models import Q
+from .models import Job, JobAlert, Skill, SkillAlias
+from .search import matching_job_ids, search_available
 
 
 @admin.register(Job)
@@ -9,8 +11,8 @@ class JobAdmin(admin.ModelAdmin):
     """
     list_display = ['title', 'company', 'location', 'is_active', 'created_at']
     list_filter = ['is_active', 'company', 'created_at']
-    search_fields = ['title', 'company', 'required_skills', 'description']
-    readonly_fields = ['created_at', 'updated_at']
+    search_fields = ['title', 'company', 'required_skills', 'description', 'external_id']
+    readonly_fields = ['external_id', 'created_at', 'updated_at']
     list_editable = ['is_active']
     
     fieldsets = (
@@ -24,7 +26,7 @@ class JobAdmin(admin.ModelAdmin):
             'fields': ('is_active',)
         }),
         ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
+            'fields': ('external_id', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
@@ -36,6 +38,20 @@ class JobAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the full-text index instead of LIKE scans.
+        """
+        if not search_term.strip() or not search_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        # The changelist applies its own ordering, so the bm25 rank is not needed;
+        # external_id is not in the full-text index but has a unique index
+        search_term = search_term.strip()
+        matches = queryset.filter(
+            Q(id__in=matching_job_ids(search_term)) | Q(external_id=search_term)
+        )
+        return matches, False
+
     actions = ['activate_jobs', 'deactivate_jobs']
 
     def activate_jobs(self, request, queryset):
@@ -49,3 +65,32 @@ class JobAdmin(admin.ModelAdmin):
         updated = queryset.update(is_active=False)
         self.message_user(request, f'{updated} job(s) deactivated successfully.')
     deactivate_jobs.short_description = 'Deactivate selected jobs'
+
+
+class SkillAliasInline(admin.TabularInline):
+    """
+    Inline editor for the aliases of a skill.
+    """
+    model = SkillAlias
+    extra = 1
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the canonical skill dictionary.
+    """
+    list_display = ['name']
+    search_fields = ['name', 'aliases__alias']
+    inlines = [SkillAliasInline]
+
+
+@admin.register(JobAlert)
+class JobAlertAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the alerts recorded by reverse matching.
+    """
+    list_display = ['profile', 'job', 'similarity_score', 'created_at', 'sent_at']
+    list_filter = ['created_at', 'sent_at']
+    raw_id_fields = ['profile', 'job']
+    list_select_related = ['profile__user', 'job']
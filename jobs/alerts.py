@@ -0,0 +1,221 @@
+"""
+Reverse matching of new jobs against user profiles.
+
+When a job is posted, its id is put on a local worker queue (see
+jobs/signals.py). A daemon thread takes the queued jobs in batches, scores
+them against the skill vectors of every profile in one chunked sparse
+product (see ml_engine/reverse.py) and records the profiles scoring at least
+RECOMMENDER_JOB_ALERT_THRESHOLD as JobAlert rows, for digests to send.
+
+Matched jobs are stamped with ``alerts_matched_at``. The queue lives in the
+worker process, so jobs still queued when it exits (and jobs activated
+after being posted) are left unstamped; ``manage.py match_job_alerts``
+sweeps them up.
+
+The profile vectors stay resident in the worker process. They are rebuilt
+when the job index is re-fitted and otherwise refreshed from the profiles
+updated since the previous batch.
+"""
+
+import logging
+import queue
+import threading
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from ml_engine.conf import get_setting
+from ml_engine.index import get_job_index
+from ml_engine.metrics import increment, span
+from ml_engine.reverse import ProfileMatrix, iter_profile_matches
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk_create batch
+BATCH_SIZE = 1000
+
+# Job ids waiting for the worker thread
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+# Resident profile vectors and the time they were last synced
+_profiles = None
+_profiles_synced_at = None
+_profiles_lock = threading.Lock()
+
+
+def get_profile_matrix(index):
+    """
+    Return the profile vectors for ``index``'s fit, syncing changed profiles.
+
+    Args:
+        index (JobIndex): Job index
+
+    Returns:
+        ProfileMatrix: Vectors of every user profile
+    """
+    from accounts.models import UserProfile
+
+    global _profiles, _profiles_synced_at
+    with _profiles_lock:
+        synced_at = timezone.now()
+        if _profiles is None or _profiles.fit != (index.built_at, index.n_fitted):
+            rows = (
+                UserProfile.objects.order_by('id')
+                .values_list('id', 'skills')
+                .iterator(chunk_size=get_setting('JOB_ALERT_CHUNK_SIZE'))
+            )
+            _profiles = ProfileMatrix.build(index, rows, get_setting('JOB_ALERT_CHUNK_SIZE'))
+        else:
+            changes = dict(
+                UserProfile.objects.filter(updated_at__gte=_profiles_synced_at)
+                .values_list('id', 'skills')
+            )
+            _profiles = _profiles.apply_updates(index, changes)
+        _profiles_synced_at = synced_at
+        return _profiles
+
+
+def forget_profiles(profile_ids):
+    """
+    Drop deleted profiles from the resident vectors.
+
+    Args:
+        profile_ids (list): Deleted profile ids
+    """
+    global _profiles
+    with _profiles_lock:
+        if _profiles is not None:
+            _profiles = _profiles.apply_updates(None, dict.fromkeys(profile_ids))
+
+
+def match_new_jobs(job_ids):
+    """
+    Record alerts for the profiles matching new jobs, and stamp the jobs
+    as matched.
+
+    Args:
+        job_ids (list): Ids of newly posted jobs
+
+    Returns:
+        int: Number of alerts recorded
+    """
+    from .models import Job, JobAlert
+
+    rows = list(
+        Job.objects.filter(id__in=job_ids, is_active=True).values_list('id', 'required_skills')
+    )
+    if not rows:
+        return 0
+    matched_at = timezone.now()
+
+    index = get_job_index()
+    if index.n_terms == 0:
+        return 0
+    profiles = get_profile_matrix(index)
+    matched_job_ids, skills_list = zip(*rows)
+    job_vectors = index.transform(list(skills_list))
+
+    recorded = 0
+    for job_rows, profile_ids, scores in iter_profile_matches(
+            profiles, job_vectors, get_setting('JOB_ALERT_THRESHOLD'),
+            get_setting('JOB_ALERT_CHUNK_SIZE')):
+        alerts = [
+            JobAlert(profile_id=profile_id, job_id=matched_job_ids[job_row], similarity_score=score)
+            for job_row, profile_id, score in zip(job_rows.tolist(), profile_ids.tolist(), scores.tolist())
+        ]
+        recorded += _store_alerts(alerts)
+
+    Job.objects.filter(id__in=matched_job_ids).update(alerts_matched_at=matched_at)
+    return recorded
+
+
+def pending_alert_jobs():
+    """
+    Active jobs not matched for alerts yet.
+
+    Returns:
+        QuerySet: Ids of the jobs, oldest first
+    """
+    from .models import Job
+
+    return (
+        Job.objects.filter(is_active=True, alerts_matched_at__isnull=True)
+        .order_by('id').values_list('id', flat=True)
+    )
+
+
+def _store_alerts(alerts):
+    """
+    Insert alerts, skipping ones already recorded and deleted profiles.
+
+    Returns:
+        int: Number of alerts inserted
+    """
+    from accounts.models import UserProfile
+    from .models import JobAlert
+
+    if not alerts:
+        return 0
+    # Pairs recorded by an earlier run; ignore_conflicts would skip them
+    # silently, and they must not be counted
+    recorded = set(
+        JobAlert.objects.filter(job_id__in={alert.job_id for alert in alerts})
+        .values_list('profile_id', 'job_id')
+    )
+    alerts = [alert for alert in alerts if (alert.profile_id, alert.job_id) not in recorded]
+    try:
+        with transaction.atomic():
+            JobAlert.objects.bulk_create(alerts, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    except IntegrityError:
+        # A profile was deleted since the vectors were synced
+        profile_ids = {alert.profile_id for alert in alerts}
+        existing = set(UserProfile.objects.filter(id__in=profile_ids).values_list('id', flat=True))
+        forget_profiles(list(profile_ids - existing))
+        alerts = [alert for alert in alerts if alert.profile_id in existing]
+        JobAlert.objects.bulk_create(alerts, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(alerts)
+
+
+def enqueue_job_alerts(job_ids):
+    """
+    Queue new jobs for reverse matching on the worker thread.
+
+    Args:
+        job_ids (list): Ids of newly posted jobs
+    """
+    global _worker
+    if not get_setting('JOB_ALERTS') or not job_ids:
+        return
+    for job_id in job_ids:
+        _queue.put(job_id)
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='job-alerts', daemon=True)
+            _worker.start()
+
+
+def _work():
+    batch_size = get_setting('JOB_ALERT_BATCH_SIZE')
+    while True:
+        # Block for the next job, then take whatever else is already queued
+        job_ids = [_queue.get()]
+        while len(job_ids) < batch_size:
+            try:
+                job_ids.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        close_old_connections()
+        try:
+            with span('job_alerts'):
+                recorded = match_new_jobs(job_ids)
+            logger.info('Recorded %d alerts for %d new jobs', recorded, len(job_ids))
+        except Exception:
+            increment('recommender_errors_total', stage='job_alerts')
+            logger.exception('Could not match new jobs %s', job_ids)
+        finally:
+            close_old_connections()
+            for _ in job_ids:
+                _queue.task_done()
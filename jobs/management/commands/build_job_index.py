@@ -0,0 +1,43 @@
+"""
+Re-fit the recommender's job index and publish it as the live generation of
+the on-disk store (RECOMMENDER_INDEX_DIR). Running workers switch to it on
+their next check, without a restart. Job change log entries older than
+RECOMMENDER_CHANGE_LOG_RETENTION are deleted.
+
+    python manage.py build_job_index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.models import CatalogCounter
+from ml_engine import store
+from ml_engine.conf import get_setting
+from ml_engine.index import build_job_index, prune_job_changes
+
+
+class Command(BaseCommand):
+    help = 'Re-fit the job index and publish it to RECOMMENDER_INDEX_DIR.'
+
+    def handle(self, *args, **options):
+        directory = get_setting('INDEX_DIR')
+        if not directory:
+            raise CommandError('Set RECOMMENDER_INDEX_DIR to use the on-disk job index.')
+        if not store.acquire_build_lock(directory):
+            raise CommandError('Another process is rebuilding the job index.')
+
+        try:
+            started = time.monotonic()
+            index = build_job_index()
+            generation = store.save_index(index, directory)
+        finally:
+            store.release_build_lock(directory)
+        # Also corrects the counter after raw SQL or bulk_create imports
+        CatalogCounter.refresh_active_jobs()
+        pruned = prune_job_changes()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Published generation {generation}: {len(index)} jobs, {index.n_terms} terms '
+            f'in {time.monotonic() - started:.1f}s; pruned {pruned} change log entries.'
+        ))
@@ -0,0 +1,36 @@
+"""
+Precompute the "similar jobs" panel of every job: the top-k most similar
+other jobs, from chunked sparse products of the job index.
+
+    python manage.py build_similar_jobs [--top-k 6] [--chunk-size 512]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.similar import rebuild_similar_jobs
+from ml_engine.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SimilarJob neighbour table from the job index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=None,
+            help='Neighbours per job (default: RECOMMENDER_SIMILAR_JOBS_TOP_K)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=512,
+            help='Jobs per sparse matrix product; bounds memory (default: 512)',
+        )
+
+    def handle(self, *args, **options):
+        top_k = options['top_k'] or get_setting('SIMILAR_JOBS_TOP_K')
+        started = time.monotonic()
+        stored = rebuild_similar_jobs(k=top_k, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored up to {top_k} similar jobs for {stored} jobs '
+            f'in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,85 @@
+"""
+Request every page of the jobs and accounts apps and check its SQL queries
+against the budgets in RECOMMENDER_QUERY_BUDGETS (see jobs/queries.py).
+Pages are requested twice and the second, warm request is measured, so the
+one-off job index build does not count.
+
+    python manage.py check_query_budgets --username alice
+
+Exits with an error when a page exceeds its budget or repeats a query shape.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import get_resolver, reverse
+
+from jobs.models import Job
+from jobs.queries import QueryRecorder, check_query_budget, get_query_budget
+
+NAMESPACES = ('jobs', 'accounts')
+
+# Pages that end the session are checked last
+LAST = ('accounts:logout',)
+
+
+class Command(BaseCommand):
+    help = 'Check the SQL query budgets of the jobs and accounts pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='User to log in as (default: anonymous)')
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['username']:
+            try:
+                user = get_user_model().objects.get(username=options['username'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user named {options['username']!r}.")
+            client.force_login(user)
+
+        failures = 0
+        # ALLOWED_HOSTS must accept the test client's host
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for view_name, url in self.pages():
+                client.get(url)
+                with QueryRecorder() as recorder:
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+
+                budget = get_query_budget(view_name)
+                problems = check_query_budget(recorder, budget, label=view_name)
+                line = (f'{view_name:<36} {response.status_code} {recorder.count:>3} queries '
+                        f'(budget {budget if budget is not None else "-"}) '
+                        f'{recorder.duration * 1000:.1f} ms')
+                if problems:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(line))
+                    for problem in problems:
+                        self.stdout.write(f'    {problem}')
+                else:
+                    self.stdout.write(line)
+
+        if failures:
+            raise CommandError(f'{failures} page(s) over their query budget.')
+        self.stdout.write(self.style.SUCCESS('All pages within their query budgets.'))
+
+    def pages(self):
+        """(view name, url) of every page without required arguments."""
+        job = Job.objects.filter(is_active=True).only('id').first()
+        kwargs = {'jobs:job_detail': {'job_id': job.id} if job else None}
+
+        names = []
+        for namespace in NAMESPACES:
+            resolver = get_resolver().namespace_dict[namespace][1]
+            for pattern in resolver.url_patterns:
+                if pattern.name:
+                    names.append(f'{namespace}:{pattern.name}')
+        names.sort(key=lambda name: name in LAST)
+
+        for name in names:
+            if name in kwargs and kwargs[name] is None:
+                continue
+            yield name, reverse(name, kwargs=kwargs.get(name))
@@ -0,0 +1,278 @@
+"""
+Import jobs from a CSV or JSON Lines feed, upserting on ``external_id``.
+
+The feed is read as a stream and written in batches, each a single
+bulk_create upserting on the unique external_id, so memory stays bounded
+whatever the feed size. Model signals are bypassed: each batch appends its
+rows to the job change log itself, so every worker's job index picks them
+up, and once it commits refreshes the similar jobs panels it affects and
+matches its new jobs for alerts. The active jobs counter and a new index
+generation are refreshed once at the end, as are all similar jobs panels
+when more jobs changed than RECOMMENDER_SIMILAR_JOBS_SYNC_LIMIT.
+
+Columns (CSV header or JSON keys): external_id, title, required_skills,
+description, company, location, salary_range, is_active. In JSON Lines,
+required_skills may also be a list.
+
+    python manage.py import_jobs feed.jsonl --batch-size 2000
+    python manage.py import_jobs - --format csv < feed.csv
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from jobs.alerts import match_new_jobs
+from jobs.models import CatalogCounter, Job
+from jobs.signals import log_job_changes
+from jobs.similar import rebuild_similar_jobs, refresh_similar_jobs
+from jobs.skills import clean_skills_text, intern_skills
+from ml_engine import store
+from ml_engine.conf import get_setting
+from ml_engine.index import build_job_index, get_job_index, sync_job_index
+
+# Fields written from the feed; updates also refresh these
+FEED_FIELDS = [
+    'title', 'required_skills', 'skill_ids', 'description', 'company',
+    'location', 'salary_range', 'is_active',
+]
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f'}
+
+# Invalid rows reported individually before only counting them
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Stream jobs from a CSV or JSON Lines feed and upsert them by external_id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or '-' for standard input")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Feed format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows written per transaction (default: 1000)')
+        parser.add_argument('--no-index', action='store_true',
+                            help='Do not publish a new job index generation after the import; '
+                                 'workers still apply the rows from the change log')
+        parser.add_argument('--no-similar', action='store_true',
+                            help='Do not refresh the similar jobs panels')
+        parser.add_argument('--no-alerts', action='store_true',
+                            help='Do not match the new jobs against user profiles; '
+                                 'match_job_alerts picks them up later')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+        feed_format = options['format'] or self._guess_format(options['path'])
+
+        self.refresh_similar = not options['no_similar']
+        self.match_alerts = not options['no_alerts'] and get_setting('JOB_ALERTS')
+        self.rebuild_similar = False
+        self.rows = 0
+        self.counts = {'created': 0, 'updated': 0, 'invalid': 0}
+        self.refreshed = self.alerts = 0
+        started = time.monotonic()
+
+        with self._open(options['path']) as stream:
+            records = self._parse(self._read(stream, feed_format))
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                self._write(batch)
+                self.stdout.write(
+                    f'{self.rows} rows, {self.rows / (time.monotonic() - started):.0f} rows/s',
+                    ending='\r',
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {self.rows} rows in {elapsed:.1f}s ({self.rows / max(elapsed, 1e-9):.0f} rows/s): '
+            f'{self.counts["created"]} created, {self.counts["updated"]} updated, '
+            f'{self.counts["invalid"]} invalid.'
+        ))
+
+        if self.refresh_similar and not self.rebuild_similar:
+            self.stdout.write(f'Refreshed the similar jobs of {self.refreshed} job(s).')
+        if self.match_alerts:
+            self.stdout.write(f'Recorded {self.alerts} alert(s) for the new jobs.')
+
+        if self.counts['created'] or self.counts['updated']:
+            CatalogCounter.refresh_active_jobs()
+            if not options['no_index']:
+                self._refresh_index()
+            if self.rebuild_similar:
+                self._rebuild_similar_jobs()
+
+    def _guess_format(self, path):
+        if path.endswith('.csv'):
+            return 'csv'
+        if path.endswith(('.jsonl', '.ndjson')):
+            return 'jsonl'
+        raise CommandError('Cannot tell the feed format from its name; pass --format.')
+
+    def _open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+    def _read(self, stream, feed_format):
+        """Yield (line number, raw record) pairs, one at a time."""
+        if feed_format == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, record
+
+    def _parse(self, records):
+        """Yield validated field dictionaries, reporting invalid rows."""
+        for line_number, record in records:
+            self.rows += 1
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f'invalid JSON: {record}')
+                if not isinstance(record, dict):
+                    raise ValueError('expected an object')
+                yield self._clean(record)
+            except ValueError as exc:
+                self.counts['invalid'] += 1
+                if self.counts['invalid'] <= MAX_REPORTED_ERRORS:
+                    self.stderr.write(f'Line {line_number}: {exc}')
+
+    def _clean(self, record):
+        """Validate one feed record into Job field values."""
+        values = {
+            'external_id': self._text(record, 'external_id', 100, required=True),
+            'title': self._text(record, 'title', 200, required=True),
+            'description': self._text(record, 'description', None),
+            'company': self._text(record, 'company', 200) or 'Not Specified',
+            'location': self._text(record, 'location', 200) or 'Remote',
+            'salary_range': self._text(record, 'salary_range', 100) or None,
+            'is_active': self._flag(record.get('is_active')),
+        }
+        values['required_skills'] = clean_skills_text(record.get('required_skills'))
+        values['skill_ids'] = intern_skills(values['required_skills'])
+        return values
+
+    def _text(self, record, field, max_length, required=False):
+        value = record.get(field)
+        value = '' if value is None else str(value).strip()
+        if required and not value:
+            raise ValueError(f'missing {field}')
+        if max_length and len(value) > max_length:
+            raise ValueError(f'{field} longer than {max_length} characters')
+        return value
+
+    def _flag(self, value):
+        if value is None or value == '':
+            return True
+        if isinstance(value, bool):
+            return value
+        value = str(value).strip().lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise ValueError(f'invalid is_active value: {value!r}')
+
+    def _write(self, batch):
+        """Upsert one batch of cleaned rows in a transaction."""
+        # The last row wins when a feed repeats an external id
+        rows = {values['external_id']: values for values in batch}
+
+        with transaction.atomic():
+            known = set(
+                Job.objects.filter(external_id__in=rows).values_list('external_id', flat=True)
+            )
+            # One INSERT ... ON CONFLICT (external_id) DO UPDATE per batch;
+            # bulk_update would build a CASE per field and row instead
+            Job.objects.bulk_create(
+                [Job(**values) for values in rows.values()],
+                update_conflicts=True,
+                unique_fields=['external_id'],
+                update_fields=FEED_FIELDS + ['updated_at'],
+            )
+            new = [external_id for external_id in rows if external_id not in known]
+            written = Job.objects.filter(external_id__in=rows).values_list('id', 'external_id', 'is_active')
+            changed_ids = []
+            created_ids = []
+            for job_id, external_id, is_active in written:
+                changed_ids.append(job_id)
+                if is_active and external_id not in known:
+                    created_ids.append(job_id)
+            # For every worker's job index, as the model signals would
+            log_job_changes(changed_ids)
+
+        self.counts['created'] += len(new)
+        self.counts['updated'] += len(rows) - len(new)
+        if self.refresh_similar:
+            self._refresh_similar_jobs(changed_ids)
+        if self.match_alerts:
+            self._match_alerts(created_ids)
+
+    def _refresh_index(self):
+        """Publish one new index generation covering the whole import."""
+        directory = get_setting('INDEX_DIR')
+        if not directory:
+            # Workers apply the imported rows from the change log
+            return
+        if not store.acquire_build_lock(directory):
+            self.stderr.write('Another process is rebuilding the job index; not publishing.')
+            return
+        try:
+            started = time.monotonic()
+            index = build_job_index()
+            generation = store.save_index(index, directory)
+        finally:
+            store.release_build_lock(directory)
+        self.stdout.write(
+            f'Published index generation {generation}: {len(index)} jobs '
+            f'in {time.monotonic() - started:.1f}s.'
+        )
+
+    def _refresh_similar_jobs(self, job_ids):
+        """Refresh the neighbour lists a committed batch can affect."""
+        if self.rebuild_similar or len(job_ids) > get_setting('SIMILAR_JOBS_SYNC_LIMIT'):
+            # Too many for incremental refreshes; rebuilt once at the end
+            self.rebuild_similar = True
+            return
+        # Apply the batch to this process's index first
+        get_job_index()
+        sync_job_index(wait=True)
+        self.refreshed += refresh_similar_jobs(job_ids)
+
+    def _rebuild_similar_jobs(self):
+        """Recompute every neighbour list."""
+        started = time.monotonic()
+        refreshed = rebuild_similar_jobs()
+        self.stdout.write(
+            f'Rebuilt the similar jobs of {refreshed} job(s) in {time.monotonic() - started:.1f}s.'
+        )
+
+    def _match_alerts(self, job_ids):
+        """Record job alerts for the new jobs of a committed batch."""
+        batch_size = get_setting('JOB_ALERT_BATCH_SIZE')
+        for start in range(0, len(job_ids), batch_size):
+            self.alerts += match_new_jobs(job_ids[start:start + batch_size])
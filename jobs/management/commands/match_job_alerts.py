@@ -0,0 +1,61 @@
+"""
+Record job alerts in the foreground. New jobs are normally matched on the
+worker thread as they are saved; by default this matches the active jobs
+that were not (still queued when a worker exited, activated later, or
+imported in bulk), so run it periodically. --since re-matches every job
+posted since a date instead; alerts already recorded are kept.
+
+    python manage.py match_job_alerts [--since 2026-01-01]
+"""
+
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from jobs.alerts import match_new_jobs, pending_alert_jobs
+from jobs.models import Job
+from ml_engine.conf import get_setting
+
+
+class Command(BaseCommand):
+    help = 'Match unmatched jobs (or jobs posted since a date) against every user profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since',
+                            help='Jobs created at or after this date/datetime, matched '
+                                 'or not (default: active jobs not matched yet)')
+
+    def handle(self, *args, **options):
+        batch_size = get_setting('JOB_ALERT_BATCH_SIZE')
+        if options['since']:
+            since = self._parse_since(options['since'])
+            job_ids = list(
+                Job.objects.filter(is_active=True, created_at__gte=since)
+                .order_by('id').values_list('id', flat=True)
+            )
+        else:
+            job_ids = list(pending_alert_jobs())
+
+        started = time.monotonic()
+        recorded = 0
+        for start in range(0, len(job_ids), batch_size):
+            recorded += match_new_jobs(job_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recorded {recorded} alert(s) for {len(job_ids)} job(s) '
+            f'in {time.monotonic() - started:.1f}s.'
+        ))
+
+    def _parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Invalid --since value: {value!r}')
+            since = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
@@ -0,0 +1,33 @@
+"""
+Re-intern the canonical skill ids of jobs and profiles, e.g. after aliases
+were loaded in bulk or a skill was merged into another.
+
+    python manage.py reintern_skills [--skill js --skill node]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.skills import reintern_skills
+
+
+class Command(BaseCommand):
+    help = 'Recompute skill_ids of jobs and profiles from their skills text.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skill', action='append', dest='skills', default=None,
+            help='Only rows mentioning this skill or alias (repeatable; default: all rows)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per bulk update (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        changed = reintern_skills(options['skills'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated the skill ids of {changed} row(s) in {time.monotonic() - started:.1f}s.'
+        ))
@@ -0,0 +1,144 @@
+"""
+Per-request timing of the recommendation pipeline and SQL query budgets.
+
+RecommenderTimingMiddleware collects the ``ml_engine.metrics.span`` timings
+of each request. When DEBUG or RECOMMENDER_METRICS_HEADER is on, it returns
+them as a ``Server-Timing`` header, which the browser's developer tools show
+as a breakdown (DB fetch, vectorize, similarity, top_n, render, ...).
+
+QueryBudgetMiddleware records the SQL queries of each request and checks
+them against the view's budget (see jobs/queries.py). It is a development
+aid, active only when DEBUG or RECOMMENDER_QUERY_BUDGET_MIDDLEWARE is on;
+the test suite enforces the budgets with ``assert_query_budget``.
+"""
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from ml_engine.conf import get_setting
+from ml_engine.metrics import observe, start_trace, stop_trace
+
+from .queries import QueryBudgetExceeded, QueryRecorder, check_query_budget, get_query_budget
+
+logger = logging.getLogger(__name__)
+
+
+def server_timing(spans):
+    """
+    Format spans as a Server-Timing header value, summing repeated stages.
+
+    Args:
+        spans (list): (stage, milliseconds) pairs
+
+    Returns:
+        str: Header value
+    """
+    totals = {}
+    for stage, milliseconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + milliseconds
+    return ', '.join(f'{stage};dur={milliseconds:.2f}' for stage, milliseconds in totals.items())
+
+
+class RecommenderTimingMiddleware:
+    """
+    Trace the pipeline stages of every request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = settings.DEBUG or get_setting('METRICS_HEADER')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        spans, token = start_trace()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_trace(token)
+        return self.add_header(response, spans)
+
+    async def __acall__(self, request):
+        spans, token = start_trace()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_trace(token)
+        return self.add_header(response, spans)
+
+    def add_header(self, response, spans):
+        if self.header and spans:
+            response['Server-Timing'] = server_timing(spans)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Record the queries of every request and enforce per-view budgets.
+
+    Violations (too many queries, or one query shape repeated like an N+1
+    pattern) are logged as warnings, or raised as QueryBudgetExceeded when
+    RECOMMENDER_QUERY_BUDGET_ENFORCE is on. Query counts go to the
+    ``recommender_view_queries`` histogram, and to the X-Query-Count and
+    X-Query-Time headers when DEBUG or RECOMMENDER_METRICS_HEADER is on.
+
+    Connections are per thread, and the ORM calls of an async request all
+    run in the request's one sync_to_async thread, so under ASGI the
+    recorder is attached to the connection of that thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not (settings.DEBUG or get_setting('QUERY_BUDGET_MIDDLEWARE')):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = settings.DEBUG or get_setting('METRICS_HEADER')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.check(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.check(request, response, recorder)
+
+    def check(self, request, response, recorder):
+        match = request.resolver_match
+        if match is None:
+            return response
+        view_name = match.view_name
+        observe('recommender_view_queries', recorder.count, view=view_name)
+        if self.header:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time'] = f'{recorder.duration * 1000:.2f}ms'
+
+        budget = get_query_budget(view_name)
+        if budget is None and view_name not in get_setting('QUERY_BUDGETS'):
+            return response
+        problems = check_query_budget(recorder, budget, label=view_name)
+        if problems:
+            message = '\n'.join(problems) + '\n' + recorder.report()
+            if get_setting('QUERY_BUDGET_ENFORCE'):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 for the best match')),
+                ('similarity_score', models.FloatField()),
+                ('confidence', models.CharField(max_length=20)),
+                ('computed_at', models.DateTimeField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.job')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materialized_recommendations', to='accounts.userprofile')),
+            ],
+            options={
+                'verbose_name': 'Materialized Recommendation',
+                'verbose_name_plural': 'Materialized Recommendations',
+                'ordering': ['profile', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='materializedrecommendation',
+            constraint=models.UniqueConstraint(fields=('profile', 'rank'), name='unique_profile_rank'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Copied from jobs/skills.py as of this migration, so later changes to the
+# live module don't change what the migration does
+DEFAULT_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'golang': 'go',
+    'nodejs': 'node.js',
+    'node': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'sklearn': 'scikit-learn',
+    'tf': 'tensorflow',
+    'amazon web services': 'aws',
+    'gcp': 'google cloud',
+    'rest': 'rest api',
+    'restful api': 'rest api',
+    'ci cd': 'ci/cd',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    return _WHITESPACE.sub(' ', name.strip().lower())
+
+
+def split_skills(skills_text):
+    names = (normalize_skill(skill) for skill in (skills_text or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def backfill_skill_ids(apps, schema_editor):
+    """Seed the default aliases and intern the skills of existing rows."""
+    Skill = apps.get_model('jobs', 'Skill')
+    SkillAlias = apps.get_model('jobs', 'SkillAlias')
+    Job = apps.get_model('jobs', 'Job')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+
+    for alias, name in DEFAULT_ALIASES.items():
+        skill, _ = Skill.objects.get_or_create(name=normalize_skill(name))
+        SkillAlias.objects.get_or_create(alias=normalize_skill(alias), defaults={'skill': skill})
+
+    aliases = dict(SkillAlias.objects.values_list('alias', 'skill__name'))
+    ids = dict(Skill.objects.values_list('name', 'id'))
+
+    def intern(skills_text):
+        names = {aliases.get(name, name) for name in split_skills(skills_text)}
+        missing = [name for name in names if name not in ids]
+        if missing:
+            Skill.objects.bulk_create([Skill(name=name) for name in missing])
+            ids.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+        return sorted(ids[name] for name in names)
+
+    for model, field in ((Job, 'required_skills'), (UserProfile, 'skills')):
+        batch = []
+        for row in model.objects.only('id', field).iterator(chunk_size=BATCH_SIZE):
+            row.skill_ids = intern(getattr(row, field))
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['skill_ids'])
+                batch = []
+        model.objects.bulk_update(batch, ['skill_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_skills'),
+        ('accounts', '0002_userprofile_skill_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_skill_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+def count_active_jobs(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    CatalogCounter = apps.get_model('jobs', 'CatalogCounter')
+    CatalogCounter.objects.update_or_create(
+        name='active_jobs', defaults={'value': Job.objects.filter(is_active=True).count()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_backfill_skill_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Catalog Counter',
+                'verbose_name_plural': 'Catalog Counters',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='job_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-created_at'], name='job_inactive_recent_idx'),
+        ),
+        migrations.RunPython(count_active_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_job_indexes_catalogcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 for the most similar job')),
+                ('similarity_score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_jobs', to='jobs.job')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.job')),
+            ],
+            options={
+                'verbose_name': 'Similar Job',
+                'verbose_name_plural': 'Similar Jobs',
+                'ordering': ['job', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarjob',
+            constraint=models.UniqueConstraint(fields=('job', 'rank'), name='unique_job_rank'),
+        ),
+    ]
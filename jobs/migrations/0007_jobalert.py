@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_skill_ids'),
+        ('jobs', '0006_similarjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity_score', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, help_text='When the alert went out in a digest', null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='jobs.job')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_alerts', to='accounts.userprofile')),
+            ],
+            options={
+                'verbose_name': 'Job Alert',
+                'verbose_name_plural': 'Job Alerts',
+                'ordering': ['profile', '-similarity_score'],
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['profile', '-similarity_score'], name='job_alert_unsent_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobalert',
+            constraint=models.UniqueConstraint(fields=('profile', 'job'), name='unique_profile_job_alert'),
+        ),
+    ]
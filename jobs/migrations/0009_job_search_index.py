@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+COLUMNS = 'title, company, location, required_skills, description'
+
+CREATE_SEARCH_INDEX = [
+    # "+" and "#" are token characters so "C++" and "C#" can be searched
+    f"""CREATE VIRTUAL TABLE jobs_job_fts USING fts5(
+        {COLUMNS}, content='jobs_job', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2 tokenchars '+#'"
+    )""",
+    # bm25 weights, in column order: titles and skills count most
+    "INSERT INTO jobs_job_fts(jobs_job_fts, rank) VALUES ('rank', 'bm25(10.0, 3.0, 2.0, 5.0, 1.0)')",
+    f"""CREATE TRIGGER jobs_job_fts_insert AFTER INSERT ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(rowid, {COLUMNS})
+        VALUES (new.id, new.title, new.company, new.location, new.required_skills, new.description);
+    END""",
+    f"""CREATE TRIGGER jobs_job_fts_delete AFTER DELETE ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(jobs_job_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.title, old.company, old.location, old.required_skills, old.description);
+    END""",
+    f"""CREATE TRIGGER jobs_job_fts_update AFTER UPDATE OF {COLUMNS} ON jobs_job BEGIN
+        INSERT INTO jobs_job_fts(jobs_job_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.title, old.company, old.location, old.required_skills, old.description);
+        INSERT INTO jobs_job_fts(rowid, {COLUMNS})
+        VALUES (new.id, new.title, new.company, new.location, new.required_skills, new.description);
+    END""",
+    "INSERT INTO jobs_job_fts(jobs_job_fts) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS jobs_job_fts_insert',
+    'DROP TRIGGER IF EXISTS jobs_job_fts_delete',
+    'DROP TRIGGER IF EXISTS jobs_job_fts_update',
+    'DROP TABLE IF EXISTS jobs_job_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other backends search with icontains
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in CREATE_SEARCH_INDEX:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_SEARCH_INDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_job_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchIndex',
+            fields=[
+                ('job', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='jobs.job')),
+                ('document', models.TextField(db_column='jobs_job_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'jobs_job_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
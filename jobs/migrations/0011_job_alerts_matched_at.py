@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:48
+
+from django.db import migrations, models
+
+
+def mark_existing_jobs_matched(apps, schema_editor):
+    """Existing jobs were matched as they were posted (or predate alerts)."""
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.update(alerts_matched_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_jobchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='alerts_matched_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the job was matched against user profiles for alerts', null=True),
+        ),
+        migrations.RunPython(mark_existing_jobs_matched, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('alerts_matched_at__isnull', True), ('is_active', True)), fields=['id'], name='job_alerts_pending_idx'),
+        ),
+    ]
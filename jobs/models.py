@@ -1,5 +1,76 @@
 from django.db import models
 
+from .search import Match
+from .signals import jobs_bulk_updated
+
+
+class JobQuerySet(models.QuerySet):
+    """
+    QuerySet that reports bulk updates of indexed fields.
+    """
+    # Fields that affect the recommender's job index
+    INDEXED_FIELDS = {'required_skills', 'is_active'}
+
+    def update(self, **kwargs):
+        """
+        Update rows and send jobs_bulk_updated with the affected ids.
+        """
+        if isinstance(kwargs.get('required_skills'), str) and 'skill_ids' not in kwargs:
+            # Keep the interned skill ids in step with the text
+            from .skills import intern_skills
+            kwargs['skill_ids'] = intern_skills(kwargs['required_skills'])
+
+        if not self.INDEXED_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+
+        job_ids = list(self.values_list('id', flat=True))
+        updated = super().update(**kwargs)
+        if job_ids:
+            jobs_bulk_updated.send(sender=self.model, job_ids=job_ids, fields=sorted(kwargs))
+        return updated
+
+
+class Skill(models.Model):
+    """
+    Canonical skill. Free-text skills of jobs and profiles are interned
+    to these ids (see jobs/skills.py).
+    """
+    name = models.CharField(max_length=100, unique=True, help_text="Normalized (lowercase) skill name")
+
+    class Meta:
+        verbose_name = "Skill"
+        verbose_name_plural = "Skills"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        from .skills import normalize_skill
+        self.name = normalize_skill(self.name)
+        super().save(*args, **kwargs)
+
+
+class SkillAlias(models.Model):
+    """
+    Alternative spelling of a skill (e.g. "js" for "javascript").
+    """
+    alias = models.CharField(max_length=100, unique=True, help_text="Normalized (lowercase) alias")
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        verbose_name = "Skill Alias"
+        verbose_name_plural = "Skill Aliases"
+        ordering = ['alias']
+
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
+
+    def save(self, *args, **kwargs):
+        from .skills import normalize_skill
+        self.alias = normalize_skill(self.alias)
+        super().save(*args, **kwargs)
+
 
 class Job(models.Model):
     """
@@ -7,9 +78,17 @@ class Job(models.Model):
     Each job has a title, required skills, and description.
     """
     title = models.CharField(max_length=200, help_text="Job title/position name")
+    external_id = models.CharField(
+        max_length=100, unique=True, null=True, blank=True, editable=False,
+        help_text="Id of the job in the feed it was imported from"
+    )
     required_skills = models.TextField(
         help_text="Required skills separated by commas (e.g., Python, Django, REST API)"
     )
+    skill_ids = models.JSONField(
+        default=list, blank=True, editable=False,
+        help_text="Sorted ids of the canonical skills in required_skills"
+    )
     description = models.TextField(help_text="Detailed job description")
     company = models.CharField(max_length=200, default="Not Specified")
     location = models.CharField(max_length=200, default="Remote", blank=True)
@@ -17,15 +96,53 @@ class Job(models.Model):
     is_active = models.BooleanField(default=True, help_text="Is this job currently active?")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    alerts_matched_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text="When the job was matched against user profiles for alerts"
+    )
+
+    objects = JobQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Job"
         verbose_name_plural = "Jobs"
         ordering = ['-created_at']
+        indexes = [
+            # Listings: active jobs, newest first
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_active=True),
+                name='job_active_recent_idx',
+            ),
+            # Admin filter on inactive jobs. A plain (is_active, created_at)
+            # index would not help: SQLite tests booleans as "is_active", not
+            # "is_active = 1", so it can only scan it
+            models.Index(
+                fields=['-created_at'], condition=models.Q(is_active=False),
+                name='job_inactive_recent_idx',
+            ),
+            # Active jobs still waiting for alert matching (see jobs/alerts.py)
+            models.Index(
+                fields=['id'], condition=models.Q(is_active=True, alerts_matched_at__isnull=True),
+                name='job_alerts_pending_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status to maintain the active jobs counter
+        instance._loaded_is_active = instance.__dict__.get('is_active')
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'is_active' in fields:
+            # The stored status may have changed since the row was loaded
+            self._loaded_is_active = self.__dict__.get('is_active')
+
     def get_skills_list(self):
         """
         Returns required skills as a list for ML processing.
@@ -47,3 +164,199 @@ class Job(models.Model):
         if len(self.description) > 150:
             return self.description[:150] + '...'
         return self.description
+
+
+class JobSearchIndex(models.Model):
+    """
+    Row of the jobs_job_fts full-text index (SQLite FTS5), created by
+    migration and kept in sync with jobs_job by triggers. Read-only; see
+    jobs/search.py.
+    """
+    job = models.OneToOneField(
+        Job, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+        related_name='search_index'
+    )
+    # The table-named column stands for the whole row in MATCH
+    document = models.TextField(db_column='jobs_job_fts')
+    # bm25 relevance; lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'jobs_job_fts'
+
+
+JobSearchIndex._meta.get_field('document').register_lookup(Match)
+
+
+class CatalogCounter(models.Model):
+    """
+    Maintained catalog counts, so pages don't COUNT(*) the jobs table.
+
+    The active jobs counter is adjusted by the Job signals (see
+    jobs/signals.py) and recounted after bulk updates. The skill aliases
+    counter is a version, bumped on every alias change so each process
+    reloads its alias map (see jobs/skills.py).
+    """
+    ACTIVE_JOBS = 'active_jobs'
+    SKILL_ALIASES = 'skill_aliases'
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Catalog Counter"
+        verbose_name_plural = "Catalog Counters"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def active_jobs(cls):
+        """
+        Number of active jobs, with one primary key lookup.
+        """
+        value = cls.objects.filter(name=cls.ACTIVE_JOBS).values_list('value', flat=True).first()
+        if value is None:
+            value = cls.refresh_active_jobs()
+        return value
+
+    @classmethod
+    def refresh_active_jobs(cls):
+        """
+        Recount the active jobs and store the count.
+        """
+        value = Job.objects.filter(is_active=True).count()
+        cls.objects.update_or_create(name=cls.ACTIVE_JOBS, defaults={'value': value})
+        return value
+
+    @classmethod
+    def adjust_active_jobs(cls, delta):
+        """
+        Add ``delta`` to the active jobs counter.
+        """
+        if delta and not cls.objects.filter(name=cls.ACTIVE_JOBS).update(
+            value=models.F('value') + delta
+        ):
+            cls.refresh_active_jobs()
+
+    @classmethod
+    def skill_aliases_version(cls):
+        """
+        Version of the skill aliases; 0 until the first alias change.
+        """
+        return cls.objects.filter(name=cls.SKILL_ALIASES).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def bump_skill_aliases_version(cls):
+        """
+        Record an alias change, in the transaction making it.
+        """
+        counter = cls.objects.filter(name=cls.SKILL_ALIASES)
+        if not counter.update(value=models.F('value') + 1):
+            _, created = cls.objects.get_or_create(name=cls.SKILL_ALIASES, defaults={'value': 1})
+            if not created:
+                counter.update(value=models.F('value') + 1)
+
+
+class JobChange(models.Model):
+    """
+    Entry of the job change log. Job saves, deletes and bulk updates append
+    one in their transaction, so every worker process, not only the one
+    that handled the change, brings its resident job index up to date (see
+    ml_engine/index.py).
+    """
+    # Not a foreign key: entries outlive deleted jobs
+    job_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Job Change"
+        verbose_name_plural = "Job Changes"
+
+    def __str__(self):
+        return f"#{self.id}: {self.job_id}"
+
+
+class MaterializedRecommendation(models.Model):
+    """
+    Precomputed recommendation of a job for a user profile.
+    Written in bulk by the precompute_recommendations management command.
+    """
+    profile = models.ForeignKey(
+        'accounts.UserProfile', on_delete=models.CASCADE, related_name='materialized_recommendations'
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 for the best match")
+    similarity_score = models.FloatField()
+    confidence = models.CharField(max_length=20)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Materialized Recommendation"
+        verbose_name_plural = "Materialized Recommendations"
+        ordering = ['profile', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'rank'], name='unique_profile_rank'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} for {self.profile_id}: {self.job_id}"
+
+
+class SimilarJob(models.Model):
+    """
+    Precomputed neighbour of a job, for the "similar jobs" panel.
+    Maintained by jobs/similar.py; rebuilt by the build_similar_jobs command.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_jobs')
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 for the most similar job")
+    similarity_score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Similar Job"
+        verbose_name_plural = "Similar Jobs"
+        ordering = ['job', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'rank'], name='unique_job_rank'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} for {self.job_id}: {self.similar_id}"
+
+
+class JobAlert(models.Model):
+    """
+    Newly posted job matching a user's skills, waiting for the user's digest.
+    Recorded by the reverse-matching worker in jobs/alerts.py.
+    """
+    profile = models.ForeignKey(
+        'accounts.UserProfile', on_delete=models.CASCADE, related_name='job_alerts'
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='alerts')
+    similarity_score = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the alert went out in a digest"
+    )
+
+    class Meta:
+        verbose_name = "Job Alert"
+        verbose_name_plural = "Job Alerts"
+        ordering = ['profile', '-similarity_score']
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'job'], name='unique_profile_job_alert'),
+        ]
+        indexes = [
+            # Unsent alerts of a digest run
+            models.Index(
+                fields=['profile', '-similarity_score'], name='job_alert_unsent_idx',
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} for {self.profile_id} ({self.similarity_score:.2f})"
@@ -0,0 +1,171 @@
+"""
+Keyset (seek) pagination of job listings.
+
+OFFSET pagination reads and throws away every row before the page, and
+Django's Paginator adds a COUNT(*) on top, so deep pages get slower as the
+catalog grows. Here listings are ordered by (created_at, id), newest first,
+and a page asks for the rows after the last one shown: the
+job_active_recent_idx index answers that with a range seek, so page 5,000
+costs as much as page 1.
+
+Cursors are opaque signed tokens holding the boundary row's (created_at, id)
+and the direction to read in. Totals are left out; ``approximate_count``
+provides a cached one where a listing opts in.
+"""
+
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.utils.dateparse import parse_datetime
+
+from ml_engine.conf import get_setting
+
+CURSOR_SALT = 'jobs.pagination'
+
+
+class InvalidCursor(ValueError):
+    """
+    Cursor that was tampered with or not issued by this site.
+    """
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated listing.
+
+    Attributes:
+        object_list (list): Rows of the page, newest first
+        next_cursor (str): Cursor of the following (older) page, or None
+        previous_cursor (str): Cursor of the preceding (newer) page, or None
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(row, direction):
+    """
+    Cursor pointing before or after a row.
+
+    Args:
+        row (Job): Boundary row (needs created_at and id)
+        direction (str): 'next' for older rows, 'previous' for newer ones
+
+    Returns:
+        str: Signed cursor
+    """
+    return signing.dumps([row.created_at.isoformat(), row.id, direction], salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    """
+    Read a cursor issued by encode_cursor().
+
+    Args:
+        cursor (str): Signed cursor
+
+    Returns:
+        tuple: (created_at, id, direction)
+
+    Raises:
+        InvalidCursor: The cursor is malformed or its signature is wrong
+    """
+    try:
+        created_at, row_id, direction = signing.loads(cursor, salt=CURSOR_SALT)
+        created_at = parse_datetime(created_at)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if created_at is None or direction not in ('next', 'previous'):
+        raise InvalidCursor('Invalid cursor')
+    return created_at, int(row_id), direction
+
+
+def keyset_page(queryset, cursor=None, per_page=10):
+    """
+    Read one page of a listing, newest first.
+
+    Args:
+        queryset (QuerySet): Rows to paginate; its ordering is replaced
+        cursor (str): next_cursor or previous_cursor of another page, or
+            None for the first page
+        per_page (int): Rows per page
+
+    Returns:
+        KeysetPage: The page
+
+    Raises:
+        InvalidCursor: The cursor is malformed or its signature is wrong
+    """
+    if cursor is None:
+        rows = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+        return _page(rows[:per_page], more_older=len(rows) > per_page, more_newer=False)
+
+    created_at, row_id, direction = decode_cursor(cursor)
+    if direction == 'next':
+        # Rows strictly older than the boundary: (created_at, id) < (c, i)
+        rows = list(
+            queryset.filter(created_at__lte=created_at)
+            .exclude(created_at=created_at, id__gte=row_id)
+            .order_by('-created_at', '-id')[:per_page + 1]
+        )
+        return _page(rows[:per_page], more_older=len(rows) > per_page, more_newer=True)
+
+    # Rows strictly newer than the boundary, read upwards from it
+    rows = list(
+        queryset.filter(created_at__gte=created_at)
+        .exclude(created_at=created_at, id__lte=row_id)
+        .order_by('created_at', 'id')[:per_page + 1]
+    )
+    more_newer = len(rows) > per_page
+    return _page(rows[:per_page][::-1], more_older=True, more_newer=more_newer)
+
+
+def _page(rows, more_older, more_newer):
+    next_cursor = encode_cursor(rows[-1], 'next') if rows and more_older else None
+    previous_cursor = encode_cursor(rows[0], 'previous') if rows and more_newer else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def approximate_count(queryset):
+    """
+    Number of rows of a listing, cached for RECOMMENDER_LIST_COUNT_TTL seconds.
+
+    The count may lag behind the table by up to the TTL; pages never depend
+    on it.
+
+    Args:
+        queryset (QuerySet): Rows to count
+
+    Returns:
+        int: Row count
+    """
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # queryset.none(), e.g. a search without any words
+        return 0
+    key = 'jobs.count.' + hashlib.sha1(repr((sql, params)).encode('utf-8')).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, get_setting('LIST_COUNT_TTL'))
+    return count
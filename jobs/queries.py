@@ -0,0 +1,169 @@
+"""
+SQL query recording and budgets.
+
+QueryRecorder captures every query run on a database connection (with or
+without DEBUG), with its duration. Queries are grouped by their shape, with
+literals and parameters stripped, so a template repeated once per row of a
+list (an N+1 pattern) stands out as a duplicate.
+
+Budgets are the maximum number of queries per view, keyed by URL name in
+RECOMMENDER_QUERY_BUDGETS, falling back to RECOMMENDER_QUERY_BUDGET_DEFAULT.
+QueryBudgetMiddleware applies them to requests in development (DEBUG or
+RECOMMENDER_QUERY_BUDGET_MIDDLEWARE), and assert_query_budget applies them
+in tests (see jobs/tests.py):
+
+    with assert_query_budget(5):
+        client.get('/jobs/')
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connections
+
+from ml_engine.conf import get_setting
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A view ran more queries than its budget, or repeated a query shape.
+    """
+
+
+def normalize_sql(sql):
+    """
+    Shape of a query: literals and parameter lists replaced by placeholders.
+
+    Args:
+        sql (str): SQL statement
+
+    Returns:
+        str: Normalized statement
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """
+    Context manager recording the queries of one connection.
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.queries = []
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        """Number of queries."""
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """Total seconds spent in queries."""
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self, threshold=2):
+        """
+        Query shapes run at least ``threshold`` times.
+
+        Args:
+            threshold (int): Repetitions that count as a duplicate
+
+        Returns:
+            dict: normalized SQL -> repetitions
+        """
+        shapes = Counter(normalize_sql(sql) for sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def report(self):
+        """
+        Human-readable summary, for assertion messages and logs.
+
+        Returns:
+            str: Query count, time and the duplicated shapes
+        """
+        lines = [f'{self.count} queries in {self.duration * 1000:.1f} ms']
+        for shape, count in sorted(self.duplicates().items(), key=lambda item: -item[1]):
+            lines.append(f'  {count}x {shape[:200]}')
+        return '\n'.join(lines)
+
+
+def get_query_budget(view_name):
+    """
+    Query budget of a view.
+
+    Args:
+        view_name (str): URL name, e.g. 'jobs:job_list'
+
+    Returns:
+        int or None: Maximum queries, or None for no limit
+    """
+    return get_setting('QUERY_BUDGETS').get(view_name, get_setting('QUERY_BUDGET_DEFAULT'))
+
+
+def check_query_budget(recorder, budget, duplicate_threshold=None, label=''):
+    """
+    List the budget violations of recorded queries.
+
+    Args:
+        recorder (QueryRecorder): Recorded queries
+        budget (int): Maximum queries, or None for no limit
+        duplicate_threshold (int): Repetitions of one query shape that count
+            as an N+1 pattern (RECOMMENDER_QUERY_DUPLICATE_THRESHOLD by default)
+        label (str): View name for the messages
+
+    Returns:
+        list: Violation messages; empty when within budget
+    """
+    if duplicate_threshold is None:
+        duplicate_threshold = get_setting('QUERY_DUPLICATE_THRESHOLD')
+
+    problems = []
+    if budget is not None and recorder.count > budget:
+        problems.append(f'{label or "block"} ran {recorder.count} queries, budget is {budget}')
+    for shape, count in recorder.duplicates(duplicate_threshold).items():
+        problems.append(f'{label or "block"} repeated a query {count} times: {shape[:200]}')
+    return problems
+
+
+@contextmanager
+def assert_query_budget(budget=None, duplicate_threshold=None, using='default'):
+    """
+    Fail when the block exceeds a query budget or repeats a query shape.
+
+    Args:
+        budget (int): Maximum queries, or None to only check duplicates
+        duplicate_threshold (int): Repetitions treated as an N+1 pattern
+        using (str): Database alias
+
+    Yields:
+        QueryRecorder: The recorded queries
+    """
+    with QueryRecorder(using) as recorder:
+        yield recorder
+    problems = check_query_budget(recorder, budget, duplicate_threshold)
+    if problems:
+        raise QueryBudgetExceeded('\n'.join(problems) + '\n' + recorder.report())
@@ -0,0 +1,156 @@
+"""
+Full-text job search.
+
+On SQLite, jobs are indexed in the ``jobs_job_fts`` FTS5 table (title,
+company, location, required skills and description). It is an external
+content table over ``jobs_job``, kept in sync by triggers, so saves, bulk
+updates, imports and raw SQL all reach it. JobSearchIndex maps it for the
+ORM: a search joins it on the job id and orders by its bm25 ``rank``, with
+title and skills matches weighted above the description.
+
+The job list and JobAdmin both search through ``search_jobs``. Other
+database backends fall back to ``icontains`` filters.
+"""
+
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Count, Lookup, Q
+
+from ml_engine.conf import get_setting
+
+# Characters kept inside tokens, so "C++" and "C#" stay searchable; must
+# match the tokenizer of the jobs_job_fts table
+TOKEN = re.compile(r'[\w+#]+')
+
+# Fields searched when FTS5 is not available
+FALLBACK_FIELDS = ['title', 'company', 'location', 'required_skills', 'description']
+
+
+class Match(Lookup):
+    """``document__match``: FTS5 ``MATCH`` against the whole indexed row."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def search_available(using='default'):
+    """
+    Whether the full-text index exists on a database.
+
+    Args:
+        using (str): Database alias
+
+    Returns:
+        bool: True on SQLite (the index is created by migration)
+    """
+    return connections[using].vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 query.
+
+    Every word must match, as a prefix ("pyth" finds "Python"); FTS5 syntax
+    in the input is never interpreted.
+
+    Args:
+        text (str): Search box input
+
+    Returns:
+        str: FTS5 query, '' when the text has no words
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(text.lower()))
+
+
+def matching_job_ids(text):
+    """
+    Ids of the jobs matching a search, as a subquery.
+
+    Usable where the ranked join of ``search_jobs`` is not, e.g. OR-ed with
+    other conditions.
+
+    Args:
+        text (str): Search box input
+
+    Returns:
+        QuerySet: ``job_id`` values of the matching index rows
+    """
+    from .models import JobSearchIndex
+
+    query = build_match_query(text)
+    if not query:
+        return JobSearchIndex.objects.none().values('job_id')
+    return JobSearchIndex.objects.filter(document__match=query).values('job_id')
+
+
+def search_jobs(queryset, text):
+    """
+    Filter jobs matching a search, best match first.
+
+    Args:
+        queryset (QuerySet): Jobs to search
+        text (str): Search box input
+
+    Returns:
+        QuerySet: Matching jobs, ranked
+    """
+    if not search_available(queryset.db):
+        words = text.split()
+        for word in words:
+            queryset = queryset.filter(
+                Q(*[(f'{field}__icontains', word) for field in FALLBACK_FIELDS], _connector=Q.OR)
+            )
+        return queryset
+
+    query = build_match_query(text)
+    if not query:
+        return queryset.none()
+    return (
+        queryset
+        .filter(search_index__document__match=query)
+        .order_by('search_index__rank', '-created_at', '-id')
+    )
+
+
+def job_facets(queryset, fields=('location', 'company'), limit=None):
+    """
+    Most common values of fields among a set of jobs, with their counts.
+
+    Counts are cached for RECOMMENDER_SEARCH_FACET_TTL seconds per query.
+
+    Args:
+        queryset (QuerySet): Jobs, e.g. search results
+        fields (tuple): Fields to count
+        limit (int): Values per field (RECOMMENDER_SEARCH_FACET_LIMIT by default)
+
+    Returns:
+        dict: field -> list of (value, count), most common first
+    """
+    limit = limit or get_setting('SEARCH_FACET_LIMIT')
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # queryset.none(), e.g. a search without any words
+        return {field: [] for field in fields}
+    key = 'jobs.facets.' + hashlib.sha1(
+        repr((sql, params, fields, limit)).encode('utf-8')
+    ).hexdigest()
+
+    facets = cache.get(key)
+    if facets is None:
+        facets = {
+            field: list(
+                queryset.values_list(field).annotate(count=Count('id')).order_by('-count', field)[:limit]
+            )
+            for field in fields
+        }
+        cache.set(key, facets, get_setting('SEARCH_FACET_TTL'))
+    return facets
@@ -0,0 +1,171 @@
+"""
+Keep the recommender's job index in sync with the Job table.
+
+Row saves and deletes arrive through the model signals. ``QuerySet.update``
+does not send them, so JobQuerySet.update sends ``jobs_bulk_updated`` with
+the affected ids instead (admin bulk actions, list_editable, bulk_update).
+Changed jobs are appended to the JobChange log inside the saving
+transaction, which every worker process reads to update its job index (see
+ml_engine/index.py). Once the transaction commits, this worker reads it on
+its next lookup, the changed jobs are queued for a refresh of the "similar
+jobs" neighbour lists (see jobs/similar.py), and newly posted jobs for
+reverse matching (see jobs/alerts.py).
+
+Before a job or profile is saved, its skills text is interned to the sorted
+canonical skill ids stored in ``skill_ids`` (see jobs/skills.py). When a
+skill alias is added, edited or removed, the rows mentioning it are
+re-interned once the transaction commits.
+
+The same receivers keep the active jobs CatalogCounter current, inside the
+saving transaction: saves and deletes adjust it by the status change, bulk
+updates of ``is_active`` recount it.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from ml_engine.conf import get_setting
+from ml_engine.index import request_job_index_sync
+
+from .alerts import enqueue_job_alerts
+from .similar import enqueue_similar_jobs
+from .skills import intern_skills, reintern_skills, skill_dictionary
+
+# Sent by JobQuerySet.update() with job_ids=[...] of the updated rows and
+# the updated fields=[...]
+jobs_bulk_updated = Signal()
+
+# Rows per bulk_create batch of change log entries
+BATCH_SIZE = 1000
+
+
+def log_job_changes(job_ids):
+    """
+    Append changed jobs to the change log, in the current transaction.
+
+    Args:
+        job_ids (list): Ids of saved, deleted or updated jobs
+    """
+    from .models import JobChange
+
+    JobChange.objects.bulk_create(
+        [JobChange(job_id=job_id) for job_id in job_ids], batch_size=BATCH_SIZE
+    )
+    transaction.on_commit(request_job_index_sync)
+
+
+def update_active_jobs_counter(instance, created=False, deleted=False):
+    """
+    Adjust the active jobs counter for one saved or deleted job.
+
+    Args:
+        instance (Job): Saved or deleted job
+        created (bool): Whether the job was just inserted
+        deleted (bool): Whether the job was just deleted
+    """
+    from .models import CatalogCounter
+
+    if created:
+        CatalogCounter.adjust_active_jobs(int(instance.is_active))
+        instance._loaded_is_active = instance.is_active
+        return
+
+    was_active = getattr(instance, '_loaded_is_active', None)
+    if was_active is None:
+        # Status before the change unknown (instance not loaded, or deferred)
+        CatalogCounter.refresh_active_jobs()
+        return
+
+    now_active = False if deleted else instance.is_active
+    CatalogCounter.adjust_active_jobs(int(now_active) - int(was_active))
+    instance._loaded_is_active = now_active
+
+
+@receiver(pre_save, sender='jobs.Job')
+def job_intern_skills(sender, instance, raw=False, **kwargs):
+    """Store the canonical skill ids of a job's required skills."""
+    if not raw:
+        instance.skill_ids = intern_skills(instance.required_skills)
+
+
+@receiver(pre_save, sender='accounts.UserProfile')
+def profile_intern_skills(sender, instance, raw=False, **kwargs):
+    """Store the canonical skill ids of a profile's skills."""
+    if not raw:
+        instance.skill_ids = intern_skills(instance.skills)
+
+
+@receiver(pre_save, sender='jobs.SkillAlias')
+def skill_alias_saving(sender, instance, raw=False, **kwargs):
+    """Remember the alias an edit renames, whose rows need re-interning too."""
+    instance._previous_alias = None
+    if instance.pk and not raw:
+        instance._previous_alias = (
+            sender.objects.filter(pk=instance.pk).values_list('alias', flat=True).first()
+        )
+
+
+@receiver(post_save, sender='jobs.SkillAlias')
+@receiver(post_delete, sender='jobs.SkillAlias')
+def skill_alias_changed(sender, instance, raw=False, **kwargs):
+    """Reload the aliases everywhere and re-intern the rows mentioning the alias after commit."""
+    from .models import CatalogCounter
+
+    skill_dictionary.clear()
+    if raw:
+        return
+    # Other processes reload their alias maps when they see the new version
+    CatalogCounter.bump_skill_aliases_version()
+    names = {instance.alias, getattr(instance, '_previous_alias', None)} - {None}
+    transaction.on_commit(lambda: reintern_skills(names))
+
+
+@receiver(post_save, sender='jobs.Job')
+def job_saved(sender, instance, raw=False, **kwargs):
+    """Log a saved job for the index; refresh what depends on it after commit."""
+    if raw:
+        # Loading fixtures
+        return
+    created = kwargs.get('created', False)
+    update_active_jobs_counter(instance, created=created)
+    log_job_changes([instance.id])
+    job_id, is_active = instance.id, instance.is_active
+
+    def sync():
+        enqueue_similar_jobs([job_id])
+        if created and is_active:
+            enqueue_job_alerts([job_id])
+
+    transaction.on_commit(sync)
+
+
+@receiver(pre_delete, sender='jobs.Job')
+def job_deleting(sender, instance, **kwargs):
+    """Remember the jobs listing this one as similar; the rows cascade away."""
+    if get_setting('SIMILAR_JOBS_SYNC'):
+        from .models import SimilarJob
+        instance._listed_by = list(
+            SimilarJob.objects.filter(similar_id=instance.id).values_list('job_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender='jobs.Job')
+def job_deleted(sender, instance, **kwargs):
+    """Log a deleted job for removal from the index."""
+    update_active_jobs_counter(instance, deleted=True)
+    log_job_changes([instance.id])
+    listed_by = getattr(instance, '_listed_by', [])
+
+    if listed_by:
+        transaction.on_commit(lambda: enqueue_similar_jobs(listed_by))
+
+
+@receiver(jobs_bulk_updated)
+def jobs_updated(sender, job_ids, fields=(), **kwargs):
+    """Log bulk-updated jobs for the index; the log readers re-read them."""
+    if 'is_active' in fields:
+        from .models import CatalogCounter
+        CatalogCounter.refresh_active_jobs()
+    log_job_changes(job_ids)
+    transaction.on_commit(lambda: enqueue_similar_jobs(job_ids))
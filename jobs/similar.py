@@ -0,0 +1,182 @@
+"""
+Maintenance of the SimilarJob neighbour table.
+
+Job detail pages only read the table. It is rebuilt in full by
+``manage.py build_similar_jobs`` and refreshed incrementally after a job
+changes: once the change commits, its id is put on a local worker queue
+(see jobs/signals.py), and a daemon thread brings the job index up to date
+and recomputes the changed job's list, the lists of its closest jobs (the
+ones it can enter) and the lists that named it (which it may have left).
+"""
+
+import logging
+import queue
+import threading
+
+import numpy as np
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from ml_engine.conf import get_setting
+from ml_engine.index import get_job_index, sync_job_index
+from ml_engine.metrics import increment, span
+from ml_engine.similarity import affected_positions, iter_similar_jobs
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk_create batch
+BATCH_SIZE = 1000
+
+# Changed job ids waiting for the worker thread
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def store_similar_jobs(results, computed_at=None):
+    """
+    Replace the stored neighbours of the given jobs.
+
+    Args:
+        results (list): (job_id, neighbours) pairs from iter_similar_jobs()
+        computed_at (datetime): Timestamp stored on the rows
+
+    Returns:
+        int: Number of jobs stored
+    """
+    from .models import SimilarJob
+
+    computed_at = computed_at or timezone.now()
+    rows = [
+        SimilarJob(
+            job_id=job_id,
+            similar_id=similar_id,
+            rank=rank,
+            similarity_score=score,
+            computed_at=computed_at,
+        )
+        for job_id, neighbours in results
+        for rank, (similar_id, score) in enumerate(neighbours, start=1)
+    ]
+    with transaction.atomic():
+        SimilarJob.objects.filter(job_id__in=[job_id for job_id, _ in results]).delete()
+        SimilarJob.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(results)
+
+
+def rebuild_similar_jobs(k=None, chunk_size=512, flush_every=2048):
+    """
+    Recompute the neighbours of every indexed job.
+
+    Args:
+        k (int): Neighbours per job (RECOMMENDER_SIMILAR_JOBS_TOP_K by default)
+        chunk_size (int): Jobs per sparse matrix product
+        flush_every (int): Jobs written per transaction
+
+    Returns:
+        int: Number of jobs processed
+    """
+    from .models import SimilarJob
+
+    k = k or get_setting('SIMILAR_JOBS_TOP_K')
+    index = get_job_index()
+    computed_at = timezone.now()
+
+    stored = 0
+    results = []
+    for result in iter_similar_jobs(index, k=k, chunk_size=chunk_size):
+        results.append(result)
+        if len(results) >= flush_every:
+            stored += store_similar_jobs(results, computed_at)
+            results = []
+    if results:
+        stored += store_similar_jobs(results, computed_at)
+
+    # Lists of jobs that left the index since the last build
+    SimilarJob.objects.filter(computed_at__lt=computed_at).delete()
+    return stored
+
+
+def refresh_similar_jobs(job_ids):
+    """
+    Recompute the neighbour lists a change of ``job_ids`` can affect.
+
+    Removed and deactivated jobs drop their own lists. The lists naming a
+    changed job are recomputed, as its similarity to them changed or it is
+    gone, and so are the lists of its closest jobs, which it may now enter.
+
+    Args:
+        job_ids (list): Changed job ids, already applied to the job index
+
+    Returns:
+        int: Number of lists recomputed
+    """
+    from .models import SimilarJob
+
+    k = get_setting('SIMILAR_JOBS_TOP_K')
+    with span('similar_jobs_refresh'):
+        index = get_job_index()
+        live = [job_id for job_id in job_ids if index.position(job_id) is not None]
+        gone = set(job_ids).difference(live)
+        if gone:
+            SimilarJob.objects.filter(job_id__in=gone).delete()
+
+        listed_by = set(
+            SimilarJob.objects.filter(similar_id__in=job_ids).values_list('job_id', flat=True)
+        )
+        listed_by = [index.position(job_id) for job_id in listed_by.difference(job_ids)]
+        positions = affected_positions(index, live, get_setting('SIMILAR_JOBS_FANOUT'))
+        listed_by = np.asarray([position for position in listed_by if position is not None], dtype=np.int64)
+        positions = np.union1d(positions, listed_by)
+        return store_similar_jobs(list(iter_similar_jobs(index, positions, k=k)))
+
+
+def enqueue_similar_jobs(job_ids):
+    """
+    Queue changed jobs for a neighbour list refresh on the worker thread.
+
+    Large batches are left to the build_similar_jobs command.
+
+    Args:
+        job_ids (list): Ids of saved, deleted or updated jobs
+    """
+    global _worker
+    if not get_setting('SIMILAR_JOBS_SYNC') or not job_ids:
+        return
+    if len(job_ids) > get_setting('SIMILAR_JOBS_SYNC_LIMIT'):
+        logger.info('%d jobs changed; run build_similar_jobs to refresh similar jobs', len(job_ids))
+        return
+    for job_id in job_ids:
+        _queue.put(job_id)
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='similar-jobs', daemon=True)
+            _worker.start()
+
+
+def _work():
+    batch_size = get_setting('SIMILAR_JOBS_SYNC_LIMIT')
+    while True:
+        # Block for the next job, then take whatever else is already queued
+        job_ids = [_queue.get()]
+        while len(job_ids) < batch_size:
+            try:
+                job_ids.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        close_old_connections()
+        try:
+            # Loads the index if this worker has none yet, then waits for
+            # any running sync and applies the committed changes
+            get_job_index()
+            sync_job_index(wait=True)
+            refreshed = refresh_similar_jobs(list(dict.fromkeys(job_ids)))
+            logger.info('Refreshed %d similar job lists for %d changed jobs', refreshed, len(job_ids))
+        except Exception:
+            increment('recommender_errors_total', stage='similar_jobs_refresh')
+            logger.exception('Could not refresh similar jobs of %s', job_ids)
+        finally:
+            close_old_connections()
+            for _ in job_ids:
+                _queue.task_done()
@@ -0,0 +1,303 @@
+"""
+Canonical skill dictionary.
+
+Free-text skills ("Python, JS, machine  learning") are normalized, mapped
+through aliases ("js" -> "javascript") and interned to integer Skill ids.
+Jobs and profiles store the sorted ids of their skills, so matching is a
+set operation on small integer arrays instead of repeated string parsing.
+
+Rows are interned when they are saved. Adding, editing or removing an alias
+bumps the alias version, which every process checks before interning, and
+re-interns the rows that mention it (see jobs/signals.py);
+``manage.py reintern_skills`` re-interns every row.
+"""
+
+import re
+import threading
+import time
+
+import numpy as np
+from django.db.models import Q
+
+from ml_engine.conf import get_setting
+
+# Built-in aliases, seeded by migration; more can be added in the admin
+DEFAULT_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'golang': 'go',
+    'nodejs': 'node.js',
+    'node': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'sklearn': 'scikit-learn',
+    'tf': 'tensorflow',
+    'amazon web services': 'aws',
+    'gcp': 'google cloud',
+    'rest': 'rest api',
+    'restful api': 'rest api',
+    'ci cd': 'ci/cd',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    """
+    Normalize one skill name: lowercase, trimmed, single spaces.
+
+    Args:
+        name (str): Raw skill name
+
+    Returns:
+        str: Normalized name ('' for blank input)
+    """
+    return _WHITESPACE.sub(' ', name.strip().lower())
+
+
+def split_skills(skills_text):
+    """
+    Split a comma-separated skills text into normalized, unique names.
+
+    Args:
+        skills_text (str): Comma-separated skills
+
+    Returns:
+        list: Normalized names in their original order
+    """
+    names = (normalize_skill(skill) for skill in (skills_text or '').split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def clean_skills_text(skills, max_length=100):
+    """
+    Validate and tidy the skills of an imported job.
+
+    Names keep their spelling; whitespace is collapsed and repeated names
+    (case-insensitively) are dropped.
+
+    Args:
+        skills (str or list): Comma-separated skills, or a list of names
+        max_length (int): Longest allowed skill name (Skill.name's length)
+
+    Returns:
+        str: Comma-separated skills
+
+    Raises:
+        ValueError: No skill given, or a name is too long
+    """
+    if isinstance(skills, (list, tuple)):
+        skills = ','.join(str(skill) for skill in skills)
+    names = {}
+    for raw in (skills or '').split(','):
+        name = _WHITESPACE.sub(' ', raw.strip())
+        if not name:
+            continue
+        if len(name) > max_length:
+            raise ValueError(f'skill name longer than {max_length} characters: {name[:40]!r}...')
+        names.setdefault(name.lower(), name)
+    if not names:
+        raise ValueError('no required skills')
+    return ', '.join(names.values())
+
+
+class SkillDictionary:
+    """
+    In-process cache of canonical skill names, aliases and their ids.
+
+    Every process keeps its own copy. At most every
+    RECOMMENDER_SKILL_ALIAS_CHECK_INTERVAL seconds it compares the alias
+    version (bumped by jobs/signals.py on every alias change, whichever
+    process made it) with the one it loaded, and reloads on a change.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = {}
+        self._aliases = None
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def canonical(self, name):
+        """
+        Resolve an alias to its canonical skill name.
+
+        Args:
+            name (str): Normalized skill name
+
+        Returns:
+            str: Canonical name
+        """
+        return self._current_aliases().get(name, name)
+
+    def intern(self, skills_text):
+        """
+        Intern a skills text, creating Skill rows for unseen names.
+
+        Args:
+            skills_text (str): Comma-separated skills
+
+        Returns:
+            list: Sorted unique skill ids
+        """
+        from .models import Skill
+
+        aliases = self._current_aliases()
+        names = list(dict.fromkeys(aliases.get(name, name) for name in split_skills(skills_text)))
+        # A clear() replaces the dictionaries; read from one of them only
+        known = self._ids
+        ids = {name: known[name] for name in names if name in known}
+        missing = [name for name in names if name not in ids]
+        if missing:
+            Skill.objects.bulk_create(
+                [Skill(name=name) for name in missing], ignore_conflicts=True
+            )
+            rows = list(Skill.objects.filter(name__in=missing).values_list('id', 'name'))
+            self._remember(rows)
+            ids.update((name, skill_id) for skill_id, name in rows)
+        return sorted(set(ids.values()))
+
+    def names(self, skill_ids):
+        """
+        Canonical names of skill ids.
+
+        Args:
+            skill_ids (iterable): Skill ids
+
+        Returns:
+            list: Names, in the order of the ids
+        """
+        from .models import Skill
+
+        skill_ids = [int(skill_id) for skill_id in skill_ids]
+        known = self._names
+        names = {skill_id: known[skill_id] for skill_id in skill_ids if skill_id in known}
+        missing = [skill_id for skill_id in skill_ids if skill_id not in names]
+        if missing:
+            rows = list(Skill.objects.filter(id__in=missing).values_list('id', 'name'))
+            self._remember(rows)
+            names.update(rows)
+        return [names.get(skill_id, '') for skill_id in skill_ids]
+
+    def clear(self):
+        """Forget cached ids and aliases (e.g. after aliases were edited)."""
+        with self._lock:
+            self._ids = {}
+            self._names = {}
+            self._aliases = None
+            self._version = None
+
+    def _remember(self, rows):
+        with self._lock:
+            for skill_id, name in rows:
+                self._ids[name] = skill_id
+                self._names[skill_id] = name
+
+    def _current_aliases(self):
+        """The alias map, reloaded if another process changed the aliases."""
+        from .models import CatalogCounter
+
+        aliases, now = self._aliases, time.monotonic()
+        if aliases is not None and now - self._checked_at < get_setting('SKILL_ALIAS_CHECK_INTERVAL'):
+            return aliases
+        version = CatalogCounter.skill_aliases_version()
+        if aliases is not None and version == self._version:
+            self._checked_at = now
+            return aliases
+        return self._load_aliases(version, now)
+
+    def _load_aliases(self, version, now):
+        from .models import SkillAlias
+
+        aliases = dict(SkillAlias.objects.values_list('alias', 'skill__name'))
+        with self._lock:
+            if self._version is not None and self._version != version:
+                # Skills may have been renamed or removed with the aliases
+                self._ids = {}
+                self._names = {}
+            self._aliases = aliases
+            self._version = version
+            self._checked_at = now
+        return aliases
+
+
+skill_dictionary = SkillDictionary()
+
+
+def intern_skills(skills_text):
+    """
+    Sorted skill ids of a comma-separated skills text.
+
+    Args:
+        skills_text (str): Comma-separated skills
+
+    Returns:
+        list: Sorted unique skill ids
+    """
+    return skill_dictionary.intern(skills_text)
+
+
+def reintern_skills(names=None, batch_size=1000):
+    """
+    Re-intern the skill ids of jobs and profiles, e.g. after an alias changed.
+
+    Args:
+        names (iterable): Only rows whose skills text mentions one of these
+            names (case-insensitively); None for every row
+        batch_size (int): Rows per bulk update
+
+    Returns:
+        int: Rows whose skill ids changed
+    """
+    from accounts.models import UserProfile
+    from .models import Job
+
+    skill_dictionary.clear()
+    names = [normalize_skill(name) for name in names] if names is not None else None
+    changed = 0
+    for model, field in ((Job, 'required_skills'), (UserProfile, 'skills')):
+        rows = model.objects.all()
+        if names is not None:
+            if not names:
+                continue
+            rows = rows.filter(Q(*[(f'{field}__icontains', name) for name in names], _connector=Q.OR))
+        batch = []
+        for row in rows.only('id', field, 'skill_ids').iterator(chunk_size=batch_size):
+            skill_ids = intern_skills(getattr(row, field))
+            if skill_ids != row.skill_ids:
+                row.skill_ids = skill_ids
+                batch.append(row)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, ['skill_ids'])
+                changed += len(batch)
+                batch = []
+        model.objects.bulk_update(batch, ['skill_ids'])
+        changed += len(batch)
+    return changed
+
+
+def match_skill_ids(user_skill_ids, job_skill_ids):
+    """
+    Compare two sorted skill id arrays.
+
+    Args:
+        user_skill_ids (list): User's sorted skill ids
+        job_skill_ids (list): Job's sorted skill ids
+
+    Returns:
+        tuple: (matching ids, missing ids) as arrays
+    """
+    user_skill_ids = np.asarray(user_skill_ids, dtype=np.int64)
+    job_skill_ids = np.asarray(job_skill_ids, dtype=np.int64)
+    matching = np.intersect1d(user_skill_ids, job_skill_ids, assume_unique=True)
+    missing = np.setdiff1d(job_skill_ids, user_skill_ids, assume_unique=True)
+    return matching, missing
@@ -0,0 +1,733 @@
+"""
+Tests of the jobs app and the recommendation engine behind it.
+
+Every test runs on the same small catalog, and the ranking paths (sharded,
+IVF, inverted) are checked against exact scoring on it. The query budget
+tests request every page with a warm job index and fail when it runs more
+SQL queries than its RECOMMENDER_QUERY_BUDGETS entry, or repeats a query
+shape like an N+1 pattern (see jobs/queries.py).
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from ml_engine import store
+from ml_engine.aio import rank_jobs_async
+from ml_engine.ann import IVFIndex, rank_approximate
+from ml_engine.cache import RecommendationCache, get_result_cache
+from ml_engine.index import (
+    JobIndex, build_job_index, get_job_index, load_job_index, publish_job_index, sync_job_index,
+)
+from ml_engine.parallel import ShardedScorer
+from ml_engine.recommender import JobRecommender
+from ml_engine.singleflight import SingleFlight
+
+from .alerts import match_new_jobs, pending_alert_jobs
+from .models import CatalogCounter, Job, JobAlert, JobChange, SimilarJob, Skill, SkillAlias
+from .pagination import InvalidCursor, approximate_count, keyset_page
+from .queries import assert_query_budget, get_query_budget
+from .similar import rebuild_similar_jobs, refresh_similar_jobs
+from .skills import SkillDictionary, intern_skills, skill_dictionary
+
+# Queries compared between the ranking paths
+QUERIES = ['Python, Django', 'React, CSS', 'Docker, AWS', 'Python, SQL, Machine Learning', 'Cobol']
+
+JOBS = [
+    ('Backend Developer', 'Python, Django, PostgreSQL', 'Acme', 'Berlin'),
+    ('Data Scientist', 'Python, Machine Learning, SQL', 'Globex', 'Paris'),
+    ('Frontend Developer', 'JavaScript, React, CSS', 'Acme', 'Remote'),
+    ('DevOps Engineer', 'Docker, Kubernetes, AWS', 'Initech', 'Berlin'),
+    ('Full Stack Developer', 'Python, Django, React', 'Globex', 'Remote'),
+]
+
+
+# An in-memory index per test run, no change log or alias version reads
+# mid-request, and no background re-fits, whose threads would not see the
+# test transaction
+@override_settings(
+    ALLOWED_HOSTS=['*'],
+    RECOMMENDER_INDEX_DIR=None,
+    RECOMMENDER_REFIT_DRIFT=1000,
+    RECOMMENDER_INDEX_CHECK_INTERVAL=3600,
+    RECOMMENDER_SKILL_ALIAS_CHECK_INTERVAL=3600,
+    RECOMMENDER_RESULT_CACHE=None,
+)
+class JobsTestCase(TestCase):
+    """
+    A small catalog, a user with skills and a job index fitted over them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Skills cached by an earlier test may have been rolled back
+        skill_dictionary.clear()
+        cls.jobs = [
+            Job.objects.create(
+                title=title, required_skills=skills, company=company, location=location,
+                description=f'{title} at {company}',
+            )
+            for title, skills, company, location in JOBS
+        ]
+        cls.user = User.objects.create_user('alice', password='secret')
+        UserProfile.objects.update_or_create(user=cls.user, defaults={'skills': 'Python, Django'})
+
+    def setUp(self):
+        skill_dictionary.clear()
+        load_job_index()
+        self.client.force_login(self.user)
+
+    def assertSameRanking(self, ranked, expected):
+        """Same jobs in the same order, with the same scores."""
+        self.assertEqual([job_id for job_id, _ in ranked], [job_id for job_id, _ in expected])
+        for (_, score), (_, expected_score) in zip(ranked, expected):
+            self.assertAlmostEqual(score, expected_score, places=6)
+
+
+class QueryBudgetTests(JobsTestCase):
+    """
+    Every page stays within its query budget.
+    """
+
+    PAGES = [
+        ('jobs:home', {}, ''),
+        ('jobs:dashboard', {}, ''),
+        ('jobs:job_list', {}, ''),
+        ('jobs:job_list', {}, '?q=python&location=Berlin'),
+        ('jobs:job_detail', None, ''),
+        ('jobs:recommendations', {}, ''),
+        ('jobs:recommendations_async', {}, ''),
+        ('jobs:api_recommendations', {}, '?limit=2&fields=title,company'),
+        ('jobs:api_recommendations_async', {}, '?limit=2&fields=title,company'),
+        ('jobs:api_jobs', {}, ''),
+        ('accounts:profile', {}, ''),
+    ]
+
+    def test_pages_within_budget(self):
+        for view_name, kwargs, query in self.PAGES:
+            if kwargs is None:
+                kwargs = {'job_id': self.jobs[0].id}
+            url = reverse(view_name, kwargs=kwargs) + query
+            with self.subTest(url=url):
+                # The first request warms per-process caches
+                self.client.get(url)
+                with assert_query_budget(get_query_budget(view_name)):
+                    response = self.client.get(url)
+                self.assertLess(response.status_code, 400)
+
+    def test_pages_run_queries(self):
+        with assert_query_budget() as recorder:
+            self.client.get(reverse('jobs:job_list'))
+        self.assertGreater(recorder.count, 0)
+
+    def test_async_pages_within_budget(self):
+        client = AsyncClient()
+        client.cookies = self.client.cookies
+
+        # Served by an event loop, with the ORM calls sent back to this
+        # thread, whose connection the recorder watches
+        @async_to_sync
+        async def get(url):
+            return await client.get(url)
+
+        for view_name in ('jobs:recommendations_async', 'jobs:api_recommendations_async'):
+            url = reverse(view_name)
+            with self.subTest(url=url):
+                get(url)
+                with assert_query_budget(get_query_budget(view_name)) as recorder:
+                    response = get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(recorder.count, 0)
+
+
+class QueryBudgetMiddlewareTests(JobsTestCase):
+    """
+    The middleware only runs when asked for, and counts async requests too.
+    """
+
+    def test_off_by_default(self):
+        response = Client().get(reverse('jobs:home'))
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(RECOMMENDER_QUERY_BUDGET_MIDDLEWARE=True, RECOMMENDER_METRICS_HEADER=True)
+    def test_counts_sync_requests(self):
+        response = self.client.get(reverse('jobs:job_list'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+    @override_settings(RECOMMENDER_QUERY_BUDGET_MIDDLEWARE=True, RECOMMENDER_METRICS_HEADER=True)
+    async def test_counts_async_requests(self):
+        client = AsyncClient()
+        client.cookies = self.client.cookies
+        response = await client.get(reverse('jobs:api_recommendations_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+
+class CatalogCounterTests(JobsTestCase):
+    """
+    The active jobs counter follows saves made through any instance.
+    """
+
+    def test_save_after_refresh_from_db(self):
+        job = Job.objects.get(pk=self.jobs[0].pk)
+        Job.objects.filter(pk=job.pk).update(is_active=False)
+        self.assertEqual(CatalogCounter.active_jobs(), len(JOBS) - 1)
+
+        job.refresh_from_db()
+        job.save()
+        self.assertEqual(CatalogCounter.active_jobs(), len(JOBS) - 1)
+
+        job.is_active = True
+        job.save()
+        self.assertEqual(CatalogCounter.active_jobs(), len(JOBS))
+
+
+class JobSearchTests(JobsTestCase):
+    """
+    Job list search, including queries that leave no words to match.
+    """
+
+    def test_search(self):
+        response = self.client.get(reverse('jobs:job_list'), {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        titles = {job.title for job in response.context['page_obj']}
+        self.assertEqual(titles, {'Backend Developer', 'Full Stack Developer'})
+
+    def test_query_without_words(self):
+        for query in ('"', '*', '()', ' - '):
+            with self.subTest(q=query):
+                response = self.client.get(reverse('jobs:job_list'), {'q': query})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['page_obj']), [])
+                self.assertEqual(response.context['location_facets'], [])
+                self.assertEqual(response.context['company_facets'], [])
+
+    def test_count_of_empty_queryset(self):
+        self.assertEqual(approximate_count(Job.objects.none()), 0)
+
+
+class SkillDictionaryTests(JobsTestCase):
+    """
+    Alias edits reach the skill dictionaries of other processes.
+    """
+
+    def test_alias_edit_reaches_other_processes(self):
+        # Stands for the dictionary of another worker process
+        other = SkillDictionary()
+        django = Skill.objects.get(name='django')
+        self.assertNotEqual(other.intern('DJ, Python'), intern_skills('Django, Python'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillAlias.objects.create(alias='dj', skill=django)
+        # Until its next version check, the other process keeps its aliases
+        self.assertNotIn(django.id, other.intern('DJ'))
+        with override_settings(RECOMMENDER_SKILL_ALIAS_CHECK_INTERVAL=0):
+            self.assertEqual(other.intern('DJ, Python'), intern_skills('Django, Python'))
+            self.assertEqual(other.names([django.id]), ['django'])
+
+
+class ImportJobsTests(JobsTestCase):
+    """
+    Imported batches refresh similar jobs and alerts as they commit.
+    """
+
+    def import_jobs(self, records, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.jsonl')
+            with open(path, 'w', encoding='utf-8') as feed:
+                feed.writelines(json.dumps(record) + '\n' for record in records)
+            call_command('import_jobs', path, *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_batches_refresh_similar_jobs_and_alerts(self):
+        self.import_jobs([
+            {'external_id': 'feed-1', 'title': 'Django Developer', 'required_skills': ['Python', 'Django']},
+            {'external_id': 'feed-2', 'title': 'Cloud Engineer', 'required_skills': 'AWS, Docker'},
+        ], '--batch-size', '1')
+
+        django_job = Job.objects.get(external_id='feed-1')
+        self.assertIsNotNone(django_job.alerts_matched_at)
+        self.assertTrue(JobAlert.objects.filter(job=django_job, profile__user=self.user).exists())
+        self.assertFalse(JobAlert.objects.filter(job__external_id='feed-2').exists())
+        similar = list(SimilarJob.objects.filter(job=django_job).values_list('similar__title', flat=True))
+        self.assertEqual(set(similar[:2]), {'Backend Developer', 'Full Stack Developer'})
+        # The existing jobs' lists now name the imported job
+        self.assertTrue(SimilarJob.objects.filter(job=self.jobs[4], similar=django_job).exists())
+
+    def test_no_alerts_leaves_jobs_for_the_sweep(self):
+        self.import_jobs(
+            [{'external_id': 'feed-1', 'title': 'Django Developer', 'required_skills': 'Python, Django'}],
+            '--no-alerts',
+        )
+        job = Job.objects.get(external_id='feed-1')
+        self.assertIn(job.id, list(pending_alert_jobs()))
+        call_command('match_job_alerts', stdout=StringIO())
+        self.assertTrue(JobAlert.objects.filter(job=job, profile__user=self.user).exists())
+
+
+class AsyncRankingTests(JobsTestCase):
+    """
+    Coalesced async rankings.
+    """
+
+    def test_no_coalescing_across_indexes(self):
+        old = get_job_index()
+        # The index after the best match was removed, e.g. by a swap
+        new = old.apply_updates({self.jobs[0].id: None})
+
+        @async_to_sync
+        async def rank_concurrently():
+            return await asyncio.gather(
+                rank_jobs_async(JobRecommender(old), 'Python, Django', 3),
+                rank_jobs_async(JobRecommender(new), 'Python, Django', 3),
+            )
+
+        before, after = rank_concurrently()
+        self.assertIn(self.jobs[0].id, [job_id for job_id, _ in before])
+        self.assertNotIn(self.jobs[0].id, [job_id for job_id, _ in after])
+
+
+class ChangeLogTests(JobsTestCase):
+    """
+    Every worker's index follows the job change log.
+    """
+
+    def test_apply_updates(self):
+        index = get_job_index()
+        edited, removed = self.jobs[0], self.jobs[3]
+        updated = index.apply_updates({edited.id: 'Go, Rust', removed.id: None})
+
+        # The fitted rows are shared and left alone; replaced rows are tombstoned
+        self.assertIs(updated.base_matrix, index.base_matrix)
+        self.assertEqual(index.job_ids[index.position(edited.id)], edited.id)
+        self.assertEqual(updated.job_ids[index.position(edited.id)], JobIndex.TOMBSTONE)
+        self.assertGreaterEqual(updated.position(edited.id), updated.n_base)
+        self.assertIsNone(updated.position(removed.id))
+        self.assertEqual(np.count_nonzero(updated.job_ids != JobIndex.TOMBSTONE), len(JOBS) - 1)
+        self.assertNotEqual(updated.version, index.version)
+
+        ranked = JobRecommender(updated).rank_jobs('Docker, Kubernetes', 5)
+        self.assertNotIn(removed.id, [job_id for job_id, _ in ranked])
+        ranked = JobRecommender(updated).rank_jobs('Python, Django, PostgreSQL', 5)
+        self.assertNotIn(edited.id, [job_id for job_id, _ in ranked])
+
+    def test_saves_reach_the_index(self):
+        job = self.jobs[2]
+        job.required_skills = 'Docker, Kubernetes, AWS'
+        job.save()
+        self.jobs[3].delete()
+        added = Job.objects.create(title='ML Engineer', required_skills='Python, Machine Learning')
+
+        index = sync_job_index(wait=True)
+        self.assertIsNone(index.position(self.jobs[3].id))
+        self.assertIsNotNone(index.position(added.id))
+        ranked = JobRecommender(index).rank_jobs('Docker, Kubernetes, AWS', 1)
+        self.assertEqual(ranked[0][0], job.id)
+        self.assertAlmostEqual(ranked[0][1], 1.0, places=6)
+
+    def test_second_load_replays_the_log(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(RECOMMENDER_INDEX_DIR=directory):
+            generation = load_job_index().generation
+            job = self.jobs[2]
+            job.required_skills = 'Machine Learning, SQL'
+            job.save()
+            Job.objects.filter(pk=self.jobs[4].pk).update(is_active=False)
+
+            # Another worker maps the same generation and replays the log
+            index = load_job_index()
+            self.assertEqual(index.generation, generation)
+            self.assertEqual(index.n_changed, 3)
+            self.assertIsNone(index.position(self.jobs[4].id))
+            ranked = JobRecommender(index).rank_jobs('Machine Learning, SQL', 1)
+            self.assertEqual(ranked[0][0], job.id)
+
+    @override_settings(RECOMMENDER_CHANGE_LOG_REPLAY_WINDOW=100)
+    def test_late_commits_are_replayed(self):
+        load_job_index()
+        late, other = self.jobs[2], self.jobs[3]
+        # An entry id taken by a transaction that is still open...
+        entry_id = JobChange.objects.create(job_id=late.id).id
+        JobChange.objects.filter(id=entry_id).delete()
+        # ...while a later one commits and is read
+        Job.objects.filter(pk=other.pk).update(required_skills='Go, Rust')
+        index = sync_job_index(wait=True)
+        self.assertGreater(index.change_id, entry_id)
+        self.assertIsNotNone(index.position(late.id))
+
+        # The open transaction commits
+        QuerySet.update(Job.objects.filter(pk=late.pk), is_active=False)
+        JobChange.objects.create(id=entry_id, job_id=late.id)
+        index = sync_job_index(wait=True)
+        self.assertIsNone(index.position(late.id))
+        # Applied once only
+        self.assertIs(sync_job_index(wait=True), index)
+
+
+class ShardedScoringTests(JobsTestCase):
+    """
+    Sharded scoring ranks like exact scoring.
+    """
+
+    def test_matches_exact_scoring(self):
+        index = get_job_index()
+        # The edited job moves to the overlay, its fitted row is tombstoned
+        updated = index.apply_updates({self.jobs[1].id: 'React, Docker'})
+        with ShardedScorer(n_workers=2, n_shards=3) as scorer:
+            scorer.publish(index)
+            self.assertTrue(scorer.is_published(updated))
+            for candidate in (index, updated):
+                for query in QUERIES:
+                    with self.subTest(version=candidate.version, query=query):
+                        job_ids, scores = scorer.rank(candidate, query, 3)
+                        # Sharded results keep zero scores; exact ones drop them
+                        ranked = [
+                            (job_id, score) for job_id, score in zip(job_ids.tolist(), scores.tolist())
+                            if score > 0
+                        ]
+                        self.assertSameRanking(ranked, JobRecommender(candidate).rank_jobs(query, 3))
+
+
+class IndexStoreTests(JobsTestCase):
+    """
+    The memory-mapped index store and its generations.
+    """
+
+    def test_round_trip(self):
+        index = get_job_index()
+        with tempfile.TemporaryDirectory() as directory:
+            generation = store.save_index(index, directory)
+            self.assertEqual(store.current_generation(directory), generation)
+            loaded = store.load_index(directory)
+
+            self.assertEqual(loaded.generation, generation)
+            self.assertEqual(loaded.version, index.version)
+            self.assertEqual(loaded.fit_version, index.fit_version)
+            np.testing.assert_array_equal(loaded.job_ids, index.job_ids)
+            self.assertEqual((loaded.base_matrix != index.base_matrix).nnz, 0)
+            mapped = loaded.base_matrix.data
+            while mapped is not None and not isinstance(mapped, np.memmap):
+                mapped = mapped.base
+            self.assertIsInstance(mapped, np.memmap)
+            for query in QUERIES:
+                with self.subTest(query=query):
+                    self.assertSameRanking(
+                        JobRecommender(loaded).rank_jobs(query, 3),
+                        JobRecommender(index).rank_jobs(query, 3),
+                    )
+            del loaded
+
+    def test_generation_swap(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(RECOMMENDER_INDEX_DIR=directory):
+            first = load_job_index()
+            QuerySet.update(Job.objects.filter(pk=self.jobs[3].pk), is_active=False)
+            # A re-fit elsewhere publishes the next generation
+            second = publish_job_index(build_job_index())
+            self.assertNotEqual(second.generation, first.generation)
+
+            index = sync_job_index(wait=True)
+            self.assertEqual(index.generation, second.generation)
+            self.assertIsNone(index.position(self.jobs[3].id))
+            self.assertIsNotNone(first.position(self.jobs[3].id))
+
+            # Older generations are pruned; an identical build gets a new one
+            third = publish_job_index(build_job_index())
+            self.assertNotEqual(third.generation, second.generation)
+            generations = sorted(entry.name for entry in os.scandir(directory) if entry.is_dir())
+            self.assertEqual(generations, sorted([second.generation, third.generation]))
+
+
+class ResultCacheTests(JobsTestCase):
+    """
+    Ranked results are cached per job index version.
+    """
+
+    def test_keys_and_eviction(self):
+        cache = RecommendationCache(max_entries=2)
+        key = cache.make_key('Python, Django', 'v1', 5)
+        self.assertEqual(cache.make_key('  python,django ', 'v1', 5), key)
+        self.assertNotEqual(cache.make_key('Python, Django', 'v2', 5), key)
+        self.assertNotEqual(cache.make_key('Python, Django', 'v1', 10), key)
+
+        cache.set(key, 'v1', [(1, 0.5)])
+        self.assertEqual(cache.get(key, 'v1'), [(1, 0.5)])
+        for skills in ('React', 'CSS'):
+            cache.set(cache.make_key(skills, 'v1', 5), 'v1', [])
+        # The least recently used entry went first
+        self.assertIsNone(cache.get(key, 'v1'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_new_index_version_invalidates(self):
+        cache = RecommendationCache()
+        key = cache.make_key('Python, Django', 'v1', 5)
+        cache.set(key, 'v1', [(1, 0.5)])
+        self.assertIsNone(cache.get(key, 'v2'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    @override_settings(RECOMMENDER_RESULT_CACHE='local')
+    def test_rankings_follow_job_edits(self):
+        cache = get_result_cache()
+        cache.clear()
+        recommender = JobRecommender()
+        before = recommender.rank_jobs('Docker, Kubernetes, AWS', 3)
+        self.assertEqual(recommender.rank_jobs('Docker, Kubernetes, AWS', 3), before)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+        self.jobs[3].delete()
+        sync_job_index(wait=True)
+        after = JobRecommender().rank_jobs('Docker, Kubernetes, AWS', 3)
+        self.assertNotIn(self.jobs[3].id, [job_id for job_id, _ in after])
+        self.assertEqual(cache.stats()['misses'], 2)
+
+
+class ApproximateRetrievalTests(JobsTestCase):
+    """
+    IVF retrieval ranks like exact scoring when it visits enough clusters.
+    """
+
+    @override_settings(RECOMMENDER_RETRIEVAL='ann', RECOMMENDER_ANN_N_LISTS=2)
+    def test_matches_exact_scoring(self):
+        # Fitted with the IVF index, which survives incremental updates
+        index = load_job_index().apply_updates({self.jobs[1].id: 'React, Docker'})
+        self.assertIsNotNone(index.ivf)
+        for query in QUERIES:
+            with override_settings(RECOMMENDER_RETRIEVAL='exact'):
+                expected = JobRecommender(index).rank_jobs(query, 3)
+            with self.subTest(query=query):
+                self.assertSameRanking(JobRecommender(index).rank_jobs(query, 3), expected)
+
+    def test_recall(self):
+        index = get_job_index()
+        ivf = IVFIndex.build(index.base_matrix, n_components=4, n_lists=3)
+        for query in QUERIES:
+            expected = JobRecommender(index).rank_jobs(query, 3)
+            with self.subTest(query=query):
+                # Every cluster: the exact top N
+                positions, scores = rank_approximate(index, ivf, query, 3, n_probe=3)
+                ranked = zip(index.job_ids[positions].tolist(), scores.tolist())
+                self.assertSameRanking([(job_id, score) for job_id, score in ranked if score > 0], expected)
+                # One cluster: fewer candidates, still scored exactly
+                positions, scores = rank_approximate(index, ivf, query, 3, n_probe=1)
+                exact = dict(JobRecommender(index).rank_jobs(query, len(JOBS)))
+                for job_id, score in zip(index.job_ids[positions].tolist(), scores.tolist()):
+                    self.assertAlmostEqual(score, exact.get(job_id, 0.0), places=6)
+
+
+class InvertedRetrievalTests(JobsTestCase):
+    """
+    Inverted retrieval ranks exactly like scoring every job.
+    """
+
+    @override_settings(RECOMMENDER_RETRIEVAL='inverted')
+    def test_matches_exact_scoring(self):
+        index = load_job_index()
+        with tempfile.TemporaryDirectory() as directory:
+            store.save_index(index, directory)
+            # The postings are fitted with the index and stored with it
+            loaded = store.load_index(directory)
+            self.assertIsNotNone(loaded.inverted)
+            updated = loaded.apply_updates({self.jobs[1].id: 'React, Docker'})
+            for query in QUERIES:
+                with override_settings(RECOMMENDER_RETRIEVAL='exact'):
+                    expected = JobRecommender(updated).rank_jobs(query, 3)
+                with self.subTest(query=query):
+                    self.assertSameRanking(JobRecommender(updated).rank_jobs(query, 3), expected)
+            del loaded, updated
+
+
+class SingleFlightTests(JobsTestCase):
+    """
+    Concurrent identical computations run once.
+    """
+
+    def run_concurrently(self, flights, key, func, callers):
+        results = [None] * callers
+
+        def call(number):
+            try:
+                results[number] = flights.do(key, func)
+            except Exception as e:
+                results[number] = e
+
+        threads = [threading.Thread(target=call, args=(number,)) for number in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def wait_for_followers(self, flights, followers):
+        deadline = time.monotonic() + 10
+        while flights.stats()['followers'] < followers:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_followers_share_the_result(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def rank():
+            calls.append(1)
+            release.wait(10)
+            return JobRecommender().rank_jobs('Python, Django', 3)
+
+        threads, results = self.run_concurrently(flights, 'python', rank, 4)
+        self.wait_for_followers(flights, 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertSameRanking(results[0], JobRecommender().rank_jobs('Python, Django', 3))
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flights.stats(), {'leaders': 1, 'followers': 3, 'in_flight': 0})
+
+    def test_followers_get_the_error(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(10)
+            raise ValueError('scoring failed')
+
+        threads, results = self.run_concurrently(flights, 'python', fail, 3)
+        self.wait_for_followers(flights, 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+
+class SimilarJobsTests(JobsTestCase):
+    """
+    Stored neighbour lists match brute-force similarities, before and
+    after job changes.
+    """
+
+    def assertListsMatchIndex(self, index):
+        matrix = index.job_matrix.toarray()
+        similarities = matrix @ matrix.T
+        stored = {}
+        for job_id, similar_id, score in SimilarJob.objects.order_by('job', 'rank').values_list(
+                'job_id', 'similar_id', 'similarity_score'):
+            stored.setdefault(job_id, []).append((similar_id, score))
+
+        live = [position for position, job_id in enumerate(index.job_ids) if job_id != JobIndex.TOMBSTONE]
+        self.assertLessEqual(set(stored), {int(index.job_ids[position]) for position in live})
+        for position in live:
+            expected = {
+                int(index.job_ids[other]): similarities[position, other]
+                for other in live if other != position and similarities[position, other] > 0
+            }
+            # Jobs sharing no skill with any other have an empty list
+            neighbours = stored.get(int(index.job_ids[position]), [])
+            with self.subTest(job=int(index.job_ids[position])):
+                self.assertEqual(len(neighbours), min(len(expected), 6))
+                scores = [score for _, score in neighbours]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                for similar_id, score in neighbours:
+                    self.assertAlmostEqual(score, expected[similar_id], places=6)
+
+    def test_rebuild(self):
+        self.assertEqual(rebuild_similar_jobs(), len(JOBS))
+        self.assertListsMatchIndex(get_job_index())
+        # Full Stack Developer shares Python and Django
+        self.assertEqual(
+            SimilarJob.objects.get(job=self.jobs[0], rank=1).similar_id, self.jobs[4].id
+        )
+
+    def test_refresh_after_changes(self):
+        rebuild_similar_jobs()
+        edited, deactivated = self.jobs[4], self.jobs[0]
+        edited.required_skills = 'Docker, Kubernetes'
+        edited.save()
+        deactivated.is_active = False
+        deactivated.save()
+
+        index = sync_job_index(wait=True)
+        refresh_similar_jobs([edited.id, deactivated.id])
+        self.assertListsMatchIndex(index)
+        self.assertFalse(SimilarJob.objects.filter(similar=deactivated).exists())
+
+
+class JobAlertTests(JobsTestCase):
+    """
+    New jobs are matched against the profiles once.
+    """
+
+    def test_match_new_jobs(self):
+        bob = User.objects.create_user('bob', password='secret')
+        UserProfile.objects.update_or_create(user=bob, defaults={'skills': 'Docker, AWS'})
+        matching = Job.objects.create(title='Django Developer', required_skills='Python, Django')
+        other = Job.objects.create(title='Cloud Engineer', required_skills='Docker, Kubernetes, AWS')
+        sync_job_index(wait=True)
+        self.assertEqual(set(pending_alert_jobs()), {job.id for job in self.jobs} | {matching.id, other.id})
+
+        self.assertEqual(match_new_jobs([matching.id, other.id]), 2)
+        alerts = {
+            (alert.profile.user.username, alert.job_id): alert.similarity_score
+            for alert in JobAlert.objects.select_related('profile__user')
+        }
+        self.assertEqual(set(alerts), {('alice', matching.id), ('bob', other.id)})
+        expected = dict(JobRecommender().rank_jobs('Python, Django', len(JOBS) + 2))
+        self.assertAlmostEqual(alerts['alice', matching.id], expected[matching.id], places=5)
+        self.assertNotIn(matching.id, set(pending_alert_jobs()))
+
+        # Matching again records nothing new
+        self.assertEqual(match_new_jobs([matching.id]), 0)
+        self.assertEqual(JobAlert.objects.count(), 2)
+
+    @override_settings(RECOMMENDER_JOB_ALERT_THRESHOLD=0.99)
+    def test_threshold(self):
+        job = Job.objects.create(title='Django Developer', required_skills='Python, Django, React')
+        self.assertEqual(match_new_jobs([job.id]), 0)
+        self.assertIsNotNone(Job.objects.get(pk=job.pk).alerts_matched_at)
+
+
+class KeysetPaginationTests(JobsTestCase):
+    """
+    Keyset pages neither skip nor repeat rows while jobs are posted.
+    """
+
+    def test_pages_across_inserts(self):
+        jobs = Job.objects.filter(is_active=True)
+        expected = list(jobs.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        first = keyset_page(jobs, None, 2)
+        self.assertEqual([job.id for job in first], expected[:2])
+        self.assertFalse(first.has_previous())
+        # Posted while the first page is read
+        posted = Job.objects.create(title='ML Engineer', required_skills='Python, Machine Learning')
+
+        seen = [job.id for job in first]
+        page = first
+        while page.has_next():
+            page = keyset_page(jobs, page.next_cursor, 2)
+            seen.extend(job.id for job in page)
+        self.assertEqual(seen, expected)
+
+        # Going back from the second page shows the first one again...
+        second = keyset_page(jobs, first.next_cursor, 2)
+        back = keyset_page(jobs, second.previous_cursor, 2)
+        self.assertEqual([job.id for job in back], expected[:2])
+        # ...with the job posted meanwhile above it
+        self.assertTrue(back.has_previous())
+        self.assertEqual([job.id for job in keyset_page(jobs, back.previous_cursor, 2)], [posted.id])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Job.objects.all(), 'not-a-cursor')
+        response = self.client.get(reverse('jobs:job_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
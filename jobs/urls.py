@@ -9,4 +9,10 @@ urlpatterns = [
     path('jobs/', views.job_list_view, name='job_list'),
     path('jobs/<int:job_id>/', views.job_detail_view, name='job_detail'),
     path('recommendations/', views.recommend_jobs_view, name='recommendations'),
+    path('api/recommendations/', views.recommendations_api_view, name='api_recommendations'),
+    path('api/jobs/', views.jobs_api_view, name='api_jobs'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    # Async variants for ASGI deployments
+    path('async/recommendations/', views.recommend_jobs_async_view, name='recommendations_async'),
+    path('async/api/recommendations/', views.recommendations_api_async_view, name='api_recommendations_async'),
 ]
@@ -1,17 +1,32 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.core import signing
 from django.core.paginator import Paginator
-from .models import Job
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from datetime import timedelta
+import hmac
+import json
+from .models import CatalogCounter, Job, MaterializedRecommendation, SimilarJob
 from accounts.models import UserProfile
+from .pagination import InvalidCursor, approximate_count, keyset_page
+from .search import job_facets, search_jobs
+from ml_engine.aio import rank_jobs_async
+from ml_engine.conf import get_setting
+from ml_engine.metrics import render_prometheus, span
 from ml_engine.recommender import JobRecommender
+from ml_engine.singleflight import rank_jobs_shared
 
 
 def home_view(request):
     """
     Landing page view.
     """
-    jobs_count = Job.objects.filter(is_active=True).count()
+    jobs_count = CatalogCounter.active_jobs()
     context = {
         'jobs_count': jobs_count,
     }
@@ -36,7 +51,7 @@ def dashboard_view(request):
     context = {
         'profile': profile,
         'recent_jobs': recent_jobs,
-        'total_jobs': Job.objects.filter(is_active=True).count(),
+        'total_jobs': CatalogCounter.active_jobs(),
     }
     return render(request, 'jobs/dashboard.html', context)
 
@@ -44,18 +59,61 @@ def dashboard_view(request):
 @login_required
 def job_list_view(request):
     """
-    Display all active jobs with pagination.
+    Display active jobs with pagination, keyword search and
+    location/company filters.
     """
+    query = request.GET.get('q', '').strip()
+    location = request.GET.get('location', '').strip()
+    company = request.GET.get('company', '').strip()
+    
     jobs = Job.objects.filter(is_active=True).order_by('-created_at')
+    if location:
+        jobs = jobs.filter(location=location)
+    if company:
+        jobs = jobs.filter(company=company)
+    if query:
+        # Full-text index lookup, best match first (see jobs/search.py)
+        jobs = search_jobs(jobs, query)
+    
+    with span('facets'):
+        facets = job_facets(jobs)
     
     # Pagination
-    paginator = Paginator(jobs, 10)  # Show 10 jobs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    keyset = not query and get_setting('JOB_LIST_PAGINATION') == 'keyset'
+    if keyset:
+        # Seek past the previous page instead of OFFSET (see jobs/pagination.py)
+        try:
+            page_obj = keyset_page(jobs, request.GET.get('cursor'), 10)
+        except InvalidCursor:
+            page_obj = keyset_page(jobs, None, 10)
+        if not (location or company):
+            total_jobs = CatalogCounter.active_jobs()
+        elif get_setting('JOB_LIST_TOTAL'):
+            total_jobs = approximate_count(jobs)
+        else:
+            total_jobs = None
+    else:
+        paginator = Paginator(jobs, 10)  # Show 10 jobs per page
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+        # Counted once by the paginator
+        total_jobs = paginator.count
+    
+    # Current search, repeated in the pagination links
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
     
     context = {
         'page_obj': page_obj,
-        'total_jobs': jobs.count(),
+        'keyset': keyset,
+        'total_jobs': total_jobs,
+        'query': query,
+        'location': location,
+        'company': company,
+        'location_facets': facets['location'],
+        'company_facets': facets['company'],
+        'search_params': params.urlencode(),
     }
     return render(request, 'jobs/job_list.html', context)
 
@@ -67,12 +125,79 @@ def job_detail_view(request, job_id):
     """
     job = get_object_or_404(Job, id=job_id, is_active=True)
     
+    # Precomputed neighbours (jobs/similar.py): one read, no scoring
+    with span('similar_jobs'):
+        similar_jobs = list(
+            SimilarJob.objects
+            .filter(job=job, similar__is_active=True)
+            .select_related('similar')
+            .only('rank', 'similarity_score', 'similar__title', 'similar__company', 'similar__location')
+            .order_by('rank')
+        )
+    
     context = {
         'job': job,
+        'similar_jobs': similar_jobs,
     }
     return render(request, 'jobs/job_detail.html', context)
 
 
+def materialized_recommendations_queryset(profile):
+    """
+    Precomputed recommendations of a profile, with the fields rendered on cards.
+    """
+    return (
+        MaterializedRecommendation.objects
+        .filter(profile=profile, job__is_active=True)
+        .select_related('job')
+        .only('similarity_score', 'confidence', 'computed_at',
+              *(f'job__{field}' for field in JobRecommender.CARD_FIELDS))
+        .order_by('rank')
+    )
+
+
+def format_materialized_recommendations(profile, rows):
+    """
+    Turn fresh materialized rows into recommendation dictionaries, or return None.
+    """
+    if not rows:
+        return None
+    
+    computed_at = rows[0].computed_at
+    max_age = timedelta(seconds=get_setting('MATERIALIZED_MAX_AGE'))
+    if computed_at < profile.updated_at or computed_at < timezone.now() - max_age:
+        return None
+    
+    return [
+        {
+            'job': row.job,
+            'similarity_score': row.similarity_score,
+            'match_percentage': int(row.similarity_score * 100),
+            'confidence': row.confidence,
+        }
+        for row in rows
+    ]
+
+
+def get_materialized_recommendations(profile):
+    """
+    Load precomputed recommendations for a profile with one indexed query.
+    
+    Returns None when there are none, or when they are older than the
+    profile's last update or RECOMMENDER_MATERIALIZED_MAX_AGE.
+    """
+    rows = list(materialized_recommendations_queryset(profile))
+    return format_materialized_recommendations(profile, rows)
+
+
+async def aget_materialized_recommendations(profile):
+    """
+    Async get_materialized_recommendations().
+    """
+    rows = [row async for row in materialized_recommendations_queryset(profile)]
+    return format_materialized_recommendations(profile, rows)
+
+
 @login_required
 def recommend_jobs_view(request):
     """
@@ -89,21 +214,29 @@ def recommend_jobs_view(request):
         messages.warning(request, 'Please add your skills in your profile to get recommendations.')
         return redirect('accounts:profile')
     
-    # Get all active jobs
-    all_jobs = Job.objects.filter(is_active=True)
+    recommender = JobRecommender()
     
-    if not all_jobs.exists():
-        messages.info(request, 'No jobs available at the moment. Please check back later.')
-        return redirect('jobs:dashboard')
+    # Serve precomputed recommendations when they are fresh
+    with span('materialized'):
+        recommendations = get_materialized_recommendations(profile)
     
-    # Initialize recommender and get recommendations
-    recommender = JobRecommender()
-    recommendations = recommender.get_recommendations(profile.skills, all_jobs)
+    if recommendations is None:
+        # Get all active jobs
+        all_jobs = Job.objects.filter(is_active=True)
+        
+        with span('catalog_check'):
+            has_jobs = all_jobs.exists()
+        if not has_jobs:
+            messages.info(request, 'No jobs available at the moment. Please check back later.')
+            return redirect('jobs:dashboard')
+        
+        # Get recommendations; only jobs with a score > 0 are returned
+        recommendations = recommender.get_recommendations(profile.skills, all_jobs)
     
-    # Filter recommendations with score > 0
-    filtered_recommendations = [rec for rec in recommendations if rec['similarity_score'] > 0]
+    # Matching and missing skills of every card in one pass
+    recommender.explain_recommendations(profile.skill_ids, recommendations)
     
-    if not filtered_recommendations:
+    if not recommendations:
         messages.info(request, 'No matching jobs found for your skills. Try updating your skills or browse all jobs.')
         context = {
             'recommendations': [],
@@ -112,9 +245,389 @@ def recommend_jobs_view(request):
         }
     else:
         context = {
-            'recommendations': filtered_recommendations,
+            'recommendations': recommendations,
             'user_skills': profile.get_skills_list(),
             'no_matches': False,
         }
     
-    return render(request, 'jobs/recommendations.html', context)
+    with span('render'):
+        return render(request, 'jobs/recommendations.html', context)
+
+
+# Job fields that API clients may request with ?fields=
+API_JOB_FIELDS = ('title', 'company', 'location', 'salary_range', 'required_skills', 'description')
+
+# Jobs hydrated per query when streaming NDJSON
+API_STREAM_BATCH_SIZE = 200
+
+
+class APIError(Exception):
+    """
+    Invalid API request; rendered as a JSON error response.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_api_fields(request):
+    """
+    Read the job fields requested with ?fields=title,company.
+    """
+    fields = [field.strip() for field in request.GET.get('fields', '').split(',') if field.strip()]
+    unknown = sorted(set(fields).difference(API_JOB_FIELDS))
+    if unknown:
+        raise APIError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(API_JOB_FIELDS)}")
+    return list(dict.fromkeys(fields))
+
+
+def parse_api_limit(request):
+    """
+    Read ?limit=, capped at RECOMMENDER_API_MAX_PAGE_SIZE.
+    """
+    try:
+        limit = int(request.GET.get('limit', get_setting('API_PAGE_SIZE')))
+    except ValueError:
+        raise APIError('limit must be an integer')
+    if limit < 1:
+        raise APIError('limit must be positive')
+    return min(limit, get_setting('API_MAX_PAGE_SIZE'))
+
+
+def parse_api_page(request, fit_version):
+    """
+    Read ?limit= and the opaque ?cursor= of the previous page.
+    
+    Cursors are signed and bound to the fit of the job index they were
+    issued for (JobIndex.fit_version), which every worker shares and job
+    edits leave alone; only a re-fit, which can reorder the whole ranking,
+    expires them. Jobs edited between two pages may still move across the
+    page boundary.
+    """
+    limit = parse_api_limit(request)
+    
+    offset = 0
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor_version, offset = signing.loads(cursor, salt='jobs.api.recommendations')
+        except (signing.BadSignature, ValueError, TypeError):
+            raise APIError('Invalid cursor')
+        if cursor_version != fit_version:
+            raise APIError('Cursor expired; the job index has changed. Restart from the first page.', status=410)
+    return offset, limit
+
+
+def api_jobs_queryset(fields):
+    """
+    Active jobs with only the requested API fields loaded.
+    """
+    return Job.objects.filter(is_active=True).only('id', *fields)
+
+
+def serialize_recommendations(recommender, ranked, fields, start_rank=1, jobs=None):
+    """
+    Turn (job_id, score) pairs into API results, loading only the requested fields.
+    
+    ``jobs`` (job_id -> Job) may be passed when already loaded.
+    """
+    if fields and jobs is None:
+        jobs = api_jobs_queryset(fields).in_bulk([job_id for job_id, _ in ranked])
+    
+    results = []
+    for rank, (job_id, score) in enumerate(ranked, start=start_rank):
+        result = {
+            'rank': rank,
+            'id': job_id,
+            'score': round(score, 6),
+            'match_percentage': recommender.calculate_match_percentage(score),
+            'confidence': recommender._get_confidence_level(score),
+        }
+        if fields:
+            job = jobs.get(job_id)
+            if job is None:
+                # Deactivated since indexing
+                continue
+            result['job'] = {field: getattr(job, field) for field in fields}
+        results.append(result)
+    return results
+
+
+def stream_recommendations(recommender, ranked, fields):
+    """
+    Yield NDJSON lines, hydrating jobs in batches.
+    """
+    for start in range(0, len(ranked), API_STREAM_BATCH_SIZE):
+        batch = ranked[start:start + API_STREAM_BATCH_SIZE]
+        for result in serialize_recommendations(recommender, batch, fields, start_rank=start + 1):
+            yield json.dumps(result) + '\n'
+
+
+def recommendations_api_view(request):
+    """
+    Ranked job recommendations of the logged-in user as JSON.
+    
+    Query parameters:
+        limit: results per page (RECOMMENDER_API_PAGE_SIZE by default)
+        cursor: next_cursor of the previous page
+        fields: comma-separated job fields to include (see API_JOB_FIELDS);
+            by default only ids, scores and confidence are returned
+        format: 'ndjson' streams every result, one JSON object per line
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    try:
+        profile = request.user.profile
+    except UserProfile.DoesNotExist:
+        profile = None
+    if profile is None or not profile.skills or not profile.skills.strip():
+        return JsonResponse({'error': 'Add skills to your profile to get recommendations'}, status=409)
+    
+    recommender = JobRecommender()
+    index = recommender.get_index()
+    version = index.version
+    max_results = get_setting('API_MAX_RESULTS')
+    
+    try:
+        fields = parse_api_fields(request)
+        
+        if request.GET.get('format') == 'ndjson':
+            ranked = rank_jobs_shared(recommender, profile.skills, max_results)
+            response = StreamingHttpResponse(
+                stream_recommendations(recommender, ranked, fields),
+                content_type='application/x-ndjson',
+            )
+            response['X-Index-Version'] = version
+            return response
+        
+        offset, limit = parse_api_page(request, index.fit_version)
+    except APIError as e:
+        return JsonResponse({'error': e.message}, status=e.status)
+    
+    # Rank one extra job to know whether there is a next page
+    end = min(offset + limit, max_results)
+    ranked = []
+    if offset < end:
+        ranked = rank_jobs_shared(recommender, profile.skills, min(end + 1, max_results))
+    page = ranked[offset:end]
+    
+    next_cursor = None
+    if len(ranked) > end:
+        next_cursor = signing.dumps([index.fit_version, end], salt='jobs.api.recommendations')
+    
+    return JsonResponse({
+        'index_version': version,
+        'results': serialize_recommendations(recommender, page, fields, start_rank=offset + 1),
+        'next_cursor': next_cursor,
+    })
+
+
+def jobs_api_view(request):
+    """
+    Active jobs as JSON, newest first, with keyset pagination.
+    
+    Query parameters:
+        limit: results per page (RECOMMENDER_API_PAGE_SIZE by default)
+        cursor: next_cursor or previous_cursor of another page
+        fields: comma-separated job fields to include (see API_JOB_FIELDS);
+            title, company and location by default
+        location, company: exact filters
+        total: '1' adds an approximate total, cached for
+            RECOMMENDER_LIST_COUNT_TTL seconds
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    try:
+        fields = parse_api_fields(request) or ['title', 'company', 'location']
+        limit = parse_api_limit(request)
+        jobs = api_jobs_queryset(fields + ['created_at'])
+        for field in ('location', 'company'):
+            if request.GET.get(field):
+                jobs = jobs.filter(**{field: request.GET[field]})
+        try:
+            page = keyset_page(jobs, request.GET.get('cursor'), limit)
+        except InvalidCursor as e:
+            raise APIError(str(e))
+    except APIError as e:
+        return JsonResponse({'error': e.message}, status=e.status)
+    
+    data = {
+        'results': [
+            {'id': job.id, 'created_at': job.created_at.isoformat(),
+             **{field: getattr(job, field) for field in fields}}
+            for job in page
+        ],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    }
+    if request.GET.get('total') == '1':
+        data['total'] = approximate_count(jobs)
+    return JsonResponse(data)
+
+
+async def get_request_user(request):
+    """
+    Resolve request.user off the event loop; it is loaded from the session lazily.
+    """
+    def load_user():
+        request.user.is_authenticated
+        return request.user
+    return await sync_to_async(load_user)()
+
+
+async def recommend_jobs_async_view(request):
+    """
+    Async recommend_jobs_view for ASGI deployments.
+    
+    Lookups use the async ORM and scoring runs on the bounded scoring
+    executor, coalesced with identical concurrent queries, so the event loop
+    keeps serving other requests meanwhile.
+    """
+    user = await get_request_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    
+    profile = await UserProfile.objects.filter(user_id=user.id).afirst()
+    if profile is None:
+        messages.error(request, 'Please update your profile with skills first.')
+        return redirect('accounts:profile')
+    
+    # Check if user has skills
+    if not profile.skills or not profile.skills.strip():
+        messages.warning(request, 'Please add your skills in your profile to get recommendations.')
+        return redirect('accounts:profile')
+    
+    recommender = JobRecommender()
+    
+    # Serve precomputed recommendations when they are fresh
+    with span('materialized'):
+        recommendations = await aget_materialized_recommendations(profile)
+    
+    if recommendations is None:
+        all_jobs = Job.objects.filter(is_active=True)
+        
+        with span('catalog_check'):
+            has_jobs = await all_jobs.aexists()
+        if not has_jobs:
+            messages.info(request, 'No jobs available at the moment. Please check back later.')
+            return redirect('jobs:dashboard')
+        
+        recommendations = await recommender.aget_recommendations(profile.skills, all_jobs)
+    
+    # Skill names may need one lookup
+    await sync_to_async(recommender.explain_recommendations)(profile.skill_ids, recommendations)
+    
+    if not recommendations:
+        messages.info(request, 'No matching jobs found for your skills. Try updating your skills or browse all jobs.')
+    context = {
+        'recommendations': recommendations,
+        'user_skills': profile.get_skills_list(),
+        'no_matches': not recommendations,
+    }
+    with span('render'):
+        return await sync_to_async(render)(request, 'jobs/recommendations.html', context)
+
+
+async def astream_recommendations(recommender, ranked, fields):
+    """
+    Async stream_recommendations(), hydrating jobs with the async ORM.
+    """
+    for start in range(0, len(ranked), API_STREAM_BATCH_SIZE):
+        batch = ranked[start:start + API_STREAM_BATCH_SIZE]
+        jobs = None
+        if fields:
+            jobs = await api_jobs_queryset(fields).ain_bulk([job_id for job_id, _ in batch])
+        for result in serialize_recommendations(recommender, batch, fields, start + 1, jobs):
+            yield json.dumps(result) + '\n'
+
+
+async def recommendations_api_async_view(request):
+    """
+    Async recommendations_api_view for ASGI deployments; same parameters.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    user = await get_request_user(request)
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    
+    profile = await UserProfile.objects.filter(user_id=user.id).afirst()
+    if profile is None or not profile.skills or not profile.skills.strip():
+        return JsonResponse({'error': 'Add skills to your profile to get recommendations'}, status=409)
+    
+    recommender = JobRecommender()
+    # Loading the index may read the jobs table
+    index = await sync_to_async(recommender.get_index)()
+    version = index.version
+    max_results = get_setting('API_MAX_RESULTS')
+    
+    try:
+        fields = parse_api_fields(request)
+        
+        if request.GET.get('format') == 'ndjson':
+            ranked = await rank_jobs_async(recommender, profile.skills, max_results)
+            response = StreamingHttpResponse(
+                astream_recommendations(recommender, ranked, fields),
+                content_type='application/x-ndjson',
+            )
+            response['X-Index-Version'] = version
+            return response
+        
+        offset, limit = parse_api_page(request, index.fit_version)
+    except APIError as e:
+        return JsonResponse({'error': e.message}, status=e.status)
+    
+    end = min(offset + limit, max_results)
+    ranked = []
+    if offset < end:
+        ranked = await rank_jobs_async(recommender, profile.skills, min(end + 1, max_results))
+    page = ranked[offset:end]
+    
+    next_cursor = None
+    if len(ranked) > end:
+        next_cursor = signing.dumps([index.fit_version, end], salt='jobs.api.recommendations')
+    
+    jobs = None
+    if fields:
+        jobs = await api_jobs_queryset(fields).ain_bulk([job_id for job_id, _ in page])
+    
+    return JsonResponse({
+        'index_version': version,
+        'results': serialize_recommendations(recommender, page, fields, offset + 1, jobs),
+        'next_cursor': next_cursor,
+    })
+
+
+def metrics_allowed(request):
+    """
+    Whether a request may read the metrics endpoint.
+    """
+    token = get_setting('METRICS_TOKEN')
+    if token:
+        expected = f'Bearer {token}'
+        if hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode()):
+            return True
+    if request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS:
+        return True
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    """
+    Recommendation pipeline metrics of this worker in the Prometheus text format.
+    
+    Served only to scrapers presenting RECOMMENDER_METRICS_TOKEN as a bearer
+    token, to clients listed in INTERNAL_IPS, and to staff users. Behind a
+    reverse proxy REMOTE_ADDR is the proxy's, so use the token there.
+    """
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
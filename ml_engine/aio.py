@@ -0,0 +1,98 @@
+"""
+Async Scoring
+
+Scoring is CPU-bound and would block the event loop of an ASGI worker, so
+async views run it on a bounded thread pool (RECOMMENDER_ASYNC_SCORING_THREADS).
+numpy and scipy release the GIL in the heavy parts; with
+RECOMMENDER_SCORING_WORKERS > 1 the threads only wait on the sharded process
+pool (see ml_engine/parallel.py).
+
+Concurrent identical queries against the same job index on one event loop
+are coalesced: the first starts the computation and the others await the
+same future. Across event
+loops and threads the executor goes through the single-flight layer (see
+ml_engine/singleflight.py).
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from .cache import skills_key
+from .conf import get_setting
+from .singleflight import rank_jobs_shared
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# (event loop, 'rank_jobs', normalized skills, top_n, job index id) -> in-flight asyncio.Future
+_in_flight = {}
+
+
+def get_scoring_executor():
+    """
+    Return the process-wide executor for async scoring.
+
+    Returns:
+        ThreadPoolExecutor: Pool of RECOMMENDER_ASYNC_SCORING_THREADS threads
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_setting('ASYNC_SCORING_THREADS'),
+                    thread_name_prefix='scoring',
+                )
+    return _executor
+
+
+async def run_coalesced(key, func, *args):
+    """
+    Run ``func(*args)`` on the scoring executor, sharing the result with
+    concurrent callers that use the same key.
+
+    Args:
+        key (tuple): Identity of the computation
+        func (callable): Blocking function
+        *args: Its arguments
+
+    Returns:
+        The result of ``func``
+    """
+    loop = asyncio.get_running_loop()
+    key = (loop, *key)
+    future = _in_flight.get(key)
+    if future is None:
+        # Run in the leader's context, so its request trace gets the spans
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(get_scoring_executor(), context.run, func, *args)
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # A cancelled follower must not cancel the leader's computation
+    return await asyncio.shield(future)
+
+
+async def rank_jobs_async(recommender, user_skills, top_n=20):
+    """
+    Async JobRecommender.rank_jobs(), off the event loop and coalesced.
+
+    Args:
+        recommender (JobRecommender): Recommender to rank with
+        user_skills (str): User's skills as comma-separated text
+        top_n (int): Number of top jobs to return
+
+    Returns:
+        list: (job_id, similarity_score) pairs, best match first
+    """
+    index = recommender.index
+    if index is None:
+        # Loading the index may read the jobs table
+        index = await sync_to_async(recommender.get_index)()
+    # Never join a ranking of the index replaced by a swap or re-fit; the
+    # flight holds the index, so its id is not reused meanwhile
+    key = ('rank_jobs', skills_key(user_skills), top_n, id(index))
+    return await run_coalesced(key, rank_jobs_shared, recommender, user_skills, top_n)
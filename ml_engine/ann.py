@@ -0,0 +1,193 @@
+"""
+Approximate Nearest-Neighbour Retrieval
+
+For very large catalogs, scoring every job is wasteful when only the top few
+matter. The IVF (inverted file) index reduces the TF-IDF job vectors with
+TruncatedSVD, clusters them with spherical k-means, and files every job under
+its nearest centroid. A query only visits the ``n_probe`` clusters closest to
+the user; those candidates are then re-scored exactly on the TF-IDF matrix, so
+returned scores are exact and only recall is approximate.
+
+Knobs (RECOMMENDER_ANN_*): ``N_COMPONENTS`` (SVD dimensions), ``N_LISTS``
+(clusters, default ~sqrt(N)) and ``N_PROBE`` (clusters visited per query).
+Raising N_PROBE trades latency for recall.
+
+The IVF index is part of a fit: build_job_index() builds it next to the
+TF-IDF matrix (in the background re-fit or the build_job_index command) and
+the on-disk store saves it with the generation, so requests never build it.
+"""
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+from .conf import get_setting
+from .metrics import observe, span
+from .ranking import top_n
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class IVFIndex:
+    """
+    Cluster-partitioned candidate generator over a JobIndex.
+
+    Overlay rows appended to the JobIndex after the IVF build (incremental
+    upserts) are always returned as candidates, so the IVF stays valid until
+    the next re-fit of the job index.
+    """
+
+    def __init__(self, components, centroids, list_rows, list_offsets, n_rows):
+        # SVD projection: terms -> n_components
+        self.components = components
+        self.centroids = centroids
+        self.list_rows = list_rows
+        self.list_offsets = list_offsets
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, job_matrix, n_components=64, n_lists=None, n_iter=10,
+              sample_size=50000, chunk_size=16384, seed=0):
+        """
+        Build the IVF index of a job matrix.
+
+        Args:
+            job_matrix (scipy.sparse.csr_matrix): L2-normalized job vectors
+            n_components (int): SVD dimensions
+            n_lists (int): Number of clusters (defaults to ~sqrt of the rows)
+            n_iter (int): k-means iterations
+            sample_size (int): Rows used to train the centroids
+            chunk_size (int): Rows assigned per matrix product; bounds memory
+            seed (int): Random seed
+
+        Returns:
+            IVFIndex: Built index
+        """
+        n_rows, n_terms = job_matrix.shape
+        rng = np.random.default_rng(seed)
+        n_components = max(1, min(n_components, n_terms - 1))
+        n_lists = n_lists or int(np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        sample_rows = rng.choice(n_rows, size=min(sample_size, n_rows), replace=False)
+        svd.fit(job_matrix[sample_rows])
+        components = svd.components_.astype(np.float32)
+        sample = _normalize_rows(np.asarray(job_matrix[sample_rows] @ components.T))
+
+        # Spherical k-means on the sample
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize_rows(sums)
+
+        # File every job under its nearest centroid
+        assignments = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, chunk_size):
+            reduced = _normalize_rows(np.asarray(job_matrix[start:start + chunk_size] @ components.T))
+            assignments[start:start + chunk_size] = np.argmax(reduced @ centroids.T, axis=1)
+
+        list_rows = np.argsort(assignments, kind='stable').astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        return cls(components, centroids, list_rows, list_offsets, n_rows)
+
+    def candidates(self, user_vector, n_probe, n_rows=None):
+        """
+        Rows worth scoring exactly for a query.
+
+        Args:
+            user_vector (scipy.sparse.csr_matrix): 1 x terms TF-IDF vector
+            n_probe (int): Clusters to visit
+            n_rows (int): Current number of rows of the job index
+
+        Returns:
+            np.ndarray: Candidate row numbers
+        """
+        query = _normalize_rows(np.asarray(user_vector @ self.components.T, dtype=np.float32))[0]
+        similarities = self.centroids @ query
+        if n_probe < len(similarities):
+            probed = np.argpartition(-similarities, n_probe - 1)[:n_probe]
+        else:
+            probed = np.arange(len(similarities))
+
+        rows = [self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probed]
+        if n_rows is not None and n_rows > self.n_rows:
+            # Appended since the build
+            rows.append(np.arange(self.n_rows, n_rows))
+        return np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+
+def rank_approximate(index, ivf, user_skills, n, n_probe):
+    """
+    Rank jobs from IVF candidates, re-scored exactly.
+
+    Args:
+        index (JobIndex): Job index
+        ivf (IVFIndex): IVF index built over ``index``'s fit
+        user_skills (str): User's skills as comma-separated text
+        n (int): Number of top jobs to return
+        n_probe (int): Clusters to visit
+
+    Returns:
+        tuple: (positions, scores) in the job index, best first
+    """
+    with span('vectorize'):
+        user_vector = index.transform([user_skills])
+    with span('ann_candidates'):
+        rows = ivf.candidates(user_vector, n_probe, len(index))
+    observe('recommender_candidates', len(rows))
+    with span('similarity'):
+        scores = index.score_rows(rows, user_vector.toarray().ravel())
+    with span('top_n'):
+        winners, top_scores = top_n(scores, n)
+    return rows[winners], top_scores
+
+
+def build_ivf_index(index):
+    """
+    Build the IVF index of a freshly fitted job index, when enabled.
+
+    Args:
+        index (JobIndex): Job index
+
+    Returns:
+        IVFIndex or None: None unless RECOMMENDER_RETRIEVAL is 'ann' and the
+            index has enough terms and rows
+    """
+    if get_setting('RETRIEVAL') != 'ann' or index.n_terms < 2 or not index.n_fitted:
+        return None
+    return IVFIndex.build(
+        index.base_matrix,
+        n_components=get_setting('ANN_N_COMPONENTS'),
+        n_lists=get_setting('ANN_N_LISTS'),
+    )
+
+
+def get_ivf_index(index):
+    """
+    Return the IVF index built with ``index``'s fit.
+
+    Incremental updates keep the fitted rows, so the IVF survives them. An
+    index fitted or stored before ANN retrieval was enabled has none: it is
+    scored exactly and a re-fit is scheduled to build one.
+
+    Args:
+        index (JobIndex): Job index
+
+    Returns:
+        IVFIndex or None: None unless RECOMMENDER_RETRIEVAL is 'ann' and the
+            index has an IVF index
+    """
+    if get_setting('RETRIEVAL') != 'ann':
+        return None
+    if index.ivf is None and index.n_terms >= 2 and index.n_fitted:
+        from .index import schedule_refit
+        schedule_refit()
+    return index.ivf
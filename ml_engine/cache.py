@@ -0,0 +1,194 @@
+"""
+Recommendation Result Cache
+
+Caches ranked (job_id, similarity_score) lists keyed on the user's skills as
+the vectorizer sees them, the job index version and top_n. Any catalog change bumps the index
+version, so stale results are never served; they simply age out.
+
+Two stores are available (RECOMMENDER_RESULT_CACHE):
+- 'local': an in-process LRU with a TTL
+- any other value: the alias of a Django cache (locmem, file, ...)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from .conf import get_setting
+from .preprocessing import preprocess_skills
+
+
+def skills_key(user_skills):
+    """
+    The skills text a query is vectorized from, for keying its results.
+
+    TF-IDF counts repeated skills and pairs adjacent words into bigrams, so
+    only texts that preprocess to the same tokens in the same order share a
+    key; differences in case and spacing are ignored.
+
+    Args:
+        user_skills (str): Comma-separated skills
+
+    Returns:
+        str: Preprocessed skills with whitespace runs collapsed
+    """
+    return ' '.join(preprocess_skills(user_skills).split())
+
+
+class RecommendationCache:
+    """
+    LRU/TTL cache of ranked recommendations with hit and miss counters.
+    """
+
+    KEY_PREFIX = 'recommendations'
+
+    def __init__(self, max_entries=10000, ttl=300, backend='local'):
+        """
+        Args:
+            max_entries (int): Entries kept by the in-process store
+            ttl (int): Seconds an entry stays valid
+            backend (str): 'local', or the alias of a Django cache
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def make_key(self, user_skills, version, top_n):
+        """
+        Build the cache key of a query.
+
+        Args:
+            user_skills (str): User's skills as comma-separated text
+            version (str): Job index version
+            top_n (int): Number of results
+
+        Returns:
+            str: Cache key
+        """
+        digest = hashlib.sha1(skills_key(user_skills).encode('utf-8')).hexdigest()
+        return f'{self.KEY_PREFIX}:{version}:{top_n}:{digest}'
+
+    def get(self, key, version):
+        """
+        Look up a cached ranking.
+
+        Args:
+            key (str): Key from make_key()
+            version (str): Current job index version
+
+        Returns:
+            list or None: Cached (job_id, similarity_score) pairs
+        """
+        if self.backend == 'local':
+            value = self._get_local(key, version)
+        else:
+            value = self._django_cache().get(key)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, version, value):
+        """
+        Store a ranking.
+
+        Args:
+            key (str): Key from make_key()
+            version (str): Job index version the ranking was computed with
+            value (list): (job_id, similarity_score) pairs
+        """
+        if self.backend != 'local':
+            self._django_cache().set(key, value, self.ttl)
+            return
+
+        with self._lock:
+            self._invalidate_if_stale(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Counters for sizing the cache.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions and current entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+            }
+
+    def clear(self):
+        """Drop all in-process entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def _get_local(self, key, version):
+        with self._lock:
+            self._invalidate_if_stale(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _invalidate_if_stale(self, version):
+        # Entries of an older index version can never be hit again
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _django_cache(self):
+        from django.core.cache import caches
+        return caches[self.backend]
+
+
+# Cache shared by the requests of this process
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Return the process-wide result cache.
+
+    Returns:
+        RecommendationCache or None: None when RECOMMENDER_RESULT_CACHE is unset
+    """
+    global _result_cache
+    backend = get_setting('RESULT_CACHE')
+    if not backend:
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = RecommendationCache(
+                    max_entries=get_setting('RESULT_CACHE_SIZE'),
+                    ttl=get_setting('RESULT_CACHE_TTL'),
+                    backend=backend,
+                )
+    return _result_cache
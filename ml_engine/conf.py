@@ -0,0 +1,153 @@
+"""
+Settings for the recommendation engine.
+
+Every setting can be overridden in the Django settings module with a
+``RECOMMENDER_`` prefix (e.g. ``RECOMMENDER_REFIT_DRIFT = 0.1``). Outside a
+configured Django project (benchmarks, scripts) the defaults below apply.
+"""
+
+DEFAULTS = {
+    # Fraction of index rows changed since the last fit that triggers a
+    # background re-fit of the vocabulary
+    'REFIT_DRIFT': 0.2,
+    # Seconds after which the resident index is re-fitted in the background,
+    # re-learning the vocabulary
+    'INDEX_MAX_AGE': 900,
+    # Seconds for which precomputed recommendations are served before the
+    # view falls back to live scoring
+    'MATERIALIZED_MAX_AGE': 86400,
+    # Worker processes for sharded scoring (see ml_engine/parallel.py);
+    # 0 or 1 scores in the request thread
+    'SCORING_WORKERS': 0,
+    # Directory of the memory-mapped index store shared by all workers (see
+    # ml_engine/store.py); None keeps a private in-memory index per process
+    'INDEX_DIR': None,
+    # Seconds between reads of the job change log (and checks for a new
+    # generation in INDEX_DIR); bounds how stale other workers' indexes get
+    'INDEX_CHECK_INTERVAL': 5,
+    # Seconds job change log entries are kept; must exceed INDEX_MAX_AGE
+    'CHANGE_LOG_RETENTION': 86400,
+    # Change log entries below the newest applied one that are read again,
+    # for transactions that commit after a later entry was read; must
+    # exceed the entries logged while a job transaction is open. None: 0 on
+    # SQLite, whose serialized writers commit entries in id order, else 1000
+    'CHANGE_LOG_REPLAY_WINDOW': None,
+    # Minimum seconds between two background re-fit attempts
+    'REFIT_INTERVAL': 60,
+    # Ranked results cache (see ml_engine/cache.py): None to disable,
+    # 'local' for an in-process LRU, or the alias of a Django cache
+    'RESULT_CACHE': 'local',
+    # Entries kept by the in-process result cache
+    'RESULT_CACHE_SIZE': 10000,
+    # Seconds a cached result stays valid
+    'RESULT_CACHE_TTL': 300,
+    # 'exact' scores every job; 'inverted' scores only jobs sharing a term
+    # with the user (see ml_engine/inverted.py), with identical results;
+    # 'ann' scores only IVF candidates (see ml_engine/ann.py), for catalogs
+    # of millions of jobs
+    'RETRIEVAL': 'exact',
+    # SVD dimensions of the IVF index
+    'ANN_N_COMPONENTS': 64,
+    # IVF clusters; None for ~sqrt(number of jobs)
+    'ANN_N_LISTS': None,
+    # IVF clusters visited per query; higher means better recall, more latency
+    'ANN_N_PROBE': 16,
+    # Results per page of /api/recommendations/ by default, and at most
+    'API_PAGE_SIZE': 20,
+    'API_MAX_PAGE_SIZE': 100,
+    # Deepest rank reachable through the API, paginated or streamed
+    'API_MAX_RESULTS': 1000,
+    # Threads scoring for async views (see ml_engine/aio.py); bounds the
+    # CPU an ASGI worker spends on concurrent requests
+    'ASYNC_SCORING_THREADS': 4,
+    # Share one ranking between concurrent identical queries (see
+    # ml_engine/singleflight.py)
+    'SINGLE_FLIGHT': True,
+    # Extra metrics sinks (see ml_engine/metrics.py): dotted paths of
+    # callables hook(kind, name, value, labels)
+    'METRICS_HOOKS': [],
+    # Bearer token that lets scrapers read /metrics/ (see jobs.views.metrics_view);
+    # None serves it to INTERNAL_IPS and staff users only
+    'METRICS_TOKEN': None,
+    # Add a Server-Timing header with the stage breakdown of recommendation
+    # requests (always on when DEBUG is True)
+    'METRICS_HEADER': False,
+    # Maximum SQL queries per view, by URL name (see jobs/queries.py)
+    'QUERY_BUDGETS': {
+        'jobs:home': 4,
+        'jobs:dashboard': 6,
+        'jobs:job_list': 7,
+        'jobs:job_detail': 4,
+        'jobs:recommendations': 8,
+        'jobs:recommendations_async': 8,
+        'jobs:api_recommendations': 6,
+        'jobs:api_recommendations_async': 6,
+        'jobs:api_jobs': 4,
+        'jobs:metrics': 3,
+        'accounts:register': 12,
+        'accounts:login': 8,
+        'accounts:logout': 5,
+        'accounts:profile': 12,
+    },
+    # Budget of views missing from QUERY_BUDGETS; None leaves them unchecked
+    'QUERY_BUDGET_DEFAULT': None,
+    # Repetitions of one query shape within a request reported as N+1
+    'QUERY_DUPLICATE_THRESHOLD': 3,
+    # Check every request with QueryBudgetMiddleware (always on when DEBUG
+    # is True); it records every query, so leave it off in production
+    'QUERY_BUDGET_MIDDLEWARE': False,
+    # Raise QueryBudgetExceeded instead of logging a warning
+    'QUERY_BUDGET_ENFORCE': False,
+    # Neighbours stored per job for the "similar jobs" panel (see jobs/similar.py)
+    'SIMILAR_JOBS_TOP_K': 6,
+    # Closest jobs of a changed job whose neighbour lists are refreshed with it
+    'SIMILAR_JOBS_FANOUT': 50,
+    # Refresh neighbour lists when jobs change; larger bulk changes are left
+    # to the build_similar_jobs command
+    'SIMILAR_JOBS_SYNC': True,
+    'SIMILAR_JOBS_SYNC_LIMIT': 100,
+    # Match newly posted jobs against every profile on a worker thread and
+    # record JobAlert rows (see jobs/alerts.py)
+    'JOB_ALERTS': True,
+    # Minimum similarity for an alert ("Good Match" and above)
+    'JOB_ALERT_THRESHOLD': 0.5,
+    # Profiles per sparse matrix product
+    'JOB_ALERT_CHUNK_SIZE': 4096,
+    # New jobs matched together by the worker
+    'JOB_ALERT_BATCH_SIZE': 256,
+    # Seconds between checks of the skill alias version (see jobs/skills.py);
+    # bounds how long a process interns skills with aliases edited elsewhere
+    'SKILL_ALIAS_CHECK_INTERVAL': 5,
+    # Values listed per facet (location, company) next to job search results
+    'SEARCH_FACET_LIMIT': 8,
+    # Seconds facet counts are cached per search (see jobs/search.py)
+    'SEARCH_FACET_TTL': 300,
+    # Job list pagination (see jobs/pagination.py): 'keyset' seeks on
+    # (created_at, id) so deep pages cost as much as the first; 'offset'
+    # numbers the pages. Ranked search results always use numbered pages
+    'JOB_LIST_PAGINATION': 'keyset',
+    # Show an approximate total on filtered keyset listings; the unfiltered
+    # listing always shows the maintained active jobs counter
+    'JOB_LIST_TOTAL': False,
+    # Seconds an approximate listing total is cached
+    'LIST_COUNT_TTL': 300,
+}
+
+
+def get_setting(name):
+    """
+    Look up a recommendation engine setting.
+
+    Args:
+        name (str): Setting name without the RECOMMENDER_ prefix
+
+    Returns:
+        The configured value, or the default
+    """
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, f'RECOMMENDER_{name}', DEFAULTS[name])
+    except ImportError:
+        pass
+    return DEFAULTS[name]
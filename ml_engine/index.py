@@ -0,0 +1,708 @@
+"""
+Pre-fitted Job Index
+
+Fitting a TF-IDF vectorizer over the whole catalog on every request re-learns
+the same vocabulary over and over. The JobIndex fits the vectorizer once over
+the active jobs' required skills and keeps the sparse job matrix resident in
+the worker process, so a query only has to ``transform`` the user's skills and
+take a sparse dot product.
+
+Catalog changes are applied incrementally, in every worker process: job
+saves, deletes and bulk updates append to the JobChange log in their
+transaction (see jobs/signals.py). Every RECOMMENDER_INDEX_CHECK_INTERVAL
+seconds, and on the next lookup in the worker that made the change, a worker
+reads the entries its index has not seen, re-reads those jobs and vectorizes
+them with the fixed vocabulary into a small overlay next to the fitted rows,
+so the fitted rows are never copied. Except on SQLite, entry ids need not
+follow commit order, so the last RECOMMENDER_CHANGE_LOG_REPLAY_WINDOW ids
+are read again and the entries among them the index has not applied yet
+(committed late) are applied too. Once enough rows have changed since the
+last fit, or the index gets old, a background thread re-fits it from the
+database.
+
+With RECOMMENDER_INDEX_DIR set, the index lives in a memory-mapped on-disk
+store (see ml_engine/store.py): workers map the live generation instead of
+fitting, re-fits publish a new generation, and every worker switches to it
+on its next check, replaying the log entries written since it was built.
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .conf import get_setting
+from .metrics import span
+from . import store
+from .preprocessing import build_vectorizer, preprocess_skills
+
+
+class JobIndex:
+    """
+    TF-IDF vectors of the job catalog, fitted once and reused per query.
+
+    The fitted rows (the base matrix) are never modified, so a base mapped
+    from the on-disk store stays shared between processes. Jobs changed
+    since then are vectorized into a small overlay matrix scored after the
+    base, and the rows they replace are tombstoned in ``job_ids`` and
+    skipped when scoring.
+
+    Attributes:
+        vectorizer (TfidfVectorizer): Vectorizer fitted on job skills, or None
+            when the catalog produced no vocabulary
+        job_ids (np.ndarray): Job primary keys, one per base then overlay row
+        base_matrix (scipy.sparse.csr_matrix): L2-normalized job vectors of
+            the fit (memory-mapped when loaded from the store)
+        overlay_matrix (scipy.sparse.csr_matrix): L2-normalized job vectors
+            appended since, with zeroed rows for replaced entries
+        version (str): Stamp identifying the indexed catalog contents
+        fit_version (str): ``version`` as of the last fit; the same in every
+            worker using that fit, and unchanged by incremental updates
+        built_at (float): Unix timestamp of the last fit
+        n_fitted (int): Number of rows at the last fit
+        n_changed (int): Rows removed or appended since the last fit
+        generation (str): Store generation the index was loaded from, if any
+        change_id (int): Last job change log entry reflected in the index
+        applied_changes (np.ndarray): Sorted ids of the entries within the
+            replay window below ``change_id`` that are reflected too
+        removed_rows (np.ndarray): Tombstoned base rows, which score zero
+        ivf (IVFIndex): ANN index over the base matrix, or None (see
+            ml_engine/ann.py)
+        inverted (InvertedSkillIndex): Postings of the base matrix, or None
+            (see ml_engine/inverted.py)
+    """
+
+    # Placeholder job id of rows whose job was removed or re-indexed
+    TOMBSTONE = -1
+
+    def __init__(self, vectorizer, job_ids, job_matrix, version, built_at=None,
+                 n_fitted=None, n_changed=0, generation=None, overlay_matrix=None,
+                 change_id=0, ivf=None, fit_version=None, inverted=None,
+                 applied_changes=None):
+        self.vectorizer = vectorizer
+        self.job_ids = np.asarray(job_ids, dtype=np.int64)
+        # Kept as is when already CSR, so derived indexes share the very same base
+        self.base_matrix = job_matrix if sparse.isspmatrix_csr(job_matrix) else sparse.csr_matrix(job_matrix)
+        if overlay_matrix is None:
+            overlay_matrix = sparse.csr_matrix((0, self.base_matrix.shape[1]))
+        self.overlay_matrix = sparse.csr_matrix(overlay_matrix)
+        self.version = version
+        self.fit_version = fit_version if fit_version is not None else version
+        self.built_at = built_at if built_at is not None else time.time()
+        self.n_fitted = n_fitted if n_fitted is not None else len(self.job_ids)
+        self.n_changed = n_changed
+        self.generation = generation
+        self.change_id = change_id
+        if applied_changes is None:
+            applied_changes = np.empty(0, dtype=np.int64)
+        self.applied_changes = np.asarray(applied_changes, dtype=np.int64)
+        self.ivf = ivf
+        self.inverted = inverted
+        self._positions = None
+        self._matrix = None
+        # Replaced overlay rows are zeroed in the overlay instead
+        self.removed_rows = np.flatnonzero(self.job_ids[:self.n_base] == self.TOMBSTONE)
+
+    @classmethod
+    def build(cls, rows, change_id=0):
+        """
+        Fit a new index over a job catalog.
+
+        Args:
+            rows (iterable): (job_id, required_skills) pairs
+            change_id (int): Last job change log entry before the rows were read
+
+        Returns:
+            JobIndex: Fitted index
+        """
+        job_ids = []
+        documents = []
+        digest = hashlib.sha1()
+
+        for job_id, required_skills in rows:
+            document = preprocess_skills(required_skills)
+            job_ids.append(job_id)
+            documents.append(document)
+            digest.update(f'{job_id}:{document}\n'.encode('utf-8'))
+
+        vectorizer = build_vectorizer()
+        try:
+            job_matrix = vectorizer.fit_transform(documents)
+        except ValueError:
+            # Empty catalog, or no job has a usable term
+            vectorizer = None
+            job_matrix = sparse.csr_matrix((len(documents), 0))
+
+        return cls(vectorizer, job_ids, job_matrix, digest.hexdigest()[:16], change_id=change_id)
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @property
+    def drift(self):
+        """Fraction of rows changed since the last fit."""
+        return self.n_changed / max(self.n_fitted, 1)
+
+    @property
+    def n_terms(self):
+        """Number of columns (vocabulary terms) in the job matrix."""
+        return self.base_matrix.shape[1]
+
+    @property
+    def n_base(self):
+        """Number of rows in the base matrix; overlay rows follow them."""
+        return self.base_matrix.shape[0]
+
+    @property
+    def job_matrix(self):
+        """
+        Base and overlay rows as one matrix, tombstoned rows zeroed.
+
+        Only for offline work (publishing, benchmarks): once the index has
+        changes this copies every row, which scoring never needs.
+        """
+        if self._matrix is None:
+            if not self.overlay_matrix.shape[0] and not len(self.removed_rows):
+                self._matrix = self.base_matrix
+            else:
+                keep = np.ones(self.n_base)
+                keep[self.removed_rows] = 0
+                self._matrix = sparse.vstack(
+                    [sparse.diags(keep) @ self.base_matrix, self.overlay_matrix], format='csr'
+                )
+                self._matrix.eliminate_zeros()
+        return self._matrix
+
+    def transform(self, skills_list):
+        """
+        Vectorize skills texts into the index feature space.
+
+        Terms outside the fitted vocabulary are ignored.
+
+        Args:
+            skills_list (list): Raw comma-separated skills texts
+
+        Returns:
+            scipy.sparse.csr_matrix: One L2-normalized row per text
+        """
+        if self.vectorizer is None:
+            return sparse.csr_matrix((len(skills_list), 0))
+        return self.vectorizer.transform(
+            [preprocess_skills(skills) for skills in skills_list]
+        )
+
+    def score(self, user_skills):
+        """
+        Cosine similarity between the user's skills and every indexed job.
+
+        Rows of the job matrix and the user vector are L2-normalized, so the
+        dot product is the cosine similarity.
+
+        Args:
+            user_skills (str): User's skills as comma-separated text
+
+        Returns:
+            np.ndarray: Similarity scores aligned with ``job_ids``
+        """
+        # The vocabulary is small, so a dense user vector makes this a plain
+        # sparse matrix-vector product
+        with span('vectorize'):
+            user_vector = self.transform([user_skills]).toarray().ravel()
+        with span('similarity'):
+            return self.score_vector(user_vector)
+
+    def score_vector(self, vector):
+        """
+        Cosine similarity between a dense vector and every indexed job.
+
+        Args:
+            vector (np.ndarray): L2-normalized vector of n_terms weights
+
+        Returns:
+            np.ndarray: Similarity scores aligned with ``job_ids``
+        """
+        scores = self.base_matrix @ vector
+        if self.overlay_matrix.shape[0]:
+            scores = np.concatenate([scores, self.overlay_matrix @ vector])
+        scores[self.removed_rows] = 0
+        return scores
+
+    def score_rows(self, rows, vector):
+        """
+        Cosine similarity between a dense vector and some indexed jobs.
+
+        Args:
+            rows (np.ndarray): Row numbers
+            vector (np.ndarray): L2-normalized vector of n_terms weights
+
+        Returns:
+            np.ndarray: Similarity scores aligned with ``rows``
+        """
+        scores = self.row_vectors(rows) @ vector
+        scores[self.job_ids[rows] == self.TOMBSTONE] = 0
+        return scores
+
+    def score_vectors(self, vectors):
+        """
+        Cosine similarities between several vectors and every indexed job.
+
+        Args:
+            vectors (scipy.sparse.csr_matrix): L2-normalized rows of n_terms weights
+
+        Returns:
+            scipy.sparse.csr_matrix: One row of scores per vector, one
+                column per job; tombstoned jobs have no entries
+        """
+        vectors_t = vectors.T.tocsr()
+        # (jobs x terms) @ (terms x vectors), so the job matrix is never transposed
+        blocks = [(self.base_matrix @ vectors_t).T]
+        if self.overlay_matrix.shape[0]:
+            blocks.append((self.overlay_matrix @ vectors_t).T)
+        scores = sparse.hstack(blocks, format='csr')
+        if len(self.removed_rows):
+            scores.data[np.isin(scores.indices, self.removed_rows)] = 0
+            scores.eliminate_zeros()
+        return scores
+
+    def row_vectors(self, rows):
+        """
+        Job vectors of some rows, from the base or the overlay.
+
+        Args:
+            rows (array-like): Row numbers
+
+        Returns:
+            scipy.sparse.csr_matrix: One vector per row, in the given order
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        in_base = rows < self.n_base
+        if in_base.all():
+            return self.base_matrix[rows]
+        vectors = sparse.vstack(
+            [self.base_matrix[rows[in_base]], self.overlay_matrix[rows[~in_base] - self.n_base]],
+            format='csr',
+        )
+        # Back to the order of ``rows``
+        order = np.argsort(np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)]))
+        return vectors[order]
+
+    def position(self, job_id):
+        """
+        Row of a job in the index.
+
+        Args:
+            job_id (int): Job primary key
+
+        Returns:
+            int or None: Row number, or None if the job is not indexed
+        """
+        return self._position_map().get(job_id)
+
+    def _position_map(self):
+        if self._positions is None:
+            self._positions = {
+                int(indexed_id): row
+                for row, indexed_id in enumerate(self.job_ids)
+                if indexed_id != self.TOMBSTONE
+            }
+        return self._positions
+
+    def apply_updates(self, changes, change_id=None, applied_changes=None):
+        """
+        Return a new index with row-level upserts and removals applied.
+
+        The vocabulary stays fixed: changed jobs are vectorized with the
+        fitted vectorizer and appended to the overlay, and their old rows
+        are tombstoned. The base matrix is shared with the current index,
+        which is left untouched, so requests already using it are
+        unaffected. Only ``job_ids`` and the overlay are copied.
+
+        Args:
+            changes (dict): job_id -> required_skills, or None to remove the job
+            change_id (int): Last change log entry the changes come from
+            applied_changes (np.ndarray): Entries applied within the replay
+                window below ``change_id``
+
+        Returns:
+            JobIndex: Updated index
+        """
+        if not changes:
+            return self
+
+        positions = dict(self._position_map())
+        stale_rows = [positions.pop(job_id) for job_id in changes if job_id in positions]
+
+        job_ids = self.job_ids.copy()
+        overlay_matrix = self.overlay_matrix
+        if stale_rows:
+            job_ids[stale_rows] = self.TOMBSTONE
+            stale_overlay_rows = [row - self.n_base for row in stale_rows if row >= self.n_base]
+            if stale_overlay_rows:
+                keep = np.ones(overlay_matrix.shape[0])
+                keep[stale_overlay_rows] = 0
+                overlay_matrix = sparse.diags(keep) @ overlay_matrix
+                overlay_matrix.eliminate_zeros()
+
+        upserts = {job_id: skills for job_id, skills in changes.items() if skills is not None}
+        if upserts:
+            for offset, job_id in enumerate(upserts):
+                positions[job_id] = len(job_ids) + offset
+            job_ids = np.concatenate([job_ids, np.fromiter(upserts, dtype=np.int64)])
+            overlay_matrix = sparse.vstack(
+                [overlay_matrix, self.transform(list(upserts.values()))], format='csr'
+            )
+
+        digest = hashlib.sha1(self.version.encode('utf-8'))
+        for job_id, skills in changes.items():
+            digest.update(f'{job_id}:{skills}\n'.encode('utf-8'))
+
+        index = JobIndex(
+            self.vectorizer, job_ids, self.base_matrix, digest.hexdigest()[:16],
+            built_at=self.built_at,
+            n_fitted=self.n_fitted,
+            n_changed=self.n_changed + len(stale_rows) + len(upserts),
+            generation=self.generation,
+            overlay_matrix=overlay_matrix,
+            change_id=self.change_id if change_id is None else change_id,
+            applied_changes=self.applied_changes if applied_changes is None else applied_changes,
+            ivf=self.ivf,
+            fit_version=self.fit_version,
+            inverted=self.inverted,
+        )
+        index._positions = positions
+        return index
+
+
+# Process-resident index shared by all requests served by this worker
+_job_index = None
+_job_index_lock = threading.Lock()
+# Monotonic time of the last change log (and store) check; 0 forces one
+_checked_at = 0.0
+_sync_lock = threading.Lock()
+_refit_thread = None
+_refit_attempted_at = 0.0
+_refit_lock = threading.Lock()
+
+# Job ids per IN (...) lookup when re-reading changed jobs
+ID_BATCH_SIZE = 500
+
+
+def last_job_change_id():
+    """
+    Id of the newest job change log entry.
+
+    Returns:
+        int: Entry id, 0 when the log is empty
+    """
+    from jobs.models import JobChange
+
+    return JobChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def change_log_replay_window():
+    """
+    Number of change log ids below the newest applied one to read again.
+
+    Returns:
+        int: RECOMMENDER_CHANGE_LOG_REPLAY_WINDOW, or its database default
+    """
+    from django.db import connections, router
+    from jobs.models import JobChange
+
+    window = get_setting('CHANGE_LOG_REPLAY_WINDOW')
+    if window is None:
+        vendor = connections[router.db_for_read(JobChange)].vendor
+        # SQLite serializes writers, so ids follow commit order
+        window = 0 if vendor == 'sqlite' else 1000
+    return window
+
+
+def applied_job_changes(change_id):
+    """
+    Entries within the replay window below a change log entry, e.g. the
+    entries committed before a build read the jobs table.
+
+    Args:
+        change_id (int): Newest entry applied
+
+    Returns:
+        np.ndarray: Sorted entry ids
+    """
+    from jobs.models import JobChange
+
+    window = change_log_replay_window()
+    if not window:
+        return np.empty(0, dtype=np.int64)
+    return np.fromiter(
+        JobChange.objects.filter(id__gt=change_id - window, id__lte=change_id)
+        .order_by('id').values_list('id', flat=True),
+        dtype=np.int64,
+    )
+
+
+def read_job_changes(after, limit, applied=()):
+    """
+    Current state of the jobs changed after a change log entry.
+
+    Entries within the replay window below ``after`` that are not in
+    ``applied`` were committed after it was read, and are read as well.
+
+    Args:
+        after (int): Last entry already applied
+        limit (int): Most entries to read
+        applied (np.ndarray): Entries within the replay window below
+            ``after`` already applied
+
+    Returns:
+        tuple: (last entry id read, entries applied within the replay window
+            below it, job_id -> required_skills or None for deleted and
+            inactive jobs), or (None, None, None) when more than ``limit``
+            entries are waiting
+    """
+    from jobs.models import Job, JobChange
+
+    window = change_log_replay_window()
+    entries = list(
+        JobChange.objects.filter(id__gt=after).order_by('id').values_list('id', 'job_id')[:limit + 1]
+    )
+    if window:
+        late = JobChange.objects.filter(id__gt=after - window, id__lte=after).order_by('id')
+        seen = set(np.asarray(applied).tolist())
+        entries = [entry for entry in late.values_list('id', 'job_id') if entry[0] not in seen] + entries
+    if len(entries) > limit:
+        return None, None, None
+    if not entries:
+        return after, applied, {}
+
+    last = max(after, entries[-1][0])
+    applied = np.union1d(applied, [entry_id for entry_id, _ in entries]).astype(np.int64)
+    applied = applied[applied > last - window]
+
+    job_ids = list(dict.fromkeys(job_id for _, job_id in entries))
+    changes = dict.fromkeys(job_ids)
+    for start in range(0, len(job_ids), ID_BATCH_SIZE):
+        rows = Job.objects.filter(
+            id__in=job_ids[start:start + ID_BATCH_SIZE], is_active=True
+        ).values_list('id', 'required_skills')
+        for job_id, required_skills in rows:
+            changes[job_id] = required_skills or ''
+    return last, applied, changes
+
+
+def prune_job_changes():
+    """
+    Delete change log entries older than RECOMMENDER_CHANGE_LOG_RETENTION.
+
+    Returns:
+        int: Number of entries deleted
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from jobs.models import JobChange
+
+    cutoff = timezone.now() - timedelta(seconds=get_setting('CHANGE_LOG_RETENTION'))
+    deleted, _ = JobChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def build_job_index():
+    """
+    Fit a JobIndex over the active jobs in the database.
+
+    With RECOMMENDER_RETRIEVAL set to 'ann' or 'inverted', its IVF index or
+    postings are built as well.
+
+    Returns:
+        JobIndex: Freshly built index
+    """
+    from jobs.models import Job
+    from .ann import build_ivf_index
+    from .inverted import build_inverted_index
+
+    # Read first: changes logged while the rows are read are replayed on top
+    change_id = last_job_change_id()
+    applied = applied_job_changes(change_id)
+    rows = (
+        Job.objects.filter(is_active=True)
+        .order_by('id')
+        .values_list('id', 'required_skills')
+        .iterator(chunk_size=2000)
+    )
+    index = JobIndex.build(rows, change_id=change_id)
+    index.applied_changes = applied
+    index.ivf = build_ivf_index(index)
+    index.inverted = build_inverted_index(index)
+    return index
+
+
+def publish_job_index(index):
+    """
+    Save an index as the live generation of the on-disk store.
+
+    Args:
+        index (JobIndex): Index to publish
+
+    Returns:
+        JobIndex: The index memory-mapped from the store, or ``index``
+            itself when no store is configured
+    """
+    directory = get_setting('INDEX_DIR')
+    if not directory:
+        return index
+    generation = store.save_index(index, directory)
+    return store.load_index(directory, generation)
+
+
+def catch_up(index):
+    """
+    Apply the change log entries written after an index was built.
+
+    Args:
+        index (JobIndex): Index to bring up to date
+
+    Returns:
+        JobIndex: Updated index, or ``index`` when nothing changed. When
+            more entries are waiting than a re-fit would cost (REFIT_DRIFT
+            of the index), ``index`` is returned and a re-fit scheduled.
+    """
+    limit = max(int(index.n_fitted * get_setting('REFIT_DRIFT')), ID_BATCH_SIZE)
+    with span('index_sync'):
+        change_id, applied, changes = read_job_changes(
+            index.change_id, limit, index.applied_changes
+        )
+    if changes is None:
+        schedule_refit()
+        return index
+    if not changes:
+        return index
+    return index.apply_updates(changes, change_id, applied)
+
+
+def load_job_index():
+    """
+    Load the active catalog index and make it the resident index.
+
+    Maps the live generation of the on-disk store when there is one,
+    otherwise fits a new index (and publishes it to the store).
+
+    Returns:
+        JobIndex: The new resident index
+    """
+    global _job_index, _checked_at
+    directory = get_setting('INDEX_DIR')
+    index = store.load_index(directory) if directory else None
+    if index is None:
+        index = publish_job_index(build_job_index())
+    index = catch_up(index)
+    with _sync_lock:
+        _job_index = index
+        _checked_at = time.monotonic()
+    return index
+
+
+def get_job_index():
+    """
+    Return the resident index, loading it on first use.
+
+    Every INDEX_CHECK_INTERVAL seconds, switches to a newer store generation
+    when one was published and applies the job change log, and schedules a
+    background re-fit when the index has drifted too far or grown too old.
+
+    Returns:
+        JobIndex: Index shared by this worker process
+    """
+    if _job_index is None:
+        with _job_index_lock:
+            # Another thread may have loaded it while we waited
+            if _job_index is None:
+                load_job_index()
+
+    if time.monotonic() - _checked_at >= get_setting('INDEX_CHECK_INTERVAL'):
+        sync_job_index()
+
+    index = _job_index
+    if (index.drift > get_setting('REFIT_DRIFT')
+            or time.time() - index.built_at > get_setting('INDEX_MAX_AGE')):
+        schedule_refit()
+    return index
+
+
+def sync_job_index(wait=False):
+    """
+    Bring the resident index up to date with the store and the change log.
+
+    Args:
+        wait (bool): Wait for a sync running in another thread and sync
+            again after it; otherwise keep using the current index
+
+    Returns:
+        JobIndex: The resident index
+    """
+    global _job_index, _checked_at
+    if not _sync_lock.acquire(blocking=wait):
+        return _job_index
+    try:
+        _checked_at = time.monotonic()
+        index = _job_index
+        directory = get_setting('INDEX_DIR')
+        if directory:
+            generation = store.current_generation(directory)
+            if generation is not None and generation != index.generation:
+                # Edits made since its build are replayed from the log below
+                index = store.load_index(directory, generation)
+        _job_index = catch_up(index)
+        return _job_index
+    finally:
+        _sync_lock.release()
+
+
+def request_job_index_sync():
+    """
+    Read the change log on this worker's next lookup, rather than after up
+    to INDEX_CHECK_INTERVAL seconds; called once a job change is committed.
+    """
+    global _checked_at
+    _checked_at = 0.0
+
+
+def schedule_refit():
+    """
+    Re-fit the resident index from the database in a background thread.
+
+    Returns:
+        bool: False if a re-fit is running or was attempted too recently
+    """
+    global _refit_thread, _refit_attempted_at
+    with _refit_lock:
+        if _refit_thread is not None and _refit_thread.is_alive():
+            return False
+        if time.monotonic() - _refit_attempted_at < get_setting('REFIT_INTERVAL'):
+            return False
+        _refit_attempted_at = time.monotonic()
+        _refit_thread = threading.Thread(target=_refit, name='job-index-refit', daemon=True)
+        _refit_thread.start()
+    return True
+
+
+def _refit():
+    global _job_index
+    from django.db import connection
+
+    directory = get_setting('INDEX_DIR')
+    if directory and not store.acquire_build_lock(directory):
+        # Another worker is rebuilding the store; we'll map its result
+        connection.close()
+        return
+
+    try:
+        index = catch_up(publish_job_index(build_job_index()))
+        with _sync_lock:
+            _job_index = index
+        prune_job_changes()
+    finally:
+        if directory:
+            store.release_build_lock(directory)
+        connection.close()
@@ -0,0 +1,165 @@
+"""
+Inverted Skill Index
+
+Maps every vocabulary term (the skill tokens and bigrams produced by
+``preprocess_skills`` and the vectorizer) to the jobs containing it, with the
+job's TF-IDF weight. The postings are simply the job matrix in CSC layout.
+A query walks only the postings of the user's own terms, so jobs sharing no
+term with the user are never touched, and the accumulated weights are the
+exact cosine similarities.
+
+The postings are part of a fit: build_job_index() builds them next to the
+TF-IDF matrix (in the background re-fit or the build_job_index command) and
+the on-disk store saves them with the generation, memory-mapped like the
+job matrix, so requests never build them.
+"""
+
+import numpy as np
+
+from .conf import get_setting
+from .metrics import observe, span
+from .ranking import top_n
+
+
+class InvertedSkillIndex:
+    """
+    Term -> (job rows, weights) postings over the base rows of a JobIndex.
+
+    Overlay rows appended by incremental updates are scanned directly and
+    tombstoned rows are skipped, so the postings stay valid until the next
+    re-fit.
+    """
+
+    def __init__(self, postings, n_rows):
+        self.postings = postings
+        self.n_rows = n_rows
+
+    @classmethod
+    def build(cls, job_matrix):
+        """
+        Build the postings of a job matrix.
+
+        Args:
+            job_matrix (scipy.sparse.csr_matrix): L2-normalized job vectors
+
+        Returns:
+            InvertedSkillIndex: Built index
+        """
+        return cls(job_matrix.tocsc(), job_matrix.shape[0])
+
+    def candidates(self, user_vector):
+        """
+        Rows sharing at least one term with the user.
+
+        Args:
+            user_vector (scipy.sparse.csr_matrix): 1 x terms TF-IDF vector
+
+        Returns:
+            np.ndarray: Sorted candidate row numbers
+        """
+        rows, _ = self._gather(user_vector)
+        return np.unique(rows)
+
+    def score(self, user_vector):
+        """
+        Exact similarities of the candidate rows.
+
+        Args:
+            user_vector (scipy.sparse.csr_matrix): 1 x terms TF-IDF vector
+
+        Returns:
+            tuple: (rows, scores) of every candidate
+        """
+        rows, contributions = self._gather(user_vector)
+        if len(rows) * 8 < self.n_rows:
+            # Few postings: accumulate per candidate
+            candidates, inverse = np.unique(rows, return_inverse=True)
+            return candidates, np.bincount(inverse, weights=contributions)
+        # Many postings: a dense accumulator is cheaper than sorting them
+        scores = np.bincount(rows, weights=contributions, minlength=self.n_rows)
+        candidates = np.flatnonzero(scores)
+        return candidates, scores[candidates]
+
+    def _gather(self, user_vector):
+        indptr, indices, data = self.postings.indptr, self.postings.indices, self.postings.data
+        rows = []
+        contributions = []
+        for term, weight in zip(user_vector.indices, user_vector.data):
+            start, end = indptr[term], indptr[term + 1]
+            rows.append(indices[start:end])
+            contributions.append(data[start:end] * weight)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(rows), np.concatenate(contributions)
+
+
+def rank_inverted(index, inverted, user_skills, n):
+    """
+    Rank jobs scoring only those that share a term with the user.
+
+    Args:
+        index (JobIndex): Job index
+        inverted (InvertedSkillIndex): Postings built over ``index``'s fit
+        user_skills (str): User's skills as comma-separated text
+        n (int): Number of top jobs to return
+
+    Returns:
+        tuple: (positions, scores) in the job index, best first
+    """
+    with span('vectorize'):
+        user_vector = index.transform([user_skills])
+    with span('inverted_score'):
+        rows, scores = inverted.score(user_vector)
+
+    # Skip rows removed since the fit; their replacements are in the tail
+    alive = index.job_ids[rows] != index.TOMBSTONE
+    rows, scores = rows[alive], scores[alive]
+
+    if len(index) > inverted.n_rows:
+        tail = np.arange(inverted.n_rows, len(index))
+        rows = np.concatenate([rows, tail])
+        scores = np.concatenate([scores, index.score_rows(tail, user_vector.toarray().ravel())])
+
+    observe('recommender_candidates', len(rows))
+    with span('top_n'):
+        winners, top_scores = top_n(scores, n)
+    return rows[winners], top_scores
+
+
+def build_inverted_index(index):
+    """
+    Build the postings of a freshly fitted job index, when enabled.
+
+    Args:
+        index (JobIndex): Job index
+
+    Returns:
+        InvertedSkillIndex or None: None unless RECOMMENDER_RETRIEVAL is
+            'inverted' and the index has rows
+    """
+    if get_setting('RETRIEVAL') != 'inverted' or not index.n_fitted:
+        return None
+    return InvertedSkillIndex.build(index.base_matrix)
+
+
+def get_inverted_index(index):
+    """
+    Return the postings built with ``index``'s fit.
+
+    Incremental updates keep the fitted rows, so the postings survive them.
+    An index fitted or stored before inverted retrieval was enabled has
+    none: it is scored exactly and a re-fit is scheduled to build them.
+
+    Args:
+        index (JobIndex): Job index
+
+    Returns:
+        InvertedSkillIndex or None: None unless RECOMMENDER_RETRIEVAL is
+            'inverted' and the index has postings
+    """
+    if get_setting('RETRIEVAL') != 'inverted':
+        return None
+    if index.inverted is None and index.n_fitted:
+        from .index import schedule_refit
+        schedule_refit()
+    return index.inverted
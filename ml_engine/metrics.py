@@ -0,0 +1,238 @@
+"""
+Recommendation Pipeline Metrics
+
+Stages of the pipeline run inside ``span(stage)``, which records the duration
+in the ``recommender_stage_seconds`` histogram and, during a request traced by
+``jobs.middleware.RecommenderTimingMiddleware``, in the per-request breakdown
+sent back as a ``Server-Timing`` header. Counters and value histograms
+(catalog size, candidates scored, errors) are recorded with ``increment`` and
+``observe``.
+
+Everything lands in the in-process registry, which ``render_prometheus``
+exports in the Prometheus text format (one registry per worker process).
+Further sinks are plugged in with RECOMMENDER_METRICS_HOOKS: dotted paths of
+callables ``hook(kind, name, value, labels)``, e.g.
+``'ml_engine.metrics.logging_hook'``.
+"""
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+DESCRIPTIONS = {
+    'recommender_stage_seconds': 'Duration of recommendation pipeline stages',
+    'recommender_candidates': 'Jobs scored per query',
+    'recommender_catalog_size': 'Jobs in the index used per query',
+    'recommender_requests_total': 'Recommendation requests',
+    'recommender_errors_total': 'Errors in the recommendation pipeline',
+    'recommender_cache_total': 'Result cache lookups by result',
+    'recommender_view_queries': 'SQL queries per request, by view',
+    'recommender_reverse_matches': 'Profiles matched per batch of new jobs',
+}
+
+# (stage, milliseconds) spans of the request being traced, if any
+_trace = contextvars.ContextVar('recommender_trace', default=None)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, as exported to Prometheus.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process counters and histograms, keyed by name and labels.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = MetricsRegistry()
+
+_hooks = None
+_hooks_lock = threading.Lock()
+
+
+def get_hooks():
+    """
+    Load the callables named in RECOMMENDER_METRICS_HOOKS.
+
+    Returns:
+        list: Hook callables
+    """
+    global _hooks
+    if _hooks is None:
+        with _hooks_lock:
+            if _hooks is None:
+                paths = get_setting('METRICS_HOOKS')
+                if paths:
+                    from django.utils.module_loading import import_string
+                    paths = [import_string(path) for path in paths]
+                _hooks = list(paths)
+    return _hooks
+
+
+def _emit(kind, name, value, labels):
+    for hook in get_hooks():
+        try:
+            hook(kind, name, value, labels)
+        except Exception:
+            logger.exception('Metrics hook %r failed', hook)
+
+
+def increment(name, value=1, **labels):
+    """
+    Add to a counter.
+
+    Args:
+        name (str): Counter name, ending in _total
+        value (int): Amount to add
+        **labels: Label values
+    """
+    registry.increment(name, value, **labels)
+    _emit('counter', name, value, labels)
+
+
+def observe(name, value, buckets=COUNT_BUCKETS, **labels):
+    """
+    Record a value (e.g. a candidate count) in a histogram.
+
+    Args:
+        name (str): Histogram name
+        value (float): Observed value
+        buckets (tuple): Bucket upper bounds
+        **labels: Label values
+    """
+    registry.observe(name, value, buckets, **labels)
+    _emit('histogram', name, value, labels)
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a pipeline stage.
+
+    Args:
+        stage (str): Stage name, e.g. 'score' or 'render'
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe('recommender_stage_seconds', elapsed, SECONDS_BUCKETS, stage=stage)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((stage, elapsed * 1000))
+        _emit('span', 'recommender_stage_seconds', elapsed, {'stage': stage})
+
+
+def start_trace():
+    """
+    Collect the spans of the current request (or task).
+
+    Returns:
+        tuple: (spans list, token for stop_trace)
+    """
+    spans = []
+    return spans, _trace.set(spans)
+
+
+def stop_trace(token):
+    """Stop collecting spans started by start_trace()."""
+    _trace.reset(token)
+
+
+def logging_hook(kind, name, value, labels):
+    """Metrics hook writing every observation to the ml_engine.metrics logger."""
+    logger.debug('%s %s %s %s', kind, name, value, labels)
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+def render_prometheus():
+    """
+    Export the registry in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text
+    """
+    lines = []
+    with registry._lock:
+        counters = sorted(registry.counters.items())
+        histograms = sorted(
+            (key, (list(h.buckets), list(h.counts), h.sum, h.count))
+            for key, h in registry.histograms.items()
+        )
+
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f'# HELP {name} {DESCRIPTIONS.get(name, name)}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in counters:
+        declare(name, 'counter')
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for (name, labels), (buckets, counts, total, count) in histograms:
+        declare(name, 'histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+        lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+    return '\n'.join(lines) + '\n'
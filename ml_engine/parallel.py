@@ -0,0 +1,312 @@
+"""
+Sharded Parallel Scoring
+
+Splits the base matrix of the job index into row shards held in shared
+memory and scores them on a process pool. Workers attach to the shards
+without copying, so a query only ships the (small) user vector to each
+shard; every shard returns its local top N and the parent merges them with
+the overlay rows (jobs changed since the fit, scored in the parent) into
+the global top N.
+
+Shards are published once per base matrix, in a background thread;
+incremental job edits only grow the overlay, so they never republish.
+Each published set of shards is an immutable snapshot: a query scores the
+snapshot of its own index from start to end, and a replaced snapshot is
+unlinked only once the queries using it have finished.
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from .conf import get_setting
+from .ranking import top_n
+
+# Snapshots attached in a worker process: key -> {shard number: (blocks, matrix)}
+_worker_shards = OrderedDict()
+
+# Snapshots a worker keeps attached; queries may use two while one replaces the other
+WORKER_SNAPSHOTS = 2
+
+
+def _attach(name):
+    """Attach to a shared memory block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: workers share the parent's resource tracker, which
+        # already tracks the block, so registering it again is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+def _detach(attached):
+    for blocks, _ in attached.values():
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # Still referenced by an array; freed with it
+                pass
+
+
+def _shard_matrix(shard):
+    """Return the CSR matrix of a published shard, attaching on first use."""
+    key, number = shard['snapshot'], shard['number']
+    if key in _worker_shards:
+        _worker_shards.move_to_end(key)
+    else:
+        while len(_worker_shards) >= WORKER_SNAPSHOTS:
+            _detach(_worker_shards.popitem(last=False)[1])
+        _worker_shards[key] = {}
+
+    attached = _worker_shards[key]
+    if number not in attached:
+        blocks = []
+        arrays = []
+        for name, dtype, length in shard['arrays']:
+            block = _attach(name)
+            blocks.append(block)
+            arrays.append(np.ndarray((length,), dtype=dtype, buffer=block.buf))
+        data, indices, indptr = arrays
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=shard['shape'], copy=False)
+        attached[number] = (blocks, matrix)
+    return attached[number][1]
+
+
+def _score_shard(shard, term_indices, term_weights, n, removed):
+    """Score one shard against a user vector and return its local top N."""
+    matrix = _shard_matrix(shard)
+    user_vector = np.zeros(matrix.shape[1])
+    user_vector[term_indices] = term_weights
+    scores = matrix @ user_vector
+    # Tombstoned rows of the shard
+    scores[removed] = 0
+    positions, scores = top_n(scores, n)
+    return positions + shard['offset'], scores
+
+
+class _Snapshot:
+    """Shards of one base matrix and the number of queries using them."""
+
+    def __init__(self, base_matrix, shards, blocks):
+        self.base_matrix = base_matrix
+        self.shards = shards
+        self.blocks = blocks
+        self.users = 0
+        self.retired = False
+
+
+class ShardedScorer:
+    """
+    Scores queries against a JobIndex split across a process pool.
+
+    The pool is created once; publishing an index copies its base matrix
+    into fresh shared memory shards that workers attach to on their next task.
+    """
+
+    def __init__(self, n_workers=None, n_shards=None):
+        """
+        Args:
+            n_workers (int): Worker processes (defaults to the CPU count)
+            n_shards (int): Row shards per index (defaults to n_workers)
+        """
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.n_shards = n_shards or self.n_workers
+        self._snapshot = None
+        self._keys = itertools.count()
+        self._publisher = None
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    def publish(self, index):
+        """
+        Copy an index's base matrix into shared memory shards.
+
+        Indexes derived from it by incremental updates share the base, so
+        they are scored against the same shards.
+
+        Args:
+            index (JobIndex): Index to score against
+        """
+        matrix = index.base_matrix
+        key = f'{os.getpid()}-{next(self._keys)}'
+        bounds = np.linspace(0, matrix.shape[0], self.n_shards + 1).astype(int)
+        shards = []
+        blocks = []
+        for number, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            shard_matrix = matrix[start:end]
+            arrays = []
+            for array in (shard_matrix.data, shard_matrix.indices, shard_matrix.indptr):
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                blocks.append(block)
+                arrays.append((block.name, array.dtype.str, len(array)))
+            shards.append({
+                'snapshot': key,
+                'number': number,
+                'offset': int(start),
+                'end': int(end),
+                'shape': shard_matrix.shape,
+                'arrays': arrays,
+            })
+
+        with self._lock:
+            old, self._snapshot = self._snapshot, _Snapshot(matrix, shards, blocks)
+        if old is not None:
+            self._retire(old)
+
+    def publish_in_background(self, index):
+        """
+        publish() on a background thread, unless one is already running.
+
+        Args:
+            index (JobIndex): Index to score against
+
+        Returns:
+            bool: Whether a publication was started
+        """
+        with self._lock:
+            if self._publisher is not None and self._publisher.is_alive():
+                return False
+            self._publisher = threading.Thread(
+                target=self.publish, args=(index,), name='shard-publish', daemon=True
+            )
+            self._publisher.start()
+        return True
+
+    def is_published(self, index):
+        """
+        Whether queries against ``index`` can be scored on the shards.
+
+        Args:
+            index (JobIndex): Job index
+
+        Returns:
+            bool: True when the shards hold the index's base matrix
+        """
+        snapshot = self._snapshot
+        return snapshot is not None and snapshot.base_matrix is index.base_matrix
+
+    def rank(self, index, user_skills, n):
+        """
+        Rank jobs for one user across all shards and the overlay.
+
+        Args:
+            index (JobIndex): Index to rank in; its base matrix must be published
+            user_skills (str): User's skills as comma-separated text
+            n (int): Number of top jobs to return
+
+        Returns:
+            tuple or None: (job_ids, scores), best first, or None when the
+                index's base matrix is not published (yet)
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.base_matrix is not index.base_matrix:
+                return None
+            snapshot.users += 1
+
+        try:
+            user_vector = index.transform([user_skills])
+            removed = index.removed_rows
+            futures = [
+                self._executor.submit(
+                    _score_shard, shard, user_vector.indices, user_vector.data, n,
+                    removed[(removed >= shard['offset']) & (removed < shard['end'])] - shard['offset'],
+                )
+                for shard in snapshot.shards
+            ]
+            results = [future.result() for future in futures]
+        finally:
+            with self._lock:
+                snapshot.users -= 1
+                release = snapshot.retired and snapshot.users == 0
+            if release:
+                self._release(snapshot)
+
+        if index.overlay_matrix.shape[0]:
+            # Jobs changed since the fit
+            overlay_positions, overlay_scores = top_n(
+                index.overlay_matrix @ user_vector.toarray().ravel(), n
+            )
+            results.append((overlay_positions + index.n_base, overlay_scores))
+
+        # Merge the local winners into the global top N
+        positions = np.concatenate([positions for positions, _ in results])
+        scores = np.concatenate([scores for _, scores in results])
+        winners, top_scores = top_n(scores, n)
+        return index.job_ids[positions[winners]], top_scores
+
+    def close(self):
+        """Shut down the pool and free the shared memory."""
+        self._executor.shutdown()
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            self._retire(snapshot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _retire(self, snapshot):
+        # Queries still scoring the snapshot release it when they finish
+        with self._lock:
+            snapshot.retired = True
+            release = snapshot.users == 0
+        if release:
+            self._release(snapshot)
+
+    def _release(self, snapshot):
+        with self._lock:
+            blocks, snapshot.blocks = snapshot.blocks, []
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+# Scorer shared by the requests of this process, when enabled
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_sharded_scorer(index):
+    """
+    Return the process-wide ShardedScorer if it can score ``index``.
+
+    A new base matrix is published in the background; until it is, None is
+    returned and queries are scored in the request thread.
+
+    Args:
+        index (JobIndex): Index to score against
+
+    Returns:
+        ShardedScorer or None: None unless RECOMMENDER_SCORING_WORKERS > 1
+            and the index's base matrix is published
+    """
+    global _scorer
+    n_workers = get_setting('SCORING_WORKERS')
+    if n_workers <= 1:
+        return None
+
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = ShardedScorer(n_workers)
+            atexit.register(_scorer.close)
+    if not _scorer.is_published(index):
+        _scorer.publish_in_background(index)
+        return None
+    return _scorer
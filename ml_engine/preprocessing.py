@@ -0,0 +1,50 @@
+"""
+Text preprocessing shared by the recommendation engine and the job index.
+
+Keeping the normalization and the vectorizer configuration in one place
+guarantees that job vectors built ahead of time and user vectors built at
+query time live in the same feature space.
+"""
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def preprocess_skills(skills_text):
+    """
+    Clean and normalize skills text for better matching.
+
+    Args:
+        skills_text (str): Raw skills text (comma-separated)
+
+    Returns:
+        str: Cleaned and normalized skills text
+    """
+    if not skills_text:
+        return ""
+
+    # Convert to lowercase and remove extra spaces
+    skills_text = skills_text.lower().strip()
+
+    # Replace commas with spaces for better tokenization
+    skills_text = skills_text.replace(',', ' ')
+
+    return skills_text
+
+
+def build_vectorizer():
+    """
+    Create the TF-IDF vectorizer used for skills text.
+
+    Returns:
+        TfidfVectorizer: Unfitted vectorizer
+    """
+    # TfidfVectorizer converts text into numerical feature vectors
+    # - lowercase=True: converts all text to lowercase for consistency
+    # - stop_words='english': removes common words like 'the', 'is', etc.
+    # - ngram_range=(1,2): considers both single words and word pairs
+    return TfidfVectorizer(
+        lowercase=True,
+        stop_words='english',
+        ngram_range=(1, 2),
+        max_features=1000
+    )
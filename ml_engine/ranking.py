@@ -0,0 +1,56 @@
+"""
+Vectorized ranking helpers.
+
+Selecting the best N of M scores with ``np.argpartition`` is O(M); only the
+N winners are then sorted, so ranking costs O(M + N log N) instead of sorting
+the whole catalog.
+"""
+
+import numpy as np
+
+
+def top_n(scores, n):
+    """
+    Select the highest positive scores.
+
+    Args:
+        scores (np.ndarray): One score per candidate
+        n (int): Number of results to keep
+
+    Returns:
+        tuple: (positions, scores) of the winners, best first
+    """
+    scores = np.asarray(scores)
+    positions = np.flatnonzero(scores > 0)
+    if n <= 0 or not len(positions):
+        return positions[:0], scores[:0]
+
+    if len(positions) > n:
+        # Partial selection: the n best end up first, in no particular order
+        winners = np.argpartition(-scores[positions], n - 1)[:n]
+        positions = positions[winners]
+
+    order = np.argsort(-scores[positions], kind='stable')
+    positions = positions[order]
+    return positions, scores[positions]
+
+
+def top_n_per_row(score_matrix, n):
+    """
+    Select the highest positive scores of every row of a sparse matrix.
+
+    Only stored entries are considered, so the work per row is proportional
+    to its number of non-zero scores.
+
+    Args:
+        score_matrix (scipy.sparse.csr_matrix): One row of scores per query
+        n (int): Number of results to keep per row
+
+    Yields:
+        tuple: (columns, scores) of each row's winners, best first
+    """
+    indptr, indices, data = score_matrix.indptr, score_matrix.indices, score_matrix.data
+    for row in range(score_matrix.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        positions, scores = top_n(data[start:end], n)
+        yield indices[start:end][positions], scores
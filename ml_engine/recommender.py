@@ -6,37 +6,66 @@ This module implements a content-based recommendation system using:
 - Cosine Similarity for measuring text similarity
 
 The algorithm compares user skills with job requirements to recommend relevant positions.
+Job vectors come from a pre-fitted JobIndex (see ml_engine/index.py), so only the
+user's skills are vectorized per request. Ranking works on job ids; only the
+winning Job rows are fetched from the database.
 """
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+from itertools import islice
+
 import numpy as np
 
+from .ann import get_ivf_index, rank_approximate
+from .cache import get_result_cache
+from .conf import get_setting
+from .index import get_job_index
+from .inverted import get_inverted_index, rank_inverted
+from .metrics import increment, observe, span
+from .parallel import get_sharded_scorer
+from .preprocessing import preprocess_skills
+from .ranking import top_n as select_top_n
+from .ranking import top_n_per_row
+from .singleflight import rank_jobs_shared
+
+logger = logging.getLogger(__name__)
+
 
 class JobRecommender:
     """
     A content-based job recommendation system using TF-IDF and Cosine Similarity.
     
     How it works:
-    1. Converts user skills and job requirements into TF-IDF vectors
-    2. Calculates cosine similarity between user vector and all job vectors
-    3. Ranks jobs by similarity score (0 to 1, where 1 is perfect match)
+    1. Looks up pre-computed TF-IDF vectors of the jobs in the job index
+    2. Converts user skills into a TF-IDF vector in the same feature space
+    3. Calculates cosine similarity between user vector and all job vectors
+    4. Ranks jobs by similarity score (0 to 1, where 1 is perfect match)
+    5. Fetches only the top ranked Job rows
     """
     
-    def __init__(self):
-        """
-        Initialize the recommender with a TF-IDF vectorizer.
-        """
-        # TfidfVectorizer converts text into numerical feature vectors
-        # - lowercase=True: converts all text to lowercase for consistency
-        # - stop_words='english': removes common words like 'the', 'is', etc.
-        # - ngram_range=(1,2): considers both single words and word pairs
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words='english',
-            ngram_range=(1, 2),
-            max_features=1000
-        )
+    # Job fields rendered on recommendation cards
+    CARD_FIELDS = ('id', 'title', 'company', 'location', 'salary_range', 'description', 'required_skills', 'skill_ids')
+    
+    def __init__(self, index=None):
+        """
+        Initialize the recommender.
+
+        Args:
+            index (JobIndex): Pre-fitted job index. Defaults to the index
+                resident in this worker process.
+        """
+        self.index = index
+
+    def get_index(self):
+        """
+        Return the job index used for scoring.
+
+        Returns:
+            JobIndex: Explicitly provided index or the resident one
+        """
+        if self.index is None:
+            self.index = get_job_index()
+        return self.index
     
     def preprocess_skills(self, skills_text):
         """
@@ -48,16 +77,7 @@ class JobRecommender:
         Returns:
             str: Cleaned and normalized skills text
         """
-        if not skills_text:
-            return ""
-        
-        # Convert to lowercase and remove extra spaces
-        skills_text = skills_text.lower().strip()
-        
-        # Replace commas with spaces for better tokenization
-        skills_text = skills_text.replace(',', ' ')
-        
-        return skills_text
+        return preprocess_skills(skills_text)
     
     def calculate_match_percentage(self, similarity_score):
         """
@@ -71,76 +91,217 @@ class JobRecommender:
         """
         return int(similarity_score * 100)
     
+    def rank_jobs(self, user_skills, top_n=20):
+        """
+        Rank indexed jobs against the user's skills.
+        
+        Args:
+            user_skills (str): User's skills as comma-separated text
+            top_n (int): Number of top jobs to return
+        
+        Returns:
+            list: (job_id, similarity_score) pairs, best match first.
+                Jobs with no similarity are left out.
+        """
+        with span('index'):
+            index = self.get_index()
+        
+        # Reuse the ranking of an identical query against this index version
+        cache = get_result_cache()
+        if cache is not None:
+            with span('cache'):
+                key = cache.make_key(user_skills, index.version, top_n)
+                ranked = cache.get(key, index.version)
+            if ranked is not None:
+                increment('recommender_cache_total', result='hit')
+                return ranked
+            increment('recommender_cache_total', result='miss')
+        observe('recommender_catalog_size', len(index))
+        
+        ivf = get_ivf_index(index)
+        inverted = get_inverted_index(index)
+        scorer = get_sharded_scorer(index) if ivf is None and inverted is None else None
+        sharded = None
+        if scorer is not None:
+            # Steps 1-2 on every shard of the job matrix in parallel; None
+            # when a newer index was published meanwhile
+            with span('sharded_score'):
+                sharded = scorer.rank(index, user_skills, top_n)
+        
+        if sharded is not None:
+            job_ids, top_scores = sharded
+            observe('recommender_candidates', len(index))
+        elif ivf is not None:
+            # Steps 1-2 on approximate nearest-neighbour candidates only
+            positions, top_scores = rank_approximate(
+                index, ivf, user_skills, top_n, get_setting('ANN_N_PROBE')
+            )
+            job_ids = index.job_ids[positions]
+        elif inverted is not None:
+            # Steps 1-2 on jobs sharing at least one term with the user
+            positions, top_scores = rank_inverted(index, inverted, user_skills, top_n)
+            job_ids = index.job_ids[positions]
+        else:
+            # Step 1: Convert user skills to a TF-IDF vector and calculate cosine
+            # similarity against the pre-computed job vectors
+            similarity_scores = index.score(user_skills)
+            observe('recommender_candidates', len(similarity_scores))
+            
+            # Step 2: Keep the top N jobs with a positive score
+            with span('top_n'):
+                positions, top_scores = select_top_n(similarity_scores, top_n)
+            job_ids = index.job_ids[positions]
+        
+        ranked = list(zip(job_ids.tolist(), top_scores.tolist()))
+        if cache is not None:
+            cache.set(key, index.version, ranked)
+        return ranked
+    
+    def iter_recommend_batch(self, profiles, top_n=20, chunk_size=128):
+        """
+        Rank jobs for many users with one sparse matrix product per chunk.
+        
+        Args:
+            profiles (iterable): UserProfile objects or (profile_id, skills) pairs
+            top_n (int): Number of top jobs per user
+            chunk_size (int): Users scored per matrix product; bounds memory
+        
+        Yields:
+            tuple: (profile_id, ranked) where ranked is a list of
+                (job_id, similarity_score) pairs, best match first
+        """
+        index = self.get_index()
+        profiles = iter(profiles)
+        
+        while True:
+            chunk = list(islice(profiles, chunk_size))
+            if not chunk:
+                break
+            
+            profile_ids, skills_list = zip(*(
+                (profile.id, profile.skills) if hasattr(profile, 'skills') else profile
+                for profile in chunk
+            ))
+            
+            # One sparse product per chunk -> sparse (users x jobs) scores
+            score_matrix = index.score_vectors(index.transform(skills_list))
+            
+            for profile_id, (positions, scores) in zip(profile_ids, top_n_per_row(score_matrix, top_n)):
+                yield profile_id, list(zip(index.job_ids[positions].tolist(), scores.tolist()))
+    
+    def recommend_batch(self, profiles, top_n=20, chunk_size=128):
+        """
+        Rank jobs for many users at once.
+        
+        Args:
+            profiles (iterable): UserProfile objects or (profile_id, skills) pairs
+            top_n (int): Number of top jobs per user
+            chunk_size (int): Users scored per matrix product; bounds memory
+        
+        Returns:
+            dict: profile_id -> list of (job_id, similarity_score) pairs
+        """
+        return dict(self.iter_recommend_batch(profiles, top_n, chunk_size))
+    
     def get_recommendations(self, user_skills, jobs_queryset, top_n=20):
         """
         Generate job recommendations based on user skills.
         
         Args:
             user_skills (str): User's skills as comma-separated text
-            jobs_queryset (QuerySet): Django QuerySet of Job objects
+            jobs_queryset (QuerySet): Django QuerySet of Job objects used to
+                fetch the winning jobs; ranked jobs outside it are skipped
             top_n (int): Number of top recommendations to return
         
         Returns:
-            list: List of dictionaries containing job objects and similarity scores
+            list: Dictionaries containing job objects and similarity scores,
+                best match first. Jobs with no similarity are left out.
         """
         # Handle edge cases
         if not user_skills or not user_skills.strip():
             return []
         
-        if not jobs_queryset or jobs_queryset.count() == 0:
+        increment('recommender_requests_total', mode='sync')
+        try:
+            # Concurrent identical queries share one ranking
+            ranked = rank_jobs_shared(self, user_skills, top_n)
+            
+            # Step 3: Fetch only the winning jobs, with the fields we render
+            return self.build_recommendations(ranked, jobs_queryset)
+        
+        except Exception:
+            # Degrade to no recommendations, but count and log the failure
+            increment('recommender_errors_total', stage='get_recommendations')
+            logger.exception('Error in recommendation engine')
             return []
+    
+    def build_recommendations(self, ranked, jobs_queryset):
+        """
+        Turn ranked job ids into recommendation dictionaries.
         
-        # Preprocess user skills
-        user_skills_clean = self.preprocess_skills(user_skills)
+        Args:
+            ranked (list): (job_id, similarity_score) pairs, best match first
+            jobs_queryset (QuerySet): Django QuerySet of Job objects
         
-        # Prepare job skills corpus
-        job_skills_list = []
-        jobs_list = list(jobs_queryset)
+        Returns:
+            list: Dictionaries containing job objects and similarity scores
+        """
+        with span('fetch_jobs'):
+            jobs = jobs_queryset.only(*self.CARD_FIELDS).in_bulk([job_id for job_id, _ in ranked])
+        return self._format_recommendations(ranked, jobs)
+    
+    async def aget_recommendations(self, user_skills, jobs_queryset, top_n=20):
+        """
+        Async get_recommendations() for ASGI views.
+        
+        Scoring runs on the bounded scoring executor, coalesced with identical
+        concurrent queries, and the winning jobs are fetched with the async ORM.
         
-        for job in jobs_list:
-            job_skills = self.preprocess_skills(job.required_skills)
-            job_skills_list.append(job_skills)
+        Args:
+            user_skills (str): User's skills as comma-separated text
+            jobs_queryset (QuerySet): Django QuerySet of Job objects
+            top_n (int): Number of top recommendations to return
         
-        # Create corpus: user skills + all job skills
-        corpus = [user_skills_clean] + job_skills_list
+        Returns:
+            list: Dictionaries containing job objects and similarity scores
+        """
+        from .aio import rank_jobs_async
+        
+        if not user_skills or not user_skills.strip():
+            return []
         
+        increment('recommender_requests_total', mode='async')
         try:
-            # Step 1: Convert text to TF-IDF vectors
-            tfidf_matrix = self.vectorizer.fit_transform(corpus)
-            
-            # Step 2: Calculate cosine similarity
-            # User vector is the first row (index 0)
-            user_vector = tfidf_matrix[0:1]
-            
-            # Job vectors start from index 1
-            job_vectors = tfidf_matrix[1:]
-            
-            # Calculate similarity between user and all jobs
-            similarity_scores = cosine_similarity(user_vector, job_vectors)[0]
-            
-            # Step 3: Create recommendation list with jobs and scores
-            recommendations = []
-            for idx, job in enumerate(jobs_list):
-                similarity_score = similarity_scores[idx]
-                match_percentage = self.calculate_match_percentage(similarity_score)
-                
-                recommendations.append({
-                    'job': job,
-                    'similarity_score': float(similarity_score),
-                    'match_percentage': match_percentage,
-                    'confidence': self._get_confidence_level(similarity_score)
-                })
-            
-            # Step 4: Sort by similarity score (descending) and return top N
-            recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-            
-            return recommendations[:top_n]
+            with span('rank_async'):
+                ranked = await rank_jobs_async(self, user_skills, top_n)
+            with span('fetch_jobs'):
+                jobs = await jobs_queryset.only(*self.CARD_FIELDS).ain_bulk(
+                    [job_id for job_id, _ in ranked]
+                )
+            return self._format_recommendations(ranked, jobs)
         
-        except Exception as e:
-            # Handle any errors gracefully
-            print(f"Error in recommendation engine: {str(e)}")
+        except Exception:
+            increment('recommender_errors_total', stage='aget_recommendations')
+            logger.exception('Error in recommendation engine')
             return []
     
+    def _format_recommendations(self, ranked, jobs):
+        recommendations = []
+        for job_id, similarity_score in ranked:
+            job = jobs.get(job_id)
+            if job is None:
+                # Deactivated since indexing, or filtered out by the queryset
+                continue
+            
+            recommendations.append({
+                'job': job,
+                'similarity_score': float(similarity_score),
+                'match_percentage': self.calculate_match_percentage(similarity_score),
+                'confidence': self._get_confidence_level(similarity_score)
+            })
+        
+        return recommendations
+    
     def _get_confidence_level(self, similarity_score):
         """
         Categorize the match quality based on similarity score.
@@ -164,23 +325,71 @@ class JobRecommender:
         """
         Provide explanation for why a job was recommended.
         
+        Both texts are interned to canonical skill ids, so aliases match
+        ("js" and "javascript"); explain_recommendations() does the same
+        for stored ids in bulk.
+        
         Args:
             user_skills (str): User's skills
             job_skills (str): Job's required skills
         
         Returns:
-            dict: Explanation details including matching skills
+            dict: Explanation details including matching skills (canonical names)
         """
-        user_skills_set = set(skill.strip().lower() for skill in user_skills.split(',') if skill.strip())
-        job_skills_set = set(skill.strip().lower() for skill in job_skills.split(',') if skill.strip())
+        from jobs.skills import intern_skills, match_skill_ids, skill_dictionary
         
-        # Find matching skills
-        matching_skills = user_skills_set.intersection(job_skills_set)
-        missing_skills = job_skills_set.difference(user_skills_set)
+        job_skill_ids = intern_skills(job_skills)
+        matching, missing = match_skill_ids(intern_skills(user_skills), job_skill_ids)
         
         return {
-            'matching_skills': list(matching_skills),
-            'missing_skills': list(missing_skills),
-            'match_count': len(matching_skills),
-            'total_required': len(job_skills_set)
+            'matching_skills': skill_dictionary.names(matching),
+            'missing_skills': skill_dictionary.names(missing),
+            'match_count': len(matching),
+            'total_required': len(job_skill_ids)
         }
+    
+    def explain_recommendations(self, user_skill_ids, recommendations):
+        """
+        Explain all recommendations at once from interned skill ids.
+        
+        The job skill ids are concatenated into one array and tested against
+        the user's ids in a single vectorized pass, and skill names are
+        resolved once for the whole batch.
+        
+        Args:
+            user_skill_ids (list): User's sorted skill ids (UserProfile.skill_ids)
+            recommendations (list): Dictionaries from get_recommendations();
+                each gets an 'explanation' entry
+        
+        Returns:
+            list: The same recommendations
+        """
+        from jobs.skills import skill_dictionary
+        
+        if not recommendations:
+            return recommendations
+        
+        with span('explain'):
+            job_skill_ids = [rec['job'].skill_ids or [] for rec in recommendations]
+            lengths = np.array([len(ids) for ids in job_skill_ids])
+            flat = np.fromiter(
+                (skill_id for ids in job_skill_ids for skill_id in ids),
+                dtype=np.int64, count=int(lengths.sum())
+            )
+            matched = np.isin(flat, np.asarray(user_skill_ids, dtype=np.int64))
+        
+            distinct = np.unique(flat).tolist()
+            names = dict(zip(distinct, skill_dictionary.names(distinct)))
+        
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+            for rec, start, end in zip(recommendations, offsets[:-1], offsets[1:]):
+                ids, hits = flat[start:end].tolist(), matched[start:end].tolist()
+                matching_skills = [names[skill_id] for skill_id, hit in zip(ids, hits) if hit]
+                missing_skills = [names[skill_id] for skill_id, hit in zip(ids, hits) if not hit]
+                rec['explanation'] = {
+                    'matching_skills': matching_skills,
+                    'missing_skills': missing_skills,
+                    'match_count': len(matching_skills),
+                    'total_required': len(ids),
+                }
+        return recommendations
@@ -0,0 +1,137 @@
+"""
+Reverse Matching
+
+Scores jobs against every user profile at once. The skill vectors of all
+profiles are kept in one L2-normalized sparse matrix in the feature space of
+the job index, so matching a batch of new jobs is one
+(profiles x terms) @ (terms x jobs) product per chunk of profiles instead of
+a recommendation query per user.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from .metrics import observe, span
+
+
+class ProfileMatrix:
+    """
+    Skill vectors of user profiles, vectorized with one fit of a JobIndex.
+
+    Changed profiles are re-vectorized and appended and their old rows are
+    tombstoned, as in JobIndex.apply_updates.
+
+    Attributes:
+        fit (tuple): (built_at, n_fitted) of the index fit used
+        profile_ids (np.ndarray): Profile primary keys, one per matrix row
+        matrix (scipy.sparse.csr_matrix): L2-normalized profile vectors
+    """
+
+    # Placeholder profile id of rows whose profile was removed or re-vectorized
+    TOMBSTONE = -1
+
+    def __init__(self, fit, profile_ids, matrix):
+        self.fit = fit
+        self.profile_ids = np.asarray(profile_ids, dtype=np.int64)
+        self.matrix = sparse.csr_matrix(matrix)
+
+    @classmethod
+    def build(cls, index, rows, chunk_size=4096):
+        """
+        Vectorize user profiles with the vocabulary of a job index.
+
+        Args:
+            index (JobIndex): Job index
+            rows (iterable): (profile_id, skills) pairs
+            chunk_size (int): Profiles vectorized at a time
+
+        Returns:
+            ProfileMatrix: Vectorized profiles
+        """
+        profile_ids = []
+        blocks = []
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                blocks.append(cls._vectorize(index, chunk, profile_ids))
+                chunk = []
+        if chunk:
+            blocks.append(cls._vectorize(index, chunk, profile_ids))
+
+        if blocks:
+            matrix = sparse.vstack(blocks, format='csr')
+        else:
+            matrix = sparse.csr_matrix((0, index.n_terms))
+        return cls((index.built_at, index.n_fitted), profile_ids, matrix)
+
+    @staticmethod
+    def _vectorize(index, chunk, profile_ids):
+        ids, skills_list = zip(*chunk)
+        profile_ids.extend(ids)
+        return index.transform(list(skills_list))
+
+    def __len__(self):
+        return len(self.profile_ids)
+
+    def apply_updates(self, index, changes):
+        """
+        Return a new matrix with changed profiles re-vectorized.
+
+        Args:
+            index (JobIndex): Job index of the same fit
+            changes (dict): profile_id -> skills, or None to remove the profile
+
+        Returns:
+            ProfileMatrix: Updated matrix
+        """
+        if not changes:
+            return self
+
+        profile_ids = self.profile_ids.copy()
+        matrix = self.matrix
+        stale = np.isin(profile_ids, np.fromiter(changes, dtype=np.int64))
+        if stale.any():
+            profile_ids[stale] = self.TOMBSTONE
+            matrix = sparse.diags((~stale).astype(np.float64)) @ matrix
+            matrix.eliminate_zeros()
+
+        upserts = {
+            profile_id: skills for profile_id, skills in changes.items() if skills is not None
+        }
+        if upserts:
+            profile_ids = np.concatenate([profile_ids, np.fromiter(upserts, dtype=np.int64)])
+            matrix = sparse.vstack([matrix, index.transform(list(upserts.values()))], format='csr')
+
+        return ProfileMatrix(self.fit, profile_ids, matrix)
+
+
+def iter_profile_matches(profiles, job_vectors, threshold, chunk_size=4096):
+    """
+    Profiles whose similarity with each job reaches a threshold.
+
+    Args:
+        profiles (ProfileMatrix): Vectorized profiles
+        job_vectors (scipy.sparse.csr_matrix): One L2-normalized row per job,
+            in the same feature space
+        threshold (float): Minimum cosine similarity
+        chunk_size (int): Profiles per sparse matrix product; bounds memory
+
+    Yields:
+        tuple: (job_rows, profile_ids, scores) arrays of the matches of one
+            chunk of profiles; job_rows index ``job_vectors``
+    """
+    job_vectors_t = sparse.csr_matrix(job_vectors).T.tocsr()
+    matched = 0
+    for start in range(0, len(profiles), chunk_size):
+        with span('reverse_match'):
+            # (profiles x terms) @ (terms x jobs) -> sparse (profiles x jobs) scores
+            score_matrix = (profiles.matrix[start:start + chunk_size] @ job_vectors_t).tocoo()
+            hits = score_matrix.data >= threshold
+        if not hits.any():
+            continue
+        # Tombstoned rows are zeroed, so they never reach a positive threshold
+        profile_ids = profiles.profile_ids[start + score_matrix.row[hits]]
+        matched += int(hits.sum())
+        yield score_matrix.col[hits], profile_ids, score_matrix.data[hits]
+    observe('recommender_reverse_matches', matched)
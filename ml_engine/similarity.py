@@ -0,0 +1,72 @@
+"""
+Job-to-job Similarity
+
+Nearest neighbours of jobs among the other jobs of a JobIndex. Rows of the
+job matrix are L2-normalized, so scoring a chunk of job vectors against the
+index gives the cosine similarities of those jobs with every job; a sparse
+product per chunk bounds memory while the whole catalog is processed.
+"""
+
+import numpy as np
+
+from .ranking import top_n_per_row
+
+
+def iter_similar_jobs(index, positions=None, k=10, chunk_size=512):
+    """
+    Top-k most similar other jobs of indexed jobs.
+
+    Args:
+        index (JobIndex): Job index
+        positions (array-like): Rows to compute (defaults to every live row)
+        k (int): Neighbours per job
+        chunk_size (int): Jobs per sparse matrix product; bounds memory
+
+    Yields:
+        tuple: (job_id, neighbours) where neighbours is a list of
+            (job_id, similarity_score) pairs, most similar first
+    """
+    if positions is None:
+        positions = np.flatnonzero(index.job_ids != index.TOMBSTONE)
+    positions = np.asarray(positions, dtype=np.int64)
+    if index.n_terms == 0:
+        return
+
+    for start in range(0, len(positions), chunk_size):
+        chunk = positions[start:start + chunk_size]
+        # Sparse (chunk x jobs) similarities
+        score_matrix = index.score_vectors(index.row_vectors(chunk))
+
+        # One extra, as every job is its own best match
+        for position, (columns, scores) in zip(chunk, top_n_per_row(score_matrix, k + 1)):
+            others = columns != position
+            neighbours = index.job_ids[columns[others]][:k]
+            yield int(index.job_ids[position]), list(zip(neighbours.tolist(), scores[others][:k].tolist()))
+
+
+def affected_positions(index, job_ids, fanout):
+    """
+    Rows whose neighbour lists may change when ``job_ids`` change.
+
+    Similarity is symmetric, so a changed job can only enter the lists of
+    jobs it is itself close to; the ``fanout`` closest jobs of each changed
+    job are returned together with the changed jobs themselves.
+
+    Args:
+        index (JobIndex): Job index including the changes
+        job_ids (iterable): Changed job ids still in the index
+        fanout (int): Closest jobs of each changed job to refresh
+
+    Returns:
+        np.ndarray: Sorted row numbers
+    """
+    changed = [index.position(job_id) for job_id in job_ids]
+    changed = [position for position in changed if position is not None]
+    if not changed or index.n_terms == 0:
+        return np.asarray(changed, dtype=np.int64)
+
+    affected = [np.asarray(changed, dtype=np.int64)]
+    score_matrix = index.score_vectors(index.row_vectors(changed))
+    for columns, _ in top_n_per_row(score_matrix, fanout):
+        affected.append(columns.astype(np.int64))
+    return np.unique(np.concatenate(affected))
@@ -0,0 +1,112 @@
+"""
+Single-flight Ranking
+
+When many requests ask for the same skills at once (a newsletter send, a
+popular search), only the first computes the ranking; the others wait for
+its result instead of scoring the same query again. Keys are the normalized
+skills and top_n, so "Django, python" and "Python,Django" share one flight.
+Only in-flight work is shared; finished rankings are reused by the result
+cache (see ml_engine/cache.py).
+"""
+
+import threading
+
+from .cache import skills_key
+from .conf import get_setting
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key across threads.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, func, *args):
+        """
+        Run ``func(*args)``, or wait for the identical call already running.
+
+        Args:
+            key (hashable): Identity of the computation
+            func (callable): Function to run
+            *args: Its arguments
+
+        Returns:
+            The result of ``func``; its exception is raised in every caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+                leader = True
+            else:
+                flight.followers += 1
+                self.followers += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        """
+        Counters of shared work.
+
+        Returns:
+            dict: leaders (computations run), followers (calls that waited) and in_flight
+        """
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'in_flight': len(self._flights),
+            }
+
+
+# Flights shared by the threads of this process
+ranking_flights = SingleFlight()
+
+
+def rank_jobs_shared(recommender, user_skills, top_n=20):
+    """
+    JobRecommender.rank_jobs(), shared with identical concurrent queries.
+
+    Args:
+        recommender (JobRecommender): Recommender to rank with
+        user_skills (str): User's skills as comma-separated text
+        top_n (int): Number of top jobs to return
+
+    Returns:
+        list: (job_id, similarity_score) pairs, best match first
+    """
+    if not get_setting('SINGLE_FLIGHT'):
+        return recommender.rank_jobs(user_skills, top_n)
+    # The recommender's own index; None would group rankings of any index
+    key = (skills_key(user_skills), top_n, id(recommender.get_index()))
+    return ranking_flights.do(key, recommender.rank_jobs, user_skills, top_n)
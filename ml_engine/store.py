@@ -0,0 +1,256 @@
+"""
+On-disk Job Index Store
+
+Serializes a JobIndex as plain arrays (the CSR data/indices/indptr of the job
+matrix, the job ids and the IDF weights) plus a JSON vocabulary. Workers open
+the arrays with ``numpy.memmap``, so every gunicorn worker shares one physical
+copy through the page cache and starting up only maps files.
+
+Each build is written to its own generation directory; the ``CURRENT`` file
+names the live generation and is replaced atomically, so rebuilds never
+disturb workers that are still reading the previous generation:
+
+    <directory>/
+        CURRENT
+        20260101T120000-<version>/
+            meta.json  vocabulary.json  idf.npy
+            data.npy  indices.npy  indptr.npy  job_ids.npy
+            ivf_*.npy         (IVF index, when the fit has one)
+            inverted_*.npy    (CSC postings, when the fit has them)
+"""
+
+import itertools
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .preprocessing import build_vectorizer
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'build.lock'
+ARRAYS = ('data', 'indices', 'indptr', 'job_ids')
+IVF_ARRAYS = ('components', 'centroids', 'list_rows', 'list_offsets')
+INVERTED_ARRAYS = ('data', 'indices', 'indptr')
+
+
+def current_generation(directory):
+    """
+    Name of the live generation.
+
+    Args:
+        directory (str): Store directory
+
+    Returns:
+        str or None: Generation directory name, or None if nothing is stored
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_index(index, directory, keep=2):
+    """
+    Write an index as a new generation and make it the live one.
+
+    Args:
+        index (JobIndex): Index to store
+        directory (str): Store directory
+        keep (int): Generations to keep on disk, including the new one
+
+    Returns:
+        str: Name of the new generation
+    """
+    name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(index.built_at))}-{index.version}"
+    generation = name
+    # Never rewrite the files of a generation that workers may have mapped
+    for number in itertools.count(2):
+        if not os.path.exists(os.path.join(directory, generation)):
+            break
+        generation = f'{name}-{number}'
+    path = os.path.join(directory, generation)
+    os.makedirs(path)
+
+    matrix = index.job_matrix
+    arrays = {
+        'data': matrix.data,
+        'indices': matrix.indices,
+        'indptr': matrix.indptr,
+        'job_ids': index.job_ids,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+
+    vectorizer = index.vectorizer
+    vocabulary = {}
+    if vectorizer is not None:
+        vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+        np.save(os.path.join(path, 'idf.npy'), vectorizer.idf_)
+    with open(os.path.join(path, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+        json.dump(vocabulary, f)
+
+    ivf = index.ivf
+    if ivf is not None:
+        for name in IVF_ARRAYS:
+            np.save(os.path.join(path, f'ivf_{name}.npy'), np.ascontiguousarray(getattr(ivf, name)))
+
+    inverted = index.inverted
+    if inverted is not None:
+        for name in INVERTED_ARRAYS:
+            np.save(
+                os.path.join(path, f'inverted_{name}.npy'),
+                np.ascontiguousarray(getattr(inverted.postings, name)),
+            )
+
+    meta = {
+        'version': index.version,
+        'fit_version': index.fit_version,
+        'built_at': index.built_at,
+        'n_fitted': index.n_fitted,
+        'n_changed': index.n_changed,
+        'change_id': index.change_id,
+        'applied_changes': index.applied_changes.tolist(),
+        'shape': list(matrix.shape),
+        'ivf_rows': ivf.n_rows if ivf is not None else None,
+        'inverted_rows': inverted.n_rows if inverted is not None else None,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    # Atomic swap: readers see either the old or the new generation
+    pointer = os.path.join(directory, f'{CURRENT_FILE}.{os.getpid()}.tmp')
+    with open(pointer, 'w', encoding='utf-8') as f:
+        f.write(generation)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    _remove_old_generations(directory, keep)
+    return generation
+
+
+def load_index(directory, generation=None):
+    """
+    Map a stored generation into memory.
+
+    Args:
+        directory (str): Store directory
+        generation (str): Generation to load (defaults to the live one)
+
+    Returns:
+        JobIndex or None: Memory-mapped index, or None if nothing is stored
+    """
+    from .ann import IVFIndex
+    from .index import JobIndex
+    from .inverted import InvertedSkillIndex
+
+    generation = generation or current_generation(directory)
+    if generation is None:
+        return None
+    path = os.path.join(directory, generation)
+
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    with open(os.path.join(path, 'vocabulary.json'), encoding='utf-8') as f:
+        vocabulary = json.load(f)
+
+    arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+        for name in ARRAYS
+    }
+    job_matrix = sparse.csr_matrix(
+        (arrays['data'], arrays['indices'], arrays['indptr']),
+        shape=tuple(meta['shape']),
+        copy=False,
+    )
+
+    vectorizer = None
+    if vocabulary:
+        vectorizer = build_vectorizer()
+        vectorizer.vocabulary_ = vocabulary
+        vectorizer.idf_ = np.load(os.path.join(path, 'idf.npy'))
+
+    ivf = None
+    if meta.get('ivf_rows') is not None:
+        ivf = IVFIndex(
+            *(np.load(os.path.join(path, f'ivf_{name}.npy'), mmap_mode='r') for name in IVF_ARRAYS),
+            n_rows=meta['ivf_rows'],
+        )
+
+    inverted = None
+    if meta.get('inverted_rows') is not None:
+        postings = {
+            name: np.load(os.path.join(path, f'inverted_{name}.npy'), mmap_mode='r')
+            for name in INVERTED_ARRAYS
+        }
+        inverted = InvertedSkillIndex(
+            sparse.csc_matrix(
+                (postings['data'], postings['indices'], postings['indptr']),
+                shape=(meta['inverted_rows'], meta['shape'][1]),
+                copy=False,
+            ),
+            meta['inverted_rows'],
+        )
+
+    return JobIndex(
+        vectorizer, arrays['job_ids'], job_matrix, meta['version'],
+        built_at=meta['built_at'],
+        n_fitted=meta['n_fitted'],
+        n_changed=meta['n_changed'],
+        generation=generation,
+        change_id=meta.get('change_id', 0),
+        applied_changes=meta.get('applied_changes'),
+        ivf=ivf,
+        fit_version=meta.get('fit_version'),
+        inverted=inverted,
+    )
+
+
+def acquire_build_lock(directory, timeout=600):
+    """
+    Claim the right to rebuild the store, so workers don't all rebuild at once.
+
+    Args:
+        directory (str): Store directory
+        timeout (int): Seconds after which an abandoned lock is broken
+
+    Returns:
+        bool: True if the lock was acquired
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, LOCK_FILE)
+    try:
+        if time.time() - os.path.getmtime(path) > timeout:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def release_build_lock(directory):
+    """Release the lock taken by acquire_build_lock()."""
+    try:
+        os.remove(os.path.join(directory, LOCK_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def _remove_old_generations(directory, keep):
+    generations = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'meta.json'))
+    )
+    current = current_generation(directory)
+    for generation in generations[:-keep]:
+        if generation == current:
+            continue
+        # Workers may still map these files; on POSIX the pages stay valid
+        # until they are unmapped, elsewhere removal is retried next time
+        shutil.rmtree(os.path.join(directory, generation), ignore_errors=True)
@@ -51,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'jobs.middleware.RecommenderTimingMiddleware',
+    'jobs.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'smart_job_recommender.urls'
@@ -132,3 +134,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'jobs:dashboard'
 LOGOUT_REDIRECT_URL = 'jobs:home'
+
+# Recommendation engine (see ml_engine/conf.py for all RECOMMENDER_* settings)
+# Memory-mapped job index shared by all worker processes
+RECOMMENDER_INDEX_DIR = BASE_DIR / 'var' / 'job_index'